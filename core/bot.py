@@ -14,10 +14,16 @@ from ib_insync import *
 from core.connection import ConnectionManager
 from core.scheduler import Scheduler
 from data_fetch.historical_data import StockDataFetcher
+from data_fetch.market_context import MarketContext, configure_market_context
+from data_fetch.persistence import PersistenceStore
+from data_fetch.price_panel import PricePanel
 from data_fetch.stock_fetcher import StockTickerFetcher
 from execution.order_manager import OrderManager
 from execution.position_manager import PositionManager
 from strategy.ai_analysis.ai_analyzer import AIAnalyzer
+from strategy.ai_analysis.data_preparation.feature_cache import FeatureCache
+from strategy.ai_analysis.data_preparation.feature_store import FeatureStore
+from strategy.ai_analysis.data_preparation.parallel_features import extraction_pool
 from strategy.ai_analysis.retrain_trigger import RetrainTrigger
 from utils.alerts import AlertManager
 from utils.git_manager import GitManager
@@ -88,23 +94,44 @@ class TradingBot:
             return False
         return datetime.now() - self.last_train_time >= self.TRAIN_INTERVAL
 
-    def train_modules(self, ai_analyzers: dict[str, AIAnalyzer], stock_fetcher: StockTickerFetcher, retrain_trigger: RetrainTrigger):
+    def train_modules(
+        self,
+        ai_analyzers: dict[str, AIAnalyzer],
+        stock_fetcher: StockTickerFetcher,
+        stock_data: StockDataFetcher,
+        retrain_trigger: RetrainTrigger,
+    ):
         """Run a full pooled retrain of the AI models on the current ticker universe."""
         try:
             self.logger.info('Starting AI training...')
 
             for ai_analyzer in ai_analyzers.values():
                 ai_analyzer.reset_dataset()
+            stock_data.executor.stats.reset()
+
+            # Feature extraction runs on one process pool for every sector; 0 uses every core
+            workers = self.config.get('data', {}).get('feature_extraction', {}).get('workers', 0) or None
+            pool = extraction_pool(workers)
 
             added = 0
-            for sector, industries in stock_fetcher.categorized_stocks.items():
-                addedPerSector = 0
-                for industry, tickers in industries.items():
-                    for ticker in tickers:
-                        if ai_analyzers[sector].add_ticker(ticker):
-                            added += 1
-                            addedPerSector += 1
-                self.logger.info(f'Added {addedPerSector} tickers for {sector} sector')
+            try:
+                for sector, industries in stock_fetcher.categorized_stocks.items():
+                    addedPerSector = ai_analyzers[sector].add_tickers([t for tickers in industries.values() for t in tickers], workers, pool)
+                    added += addedPerSector
+                    self.logger.info(f'Added {addedPerSector} tickers for {sector} sector')
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+
+            stock_data.executor.stats.log_summary('Training fetch')
+
+            # Refresh the shared memory-mapped panel from the freshly updated bar store
+            if stock_data.bar_store is not None:
+                try:
+                    all_tickers = [t for industries in stock_fetcher.categorized_stocks.values() for tickers in industries.values() for t in tickers]
+                    PricePanel.build(stock_data.bar_store, all_tickers)
+                except Exception as e:
+                    self.logger.warning(f'Failed to build price panel: {e}')
 
             for ai_analyzer in ai_analyzers.values():
                 ai_analyzer.finalize_training(val_split=0.2)
@@ -115,11 +142,17 @@ class TradingBot:
         except Exception as e:
             self.logger.error(f'AI training failed; bot will continue with previous model: {e}')
 
-    def sectored_ai_objects(self, stock_data: StockDataFetcher, stock_fetcher: StockTickerFetcher) -> dict[str, AIAnalyzer]:
-        """Create separate AI analyzers for each sector"""
+    def sectored_ai_objects(
+        self, stock_data: StockDataFetcher, stock_fetcher: StockTickerFetcher, market_context: MarketContext | None = None
+    ) -> dict[str, AIAnalyzer]:
+        """Create separate AI analyzers for each sector, all reading one VIX/SPY market context, feature cache and feature store"""
+        feature_cache = FeatureCache.from_config(self.config)
+        feature_store = FeatureStore.from_config(self.config)
         sector_analyzers = {}
         for sector in stock_fetcher.categorized_stocks:
-            analyzer = AIAnalyzer(stock_data, params=self.params)
+            analyzer = AIAnalyzer(
+                stock_data, params=self.params, market_context=market_context, feature_cache=feature_cache, feature_store=feature_store
+            )
             sector_analyzers[sector] = analyzer
         return sector_analyzers
 
@@ -127,15 +160,19 @@ class TradingBot:
         """Main bot loop"""
         self.logger.info('Starting trading bot...')
 
-        stock_fetcher = StockTickerFetcher()
+        # One VIX/SPY cache for risk, retrain trigger and AI features
+        market_context = configure_market_context(self.config)
+        stock_fetcher = StockTickerFetcher(self.config)
         retrain_trigger = RetrainTrigger()
         stock_data = StockDataFetcher(self.ib, self.config, self.params)
+        stock_data.evict(stock_fetcher.universe_diff['removed'])
         scheduler = Scheduler()
-        ai_analyzers = self.sectored_ai_objects(stock_data, stock_fetcher)
+        ai_analyzers = self.sectored_ai_objects(stock_data, stock_fetcher, market_context)
         alert_manager = AlertManager(self.config, self.params)
-        position_manager = PositionManager(self.ib, alert_manager, self.config, self.params)
+        persistence = PersistenceStore.from_config(self.config)
+        position_manager = PositionManager(self.ib, alert_manager, self.config, self.params, persistence)
         connection_manager = ConnectionManager(self.ib, position_manager, alert_manager, self.config, self.params)
-        order_manager = OrderManager(self.ib, stock_data, position_manager, alert_manager, ai_analyzers, self.config, self.params)
+        order_manager = OrderManager(self.ib, stock_data, position_manager, alert_manager, ai_analyzers, self.config, self.params, persistence)
         git_manager = GitManager(self.ib, connection_manager, self.config, self.params)
 
         try:
@@ -156,7 +193,7 @@ class TradingBot:
 
             # Cold-start training if no model exists
             if self.should_retrain(scheduler, retrain_trigger):
-                self.train_modules(ai_analyzers, stock_fetcher, retrain_trigger)
+                self.train_modules(ai_analyzers, stock_fetcher, stock_data, retrain_trigger)
 
             while True:
                 market_open = scheduler.is_market_hours()
@@ -187,7 +224,7 @@ class TradingBot:
                         last_git_check = git_manager.git(last_git_check)
 
                         if self.should_retrain(scheduler, retrain_trigger):
-                            self.train_modules(ai_analyzers, stock_fetcher, retrain_trigger)
+                            self.train_modules(ai_analyzers, stock_fetcher, stock_data, retrain_trigger)
 
                         self.ib.sleep(600)
 
@@ -203,3 +240,5 @@ class TradingBot:
             alert_manager.alert_error(str(e), 'Unexpected bot error thrown.')
         finally:
             connection_manager.disconnect()
+            if persistence is not None:
+                persistence.close()
@@ -0,0 +1,55 @@
+"""
+Per-scan bar context shared by the strategy and AI paths.
+
+The 200MA strategy and the AI analyzer need different lookbacks for the same
+ticker. Rather than fetching each ticker once per consumer, the context
+fetches the longest lookback any consumer needs and hands every consumer a
+tail slice of that single frame. A slice is a new frame (re-indexed from 0)
+whose columns share the full frame's arrays, so no bars are copied.
+"""
+
+import logging
+
+import pandas as pd
+
+from data_fetch.historical_data import StockDataFetcher
+
+logger = logging.getLogger()
+
+
+class BarContext:
+    def __init__(self, stock_data: StockDataFetcher, lookbacks: dict[str, int]):
+        """
+        Parameters
+        ----------
+        stock_data : fetcher used to download the bars.
+        lookbacks  : consumer name -> lookback_days it expects, e.g.
+                     {'strategy': 250, 'ai': 1825}.
+        """
+        self.stock_data = stock_data
+        self.lookbacks = lookbacks
+        self.max_lookback = max(lookbacks.values())
+        self._bars: dict[str, pd.DataFrame] = {}
+
+    def load(self, symbols: list[str]) -> None:
+        """Fetch the longest required history for every symbol not loaded yet."""
+        missing = [s for s in symbols if s not in self._bars]
+        if missing:
+            self._bars.update(self.stock_data.get_historical_data_batch(missing, self.max_lookback))
+
+    def get(self, symbol: str, consumer: str) -> pd.DataFrame | None:
+        """The bars `consumer` would have fetched for `symbol`, sliced from the shared frame."""
+        full = self._bars.get(symbol)
+        if full is None:
+            return None
+        return StockDataFetcher.slice_lookback(full, self.lookbacks[consumer])
+
+    def frame(self, symbol: str) -> pd.DataFrame | None:
+        """The full shared frame for `symbol`, before any consumer slicing."""
+        return self._bars.get(symbol)
+
+    def replace(self, symbol: str, df: pd.DataFrame) -> None:
+        self._bars[symbol] = df
+
+    def clear(self) -> None:
+        self._bars.clear()
@@ -0,0 +1,92 @@
+"""
+On-disk store of daily OHLCV bars, one columnar file per ticker.
+
+Each ticker is saved as a ``.npz`` archive under ``data/bars/`` holding one
+array per column (open/high/low/close/volume/date) plus a little metadata:
+
+* ``history_start``: the earliest date that has been requested for the
+  ticker. A newer listing simply has no bars before its IPO, so this is
+  what tells the fetcher whether a deeper lookback needs a full download.
+* ``fetched_at``: unix time of the last successful network refresh.
+* ``tz``: the exchange timezone of the ``date`` column, so loaded frames
+  match what yfinance returns.
+"""
+
+import logging
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger()
+
+
+class BarStore:
+    COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+    def __init__(self, root: str | None = None):
+        self.root = root or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'bars')
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, symbol: str) -> str:
+        # Index symbols such as ^VIX and share classes such as BRK/B are not valid file names everywhere
+        safe = re.sub(r'[^A-Za-z0-9.\-]', '_', symbol)
+        return os.path.join(self.root, f'{safe}.npz')
+
+    def has(self, symbol: str) -> bool:
+        return os.path.exists(self._path(symbol))
+
+    def load(self, symbol: str) -> tuple[pd.DataFrame | None, dict]:
+        """
+        Load the stored bars for `symbol`.
+
+        Returns (DataFrame in the StockDataFetcher schema, metadata dict), or
+        (None, {}) if nothing is stored or the file can't be read.
+        """
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None, {}
+
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                data = {col: archive[col] for col in self.COLUMNS}
+                dates = archive['date']
+                tz = str(archive['tz'])
+                meta = {
+                    'history_start': pd.Timestamp(archive['history_start'][()]),
+                    'fetched_at': float(archive['fetched_at']),
+                }
+        except Exception as e:
+            logger.warning(f'Bar store: failed to read {path}, ignoring cached bars: {e}')
+            return None, {}
+
+        df = pd.DataFrame(data)
+        date_index = pd.DatetimeIndex(dates)
+        df['date'] = date_index.tz_localize(tz) if tz else date_index
+        df['symbol'] = symbol
+        return df, meta
+
+    def save(self, symbol: str, df: pd.DataFrame, history_start: pd.Timestamp, fetched_at: float | None = None) -> None:
+        """Overwrite the stored bars for `symbol` (atomic rename, so readers never see a partial file)."""
+        dates = pd.DatetimeIndex(df['date'])
+        tz = str(dates.tz) if dates.tz is not None else ''
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+
+        arrays = {col: df[col].to_numpy(dtype=np.float64) for col in self.COLUMNS}
+        arrays['date'] = dates.values.astype('datetime64[ns]')
+        arrays['tz'] = np.array(tz)
+        arrays['history_start'] = np.array(pd.Timestamp(history_start).to_datetime64(), dtype='datetime64[ns]')
+        arrays['fetched_at'] = np.array(time.time() if fetched_at is None else fetched_at)
+
+        path = self._path(symbol)
+        tmp_path = f'{path}.tmp.npz'
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    def delete(self, symbol: str) -> None:
+        path = self._path(symbol)
+        if os.path.exists(path):
+            os.remove(path)
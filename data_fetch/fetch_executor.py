@@ -0,0 +1,217 @@
+"""
+Concurrent, rate-limited executor for market-data requests.
+
+Requests are run on a bounded thread pool so several can be in flight at
+once, while a token bucket caps the request rate to stay under the data
+provider's throttling limits. Failed requests are retried with exponential
+backoff and every request is bounded by a timeout. Latency and failure
+counts are tracked per key (usually the ticker) for the end-of-scan report.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger()
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0:
+            raise ValueError('rate must be > 0')
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait_seconds = (1.0 - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+class FetchStats:
+    """Per-key request latency and failure counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: dict[str, float] = {}
+        self.failures: dict[str, int] = {}
+        self.requests = 0
+
+    def record(self, key: str, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self.latency[key] = latency
+            if not ok:
+                self.failures[key] = self.failures.get(key, 0) + 1
+
+    def mark_failed(self, key: str) -> None:
+        """Count a failure for `key` without a latency sample (e.g. a symbol missing from a batch response)."""
+        with self._lock:
+            self.failures[key] = self.failures.get(key, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latency.clear()
+            self.failures.clear()
+            self.requests = 0
+
+    def summary(self) -> dict:
+        with self._lock:
+            latencies = np.array(list(self.latency.values())) if self.latency else np.zeros(1)
+            slowest = sorted(self.latency.items(), key=lambda kv: kv[1], reverse=True)[:5]
+            return {
+                'requests': self.requests,
+                'keys': len(self.latency),
+                'failed_keys': len(self.failures),
+                'failures': sum(self.failures.values()),
+                'latency_p50': float(np.percentile(latencies, 50)),
+                'latency_p95': float(np.percentile(latencies, 95)),
+                'slowest': slowest,
+            }
+
+    def log_summary(self, label: str = 'Fetch') -> None:
+        s = self.summary()
+        logger.info(
+            f'{label}: {s["requests"]} requests for {s["keys"]} tickers, {s["failures"]} failures '
+            f'({s["failed_keys"]} tickers), latency p50={s["latency_p50"]:.2f}s p95={s["latency_p95"]:.2f}s'
+        )
+        if s['slowest']:
+            logger.debug(f'{label} slowest: {", ".join(f"{k} {v:.2f}s" for k, v in s["slowest"])}')
+
+
+class FetchExecutor:
+    def __init__(
+        self,
+        max_workers: int = 4,
+        requests_per_second: float = 2.0,
+        burst: int = 4,
+        max_retries: int = 3,
+        backoff_seconds: float = 1.0,
+        timeout_seconds: float = 30.0,
+    ):
+        """
+        Parameters
+        ----------
+        max_workers         : maximum number of requests in flight at once.
+        requests_per_second : sustained request rate allowed by the token bucket.
+        burst               : how many requests may start back-to-back before
+                              the rate limit kicks in.
+        max_retries         : retries after the first attempt fails.
+        backoff_seconds     : delay before the first retry, doubled each time.
+        timeout_seconds     : per-request timeout. Also passed to the provider
+                              calls so a hung socket doesn't pin a worker.
+        """
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.stats = FetchStats()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fetch')
+
+    @classmethod
+    def from_config(cls, config) -> 'FetchExecutor':
+        fetch_config = (config or {}).get('data', {}).get('fetch', {})
+        return cls(
+            max_workers=fetch_config.get('max_workers', 4),
+            requests_per_second=fetch_config.get('requests_per_second', 2.0),
+            burst=fetch_config.get('burst', 4),
+            max_retries=fetch_config.get('max_retries', 3),
+            backoff_seconds=fetch_config.get('backoff_seconds', 1.0),
+            timeout_seconds=fetch_config.get('timeout_seconds', 30.0),
+        )
+
+    def _attempt(self, keys: list[str], fn: Callable[[], Any]) -> Any:
+        """Run `fn` with rate limiting and retries; raises the last error if every attempt fails."""
+        delay = self.backoff_seconds
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            start = time.monotonic()
+            try:
+                result = fn()
+            except Exception as e:
+                elapsed = time.monotonic() - start
+                for key in keys:
+                    self.stats.record(key, elapsed, ok=False)
+                if attempt == self.max_retries:
+                    raise
+                logger.debug(f'Fetch for {keys[0]}{"..." if len(keys) > 1 else ""} failed ({e}), retrying in {delay:.1f}s')
+                time.sleep(delay)
+                delay *= 2
+                continue
+
+            elapsed = time.monotonic() - start
+            for key in keys:
+                self.stats.record(key, elapsed, ok=True)
+            return result
+
+    def call(self, key: str | list[str], fn: Callable[[], Any]) -> Any:
+        """Run one request synchronously (rate-limited and retried). Returns None on failure."""
+        keys = [key] if isinstance(key, str) else list(key)
+        future = self._pool.submit(self._attempt, keys, fn)
+        try:
+            return future.result(timeout=self.timeout_seconds * (self.max_retries + 1))
+        except FutureTimeoutError:
+            logger.warning(f'Fetch for {keys[0]} timed out')
+            for k in keys:
+                self.stats.record(k, self.timeout_seconds, ok=False)
+        except Exception as e:
+            logger.warning(f'Fetch for {keys[0]} failed after {self.max_retries + 1} attempts: {e}')
+        return None
+
+    def map(self, tasks: Iterable[tuple[str | list[str], Callable[[], Any]]]) -> list[Any]:
+        """
+        Run many requests concurrently and return their results in order.
+
+        Each task is (key or list of keys, zero-argument callable). Tasks that
+        fail every attempt or time out produce None.
+        """
+        submitted = []
+        for key, fn in tasks:
+            keys = [key] if isinstance(key, str) else list(key)
+            submitted.append((keys, self._pool.submit(self._attempt, keys, fn)))
+
+        if not submitted:
+            return []
+
+        # Requests queue behind the rate limiter, so the overall deadline grows with the batch
+        deadline = self.timeout_seconds * (self.max_retries + 1) + len(submitted) / self.bucket.rate
+        wait([f for _, f in submitted], timeout=deadline)
+
+        results = []
+        for keys, future in submitted:
+            if not future.done():
+                future.cancel()
+                logger.warning(f'Fetch for {keys[0]} timed out')
+                for k in keys:
+                    self.stats.record(k, self.timeout_seconds, ok=False)
+                results.append(None)
+                continue
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.warning(f'Fetch for {keys[0]} failed after {self.max_retries + 1} attempts: {e}')
+                results.append(None)
+        return results
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,53 +1,259 @@
 """
-Gets stock historical data using yfinance (no rate limits).
+Gets stock historical data from the configured market-data providers
+(yfinance by default, optionally IB historical data and local files).
+
+When a BarStore is configured, bars are kept on disk per ticker and only the
+trailing days missing from the store are downloaded on each call.
 """
 
 import logging
+import time
 from typing import Optional
 
 import pandas as pd
-import yfinance as yf
+
+from data_fetch.bar_store import BarStore
+from data_fetch.fetch_executor import FetchExecutor
+from data_fetch.providers import PERIOD_DAYS, BarProvider, YFinanceProvider, build_providers
 
 # Set up logging
 logger = logging.getLogger()
 
 
 class StockDataFetcher:
-    def __init__(self, ib=None, config=None, params=None):
+    # Calendar days covered by each yfinance period string
+    PERIOD_DAYS = PERIOD_DAYS
+
+    def __init__(
+        self,
+        ib=None,
+        config=None,
+        params=None,
+        bar_store: BarStore | None = None,
+        executor: FetchExecutor | None = None,
+        providers: list[BarProvider] | None = None,
+    ):
         self.ib = ib
         self.config = config
         self.params = params
+        self.executor = executor or FetchExecutor.from_config(config)
+        # Tried in order; each one only gets the symbols the previous ones could not serve
+        self.providers = providers if providers is not None else build_providers(config, ib, self.executor.timeout_seconds)
+
+        store_config = (config or {}).get('data', {}).get('bar_store', {})
+        self.max_age_seconds = store_config.get('max_age_seconds', 300)
+        self.batch_size = (config or {}).get('data', {}).get('batch_size', 100)
+        if bar_store is None and store_config.get('enabled', False):
+            bar_store = BarStore(store_config.get('path'))
+        self.bar_store = bar_store
 
     def get_historical_data(self, symbol: str, lookback_days: int) -> pd.DataFrame | None:
-        """Fetch historical daily data for a stock via yfinance."""
+        """Fetch historical daily data for a stock from the first provider that has it."""
+        period = self._lookback_to_period(lookback_days)
+        if self.bar_store is None:
+            return self._download(symbol, period=period)
+
         try:
-            period = self._lookback_to_period(lookback_days)
-            ticker = yf.Ticker(symbol)
-            df = ticker.history(period=period, auto_adjust=True)
-
-            if df is None or df.empty:
-                return None
-
-            df = df.rename(
-                columns={
-                    'Open': 'open',
-                    'High': 'high',
-                    'Low': 'low',
-                    'Close': 'close',
-                    'Volume': 'volume',
-                }
-            )
-
-            df = df[['open', 'high', 'low', 'close', 'volume']]
-            df['date'] = df.index
-            df = df.reset_index(drop=True)
-            df['symbol'] = symbol
+            return self._get_from_store(symbol, period)
+        except Exception as e:
+            logger.warning(f'Bar store failed for {symbol}, downloading directly: {e}')
+            return self._download(symbol, period=period)
+
+    def _get_from_store(self, symbol: str, period: str) -> pd.DataFrame | None:
+        """Serve `period` of bars from the store, downloading only what it is missing."""
+        cutoff = self._period_start(period)
+        cached, meta = self.bar_store.load(symbol)
+
+        if cached is None or cached.empty or meta['history_start'] > cutoff:
+            # Cold ticker, or the store doesn't reach back far enough yet
+            df = self._download(symbol, period=period)
+            if df is None:
+                return self._slice_period(cached, cutoff) if cached is not None else None
+            self.bar_store.save(symbol, df, history_start=cutoff)
+            return self._slice_period(df, cutoff)
+
+        if time.time() - meta['fetched_at'] > self.max_age_seconds:
+            cached = self._refresh_tail(symbol, cached, meta, period)
+
+        return self._slice_period(cached, cutoff)
+
+    def _refresh_tail(self, symbol: str, cached: pd.DataFrame, meta: dict, period: str) -> pd.DataFrame:
+        """Download the trailing days since the last final bar and append them to the store."""
+        new = self._download(symbol, start=self._tail_anchor(cached).strftime('%Y-%m-%d'))
+        return self._merge_tail(symbol, cached, meta, period, new)
+
+    @staticmethod
+    def _tail_anchor(cached: pd.DataFrame) -> pd.Timestamp:
+        # Re-request from the last *final* bar so it can be checked against the stored copy.
+        # The very last stored bar may be a partial intraday bar and is always replaced.
+        return pd.Timestamp(cached['date'].iloc[max(len(cached) - 2, 0)])
+
+    def _merge_tail(self, symbol: str, cached: pd.DataFrame, meta: dict, period: str, new: pd.DataFrame | None) -> pd.DataFrame:
+        """Append freshly downloaded trailing bars to the stored history and persist the result."""
+        if new is None or new.empty:
+            logger.debug(f'{symbol}: no new bars downloaded, serving stored bars')
+            return cached
+
+        # auto_adjust rewrites past prices after splits/dividends; if the overlapping
+        # bar moved, the stored history is stale and must be downloaded again.
+        anchor_pos = max(len(cached) - 2, 0)
+        anchor_close = cached['close'].iloc[anchor_pos]
+        overlap = new[new['date'] == cached['date'].iloc[anchor_pos]]
+        if overlap.empty or abs(overlap['close'].iloc[0] - anchor_close) > 1e-6 * max(abs(anchor_close), 1.0):
+            logger.info(f'{symbol}: price history was adjusted since last download, refreshing full history')
+            full = self._download(symbol, period=period)
+            if full is None:
+                return cached
+            # Only `period` was downloaded again: a deeper request later must not
+            # take the store for the old, deeper history
+            self.bar_store.save(symbol, full, history_start=self._period_start(period))
+            return full
+
+        merged = pd.concat([cached[cached['date'] < new['date'].iloc[0]], new], ignore_index=True)
+        self.bar_store.save(symbol, merged, history_start=meta['history_start'])
+        return merged
+
+    def get_historical_data_batch(self, symbols: list[str], lookback_days: int) -> dict[str, pd.DataFrame]:
+        """
+        Fetch historical daily data for many stocks with as few requests as possible.
+
+        Symbols are downloaded together in chunks of `batch_size` per request.
+        With a bar store configured, fresh tickers are served from disk, stale
+        ones share a single trailing-days request, and only cold tickers
+        download the full period.
 
+        Returns a dict of symbol -> DataFrame in the same schema as
+        get_historical_data(); symbols that failed to download are left out.
+        """
+        period = self._lookback_to_period(lookback_days)
+        symbols = list(dict.fromkeys(symbols))
+        if self.bar_store is None:
+            return self._download_batch(symbols, period=period)
+
+        cutoff = self._period_start(period)
+        out: dict[str, pd.DataFrame] = {}
+        cold: dict[str, pd.DataFrame | None] = {}
+        stale: dict[str, tuple[pd.DataFrame, dict]] = {}
+
+        for symbol in symbols:
+            try:
+                cached, meta = self.bar_store.load(symbol)
+            except Exception as e:
+                logger.warning(f'Bar store failed for {symbol}, downloading directly: {e}')
+                cached, meta = None, {}
+
+            if cached is None or cached.empty or meta['history_start'] > cutoff:
+                cold[symbol] = cached
+            elif time.time() - meta['fetched_at'] > self.max_age_seconds:
+                stale[symbol] = (cached, meta)
+            else:
+                out[symbol] = self._slice_period(cached, cutoff)
+
+        if cold:
+            downloaded = self._download_batch(list(cold), period=period)
+            for symbol, cached in cold.items():
+                df = downloaded.get(symbol)
+                if df is not None:
+                    self.bar_store.save(symbol, df, history_start=cutoff)
+                    out[symbol] = self._slice_period(df, cutoff)
+                elif cached is not None and not cached.empty:
+                    out[symbol] = self._slice_period(cached, cutoff)
+
+        if stale:
+            anchor = min(self._tail_anchor(cached) for cached, _ in stale.values())
+            tails = self._download_batch(list(stale), start=anchor.strftime('%Y-%m-%d'))
+            for symbol, (cached, meta) in stale.items():
+                merged = self._merge_tail(symbol, cached, meta, period, tails.get(symbol))
+                out[symbol] = self._slice_period(merged, cutoff)
+
+        return out
+
+    def evict(self, symbols: list[str]) -> None:
+        """Drop stored bars for symbols that left the universe."""
+        if self.bar_store is None:
+            return
+        for symbol in symbols:
+            self.bar_store.delete(symbol)
+        if symbols:
+            logger.info(f'Evicted stored bars for {len(symbols)} symbols')
+
+    def _download(self, symbol: str, period: str | None = None, start: str | None = None) -> pd.DataFrame | None:
+        """Download daily bars for one symbol, falling back through the providers."""
+        for provider in self.providers:
+            if provider.uses_executor:
+                df = self.executor.call(symbol, lambda provider=provider: provider.fetch(symbol, period, start))
+            else:
+                df = self._provider_fetch(provider, [symbol], period, start).get(symbol)
+            if df is not None:
+                return df
+        return None
+
+    def _download_batch(self, symbols: list[str], period: str | None = None, start: str | None = None) -> dict[str, pd.DataFrame]:
+        """Download daily bars for many symbols, falling back through the providers for whatever is still missing."""
+        out: dict[str, pd.DataFrame] = {}
+        remaining = symbols
+        for provider in self.providers:
+            if not remaining:
+                break
+            out.update(self._provider_fetch(provider, remaining, period, start))
+            remaining = [s for s in remaining if s not in out]
+
+        for symbol in remaining:
+            self.executor.stats.mark_failed(symbol)
+        if remaining:
+            logger.warning(f'Batch download: no data for {len(remaining)} of {len(symbols)} symbols')
+        return out
+
+    def _provider_fetch(self, provider: BarProvider, symbols: list[str], period: str | None, start: str | None) -> dict[str, pd.DataFrame]:
+        """One provider's bars for `symbols`; failed requests just leave symbols out."""
+        if not provider.uses_executor:
+            # Self-paced provider (IB): runs its own concurrency on the calling thread
+            started = time.monotonic()
+            try:
+                out = provider.fetch_many(symbols, period, start)
+            except Exception as e:
+                logger.warning(f'{provider.name} download failed for {len(symbols)} symbols: {e}')
+                out = {}
+            elapsed = time.monotonic() - started
+            for symbol in symbols:
+                self.executor.stats.record(symbol, elapsed, ok=symbol in out)
+            return out
+
+        # `batch_size` symbols per request, several requests in flight
+        size = min(self.batch_size, provider.max_batch)
+        chunks = [symbols[i : i + size] for i in range(0, len(symbols), size)]
+        results = self.executor.map((chunk, lambda chunk=chunk: provider.fetch_many(chunk, period, start)) for chunk in chunks)
+
+        out = {}
+        for frames in results:
+            if frames:
+                out.update(frames)
+        return out
+
+    # yfinance frames -> the bot's schema; kept here for callers that normalize raw yfinance data
+    _normalize = staticmethod(YFinanceProvider.normalize)
+
+    @classmethod
+    def _period_start(cls, period: str) -> pd.Timestamp:
+        """First calendar date covered by a yfinance period, counted back from today."""
+        return pd.Timestamp.now().normalize() - pd.Timedelta(days=cls.PERIOD_DAYS[period])
+
+    @staticmethod
+    def _slice_period(df: pd.DataFrame, cutoff: pd.Timestamp) -> pd.DataFrame:
+        dates = pd.DatetimeIndex(df['date'])
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        # Bars are sorted by date, so the period is a tail slice: a new frame with a fresh
+        # 0-based index whose columns share the bars' arrays (copy-on-write, no copy)
+        start = int(dates.searchsorted(cutoff, side='left'))
+        if start == 0:
             return df
+        return df.iloc[start:].reset_index(drop=True)
 
-        except Exception as e:
-            logger.warning(f'Failed to get data for {symbol}: {e}')
-            return None
+    @classmethod
+    def slice_lookback(cls, df: pd.DataFrame, lookback_days: int) -> pd.DataFrame:
+        """Trim a longer history to what get_historical_data(symbol, lookback_days) would return."""
+        return cls._slice_period(df, cls._period_start(cls._lookback_to_period(lookback_days)))
 
     @staticmethod
     def _lookback_to_period(lookback_days: int) -> str:
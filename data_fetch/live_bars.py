@@ -0,0 +1,144 @@
+"""
+Intraday live-bar updates for cached daily history.
+
+Between two scans of the same trading day only today's (partial) bar
+changes. Instead of re-downloading history, the updater takes one snapshot
+quote per ticker from IB and writes it into the last row of the ticker's
+cached frame. The first update of a day appends today's row once; every
+later update only overwrites that row.
+
+The patched frame replaces the one the BarContext owns, and consumers take
+their views from the context after the update. Frames handed out earlier
+are never written to (under copy-on-write they would silently diverge), so
+they keep the bar as it was when they were taken.
+"""
+
+import logging
+import math
+
+import pandas as pd
+from ib_insync import Stock
+
+from data_fetch.bar_context import BarContext
+
+logger = logging.getLogger()
+
+
+def _valid(value) -> bool:
+    return value is not None and not (isinstance(value, float) and math.isnan(value)) and value > 0
+
+
+class LiveBarUpdater:
+    def __init__(self, ib, batch_size: int = 50, volume_multiplier: int = 100):
+        """
+        Parameters
+        ----------
+        ib                : connected IB client used for snapshot quotes.
+        batch_size        : contracts per reqTickers call (each snapshot holds a market data line).
+        volume_multiplier : IB reports US stock volume in round lots; bars are in shares.
+        """
+        self.ib = ib
+        self.batch_size = batch_size
+        self.volume_multiplier = volume_multiplier
+        self._contracts: dict[str, Stock] = {}
+
+    @classmethod
+    def from_config(cls, ib, config) -> 'LiveBarUpdater | None':
+        live_config = (config or {}).get('data', {}).get('live_bars', {})
+        if ib is None or not live_config.get('enabled', False):
+            return None
+        return cls(ib, live_config.get('batch_size', 50), live_config.get('volume_multiplier', 100))
+
+    def _qualified(self, symbols: list[str]) -> list[Stock]:
+        missing = [Stock(s, 'SMART', 'USD') for s in symbols if s not in self._contracts]
+        if missing:
+            for contract in self.ib.qualifyContracts(*missing):
+                self._contracts[contract.symbol] = contract
+        return [self._contracts[s] for s in symbols if s in self._contracts]
+
+    def quotes(self, symbols: list[str]) -> dict[str, dict]:
+        """Snapshot of today's session (open/high/low/last/volume) per symbol."""
+        out: dict[str, dict] = {}
+        for start in range(0, len(symbols), self.batch_size):
+            chunk = symbols[start : start + self.batch_size]
+            try:
+                tickers = self.ib.reqTickers(*self._qualified(chunk))
+            except Exception as e:
+                logger.warning(f'Live quote request failed for {len(chunk)} symbols: {e}')
+                continue
+
+            for ticker in tickers:
+                price = ticker.marketPrice()
+                if not _valid(price):
+                    continue
+                out[ticker.contract.symbol] = {
+                    'open': ticker.open,
+                    'high': ticker.high,
+                    'low': ticker.low,
+                    'close': price,
+                    'volume': ticker.volume * self.volume_multiplier if _valid(ticker.volume) else None,
+                }
+        return out
+
+    @staticmethod
+    def apply(df: pd.DataFrame, quote: dict, today: pd.Timestamp) -> pd.DataFrame:
+        """
+        `df` with `quote` written into today's row, as a new frame (`df` is left as is).
+
+        Overwrites the last row when it is already today's bar; otherwise appends
+        today's bar (once per day).
+        """
+        close = float(quote['close'])
+        last = df.index[-1]
+        last_date = pd.Timestamp(df.at[last, 'date'])
+        if last_date.tzinfo is not None:
+            today = today.tz_localize(last_date.tzinfo) if today.tzinfo is None else today.tz_convert(last_date.tzinfo)
+
+        if last_date.normalize() == today.normalize():
+            # Session high/low from IB are authoritative; fall back to extending the cached range
+            high = quote['high'] if _valid(quote['high']) else max(df.at[last, 'high'], close)
+            low = quote['low'] if _valid(quote['low']) else min(df.at[last, 'low'], close)
+            # Shallow copy: copy-on-write only duplicates the columns written below
+            out = df.copy(deep=False)
+            out.loc[last, ['high', 'low', 'close']] = [float(high), float(low), close]
+            if quote['volume'] is not None:
+                out.loc[last, 'volume'] = df['volume'].dtype.type(quote['volume'])
+            return out
+
+        if last_date.normalize() > today.normalize():
+            return df
+
+        row = {
+            'open': float(quote['open']) if _valid(quote['open']) else close,
+            'high': float(quote['high']) if _valid(quote['high']) else close,
+            'low': float(quote['low']) if _valid(quote['low']) else close,
+            'close': close,
+            'volume': quote['volume'] or 0,
+            'date': today.normalize(),
+            'symbol': df.at[last, 'symbol'],
+        }
+        new_row = pd.DataFrame([row], columns=df.columns).astype(df.dtypes.to_dict())
+        return pd.concat([df, new_row], ignore_index=True)
+
+    def update(self, bar_context: BarContext, symbols: list[str], today: pd.Timestamp | None = None) -> int:
+        """
+        Patch the cached frames of `symbols` with live quotes. Returns how many were updated.
+
+        `today` is the scan time in New York (default: now), the time zone of the bar dates.
+        """
+        loaded = [s for s in symbols if bar_context.frame(s) is not None]
+        if not loaded:
+            return 0
+
+        today = today or pd.Timestamp.now(tz='America/New_York')
+        updated = 0
+        for symbol, quote in self.quotes(loaded).items():
+            df = bar_context.frame(symbol)
+            new_df = self.apply(df, quote, today)
+            if new_df is not df:
+                bar_context.replace(symbol, new_df)
+                updated += 1
+
+        if updated < len(loaded):
+            logger.debug(f'Live bars: {updated}/{len(loaded)} symbols updated')
+        return updated
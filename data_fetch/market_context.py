@@ -0,0 +1,262 @@
+"""
+Process-wide VIX / SPY market context.
+
+Stop losses (RiskManager), the regime-shift retrain trigger and the AI market
+features all need VIX and SPY. Instead of each asking yfinance on its own, they
+share one MarketContext:
+
+* **TTL cache**: a quote is reused for `quote_ttl_seconds`, the 10-year
+  daily history for `history_ttl_seconds`;
+* **single flight**: concurrent requests for the same key wait for the one
+  request already in flight instead of sending their own;
+* **disk fallback**: every successful fetch is written to
+  ``data/market_context/``; when yfinance fails, the last known value is used
+  (in memory first, then from disk) so a restart during an outage still has
+  a VIX level. A failed key isn't retried for `retry_seconds`, so an outage
+  costs one request per key per retry interval, not one per caller;
+* **incremental history**: the 10-year history is downloaded once; later
+  refreshes (also after a restart, from the saved copy) fetch only the days
+  since the last saved date. If the overlapping days no longer match
+  (dividend adjustment of SPY), the full history is downloaded again.
+
+Use `get_market_context()` to get the shared instance; `configure_market_context()`
+replaces it (the bot does this once at start-up from ``data.market_context``).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+logger = logging.getLogger()
+
+VIX = '^VIX'
+SPY = 'SPY'
+
+# Days re-fetched before the last saved date, to check that past closes are unchanged
+HISTORY_OVERLAP_DAYS = 7
+HISTORY_YEARS = 10
+
+
+class MarketContext:
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        quote_ttl_seconds: float = 300.0,
+        history_ttl_seconds: float = 6 * 3600.0,
+        retry_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'market_context')
+        self.quote_ttl_seconds = quote_ttl_seconds
+        self.history_ttl_seconds = history_ttl_seconds
+        self.retry_seconds = retry_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._cache: dict[str, tuple[float, object]] = {}  # key -> (expires at, value)
+        self._inflight: dict[str, Future] = {}
+        self.requests = 0
+
+    @classmethod
+    def from_config(cls, config) -> 'MarketContext':
+        context_config = (config or {}).get('data', {}).get('market_context', {})
+        return cls(
+            context_config.get('path'),
+            quote_ttl_seconds=context_config.get('quote_ttl_seconds', 300),
+            history_ttl_seconds=context_config.get('history_ttl_seconds', 6 * 3600),
+            retry_seconds=context_config.get('retry_seconds', 60),
+        )
+
+    # ------------------------------------------------------------------ public
+
+    def vix(self) -> float | None:
+        """Latest VIX level, or None if it has never been available."""
+        return self.quote(VIX)
+
+    def spy(self) -> float | None:
+        """Latest SPY price, or None if it has never been available."""
+        return self.quote(SPY)
+
+    def quote(self, symbol: str) -> float | None:
+        return self._get(f'quote:{symbol}', self.quote_ttl_seconds, lambda: self._fetch_quote(symbol))
+
+    def history(self) -> pd.DataFrame:
+        """Daily ``vix_close`` / ``spy_close`` over 10 years, tz-naive date index; empty if unavailable."""
+        history = self._get('history', self.history_ttl_seconds, self._refresh_history)
+        return history if history is not None else pd.DataFrame()
+
+    def clear(self) -> None:
+        """Forget cached values (the disk copies stay as fallback)."""
+        with self._lock:
+            self._cache.clear()
+
+    # ----------------------------------------------------------- cache / flight
+
+    def _get(self, key: str, ttl: float, fetch: Callable[[], object]):
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and self._clock() < cached[0]:
+                return cached[1]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.requests += 1
+
+        if not leader:
+            return future.result()
+
+        value = None
+        expires_at = self._clock() + self.retry_seconds
+        try:
+            value = fetch()
+            if value is not None:
+                self._save(key, value)
+                expires_at = self._clock() + ttl
+        except Exception as e:
+            logger.warning(f'Market context fetch for {key} failed: {e}')
+        finally:
+            if value is None:
+                value = self._fallback(key, cached)
+            with self._lock:
+                self._cache[key] = (expires_at, value)
+                self._inflight.pop(key, None)
+            future.set_result(value)
+        return value
+
+    def _fallback(self, key: str, cached: tuple[float, object] | None):
+        if cached is not None and cached[1] is not None:
+            logger.warning(f'Using stale {key} from memory')
+            return cached[1]
+        value = self._load(key)
+        if value is not None:
+            logger.warning(f'Using last saved {key} from disk')
+        return value
+
+    # --------------------------------------------------------------- fetching
+
+    @staticmethod
+    def _fetch_quote(symbol: str) -> float | None:
+        price = yf.Ticker(symbol).fast_info['lastPrice']
+        return float(price) if price else None
+
+    def _refresh_history(self) -> pd.DataFrame | None:
+        """Extend the known history with the days since its last date; full download if there is none."""
+        with self._lock:
+            cached = self._cache.get('history')
+        known = cached[1] if cached is not None and cached[1] is not None else self._load('history')
+        if known is not None and not known.empty:
+            recent = self._fetch_history(start=known.index[-1] - pd.Timedelta(days=HISTORY_OVERLAP_DAYS))
+            if recent is None:
+                return None
+            merged = self._merge_history(known, recent)
+            if merged is not None:
+                return merged
+            logger.info('Past VIX/SPY closes changed, downloading the full history again')
+        return self._fetch_history(period=f'{HISTORY_YEARS}y')
+
+    @staticmethod
+    def _merge_history(known: pd.DataFrame, recent: pd.DataFrame) -> pd.DataFrame | None:
+        """`known` extended by `recent`, or None when the days they share disagree."""
+        shared = known.index.intersection(recent.index)
+        if len(shared) == 0:
+            return None
+        old, new = known.loc[shared].to_numpy(dtype=float), recent.loc[shared].to_numpy(dtype=float)
+        if not np.allclose(old, new, rtol=1e-6, equal_nan=True):
+            return None
+        merged = pd.concat([known[known.index < recent.index[0]], recent])
+        merged = merged[merged.index > merged.index[-1] - pd.DateOffset(years=HISTORY_YEARS)]
+        return merged.ffill()
+
+    @staticmethod
+    def _fetch_history(**kwargs) -> pd.DataFrame | None:
+        vix = yf.Ticker(VIX).history(auto_adjust=True, **kwargs)
+        spy = yf.Ticker(SPY).history(auto_adjust=True, **kwargs)
+
+        if vix.empty or spy.empty:
+            logger.warning('Market data fetch returned empty')
+            return None
+
+        market = pd.DataFrame(
+            {
+                'vix_close': vix['Close'].rename('vix_close'),
+                'spy_close': spy['Close'].rename('spy_close'),
+            }
+        )
+        market.index = market.index.tz_localize(None)
+        return market.ffill()
+
+    # ------------------------------------------------------------------- disk
+
+    def _path(self, key: str) -> str:
+        if key == 'history':
+            return os.path.join(self.cache_dir, 'history.csv')
+        return os.path.join(self.cache_dir, 'quotes.json')
+
+    def _save(self, key: str, value) -> None:
+        try:
+            with self._disk_lock:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                path = self._path(key)
+                tmp_path = f'{path}.tmp'
+                if key == 'history':
+                    value.to_csv(tmp_path, index_label='date')
+                else:
+                    quotes = self._read_quotes()
+                    quotes[key] = {'value': value, 'saved_at': time.time()}
+                    with open(tmp_path, 'w') as file:
+                        json.dump(quotes, file, indent=4, sort_keys=True)
+                os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f'Failed to save market context {key}: {e}')
+
+    def _read_quotes(self) -> dict:
+        path = self._path('quote')
+        if not os.path.exists(path):
+            return {}
+        with open(path) as file:
+            return json.load(file)
+
+    def _load(self, key: str):
+        try:
+            if key == 'history':
+                path = self._path(key)
+                if not os.path.exists(path):
+                    return None
+                history = pd.read_csv(path, index_col='date', parse_dates=['date'])
+                history.index.name = None
+                return history
+            entry = self._read_quotes().get(key)
+            return entry['value'] if entry else None
+        except Exception as e:
+            logger.warning(f'Failed to read saved market context {key}: {e}')
+            return None
+
+
+_market_context: MarketContext | None = None
+_market_context_lock = threading.Lock()
+
+
+def get_market_context() -> MarketContext:
+    """The process-wide MarketContext (created with defaults on first use)."""
+    global _market_context
+    with _market_context_lock:
+        if _market_context is None:
+            _market_context = MarketContext()
+        return _market_context
+
+
+def configure_market_context(config=None, context: MarketContext | None = None) -> MarketContext:
+    """Replace the process-wide MarketContext, built from `config` unless `context` is given."""
+    global _market_context
+    with _market_context_lock:
+        _market_context = context or MarketContext.from_config(config)
+        return _market_context
@@ -0,0 +1,53 @@
+"""
+Disk-backed cache of ticker sector/industry metadata.
+
+Looking up `yf.Ticker(t).info` is one slow HTTP call per ticker, and sector
+and industry almost never change, so the results are kept in
+``data/ticker_metadata.json`` and only re-fetched once they are older than
+the configured TTL.
+"""
+
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger()
+
+
+class TickerMetadataCache:
+    def __init__(self, file_path: str | None = None, ttl_days: float = 30.0):
+        self.file_path = file_path or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'ticker_metadata.json')
+        self.ttl_seconds = ttl_days * 86400
+        self._entries: dict[str, dict] = self._load()
+
+    def _load(self) -> dict[str, dict]:
+        if not os.path.exists(self.file_path):
+            return {}
+        try:
+            with open(self.file_path) as file:
+                return json.load(file)
+        except Exception as e:
+            logger.warning(f'Failed to read ticker metadata cache, starting fresh: {e}')
+            return {}
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        tmp_path = f'{self.file_path}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(self._entries, file, indent=4, sort_keys=True)
+        os.replace(tmp_path, self.file_path)
+
+    def get(self, symbol: str) -> dict | None:
+        return self._entries.get(symbol)
+
+    def set(self, symbol: str, sector: str, industry: str) -> None:
+        self._entries[symbol] = {'sector': sector, 'industry': industry, 'fetched_at': time.time()}
+
+    def remove(self, symbol: str) -> None:
+        self._entries.pop(symbol, None)
+
+    def stale_symbols(self, symbols: list[str]) -> list[str]:
+        """Symbols that are missing from the cache or whose entry is older than the TTL."""
+        now = time.time()
+        return [s for s in symbols if s not in self._entries or now - self._entries[s].get('fetched_at', 0) > self.ttl_seconds]
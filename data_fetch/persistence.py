@@ -0,0 +1,234 @@
+"""
+Embedded SQLite persistence for signals, predictions, orders and positions.
+
+The database lives at ``data/trading_bot.db`` in WAL mode, so readers
+(analytics, the dashboard, a backtest) never block the writer. All writes
+are queued and applied by a single background thread in batched
+transactions, so the trading loop never waits on disk I/O. Reads open their
+own connection and can run from any thread.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    strategy_type TEXT,
+    type TEXT,
+    entry REAL, stop REAL, target REAL,
+    payload TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_signals_symbol_date ON signals (symbol, created_at);
+CREATE INDEX IF NOT EXISTS idx_signals_date ON signals (created_at);
+
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    class TEXT,
+    prob_short REAL, prob_flat REAL, prob_long REAL
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_symbol_date ON predictions (symbol, created_at);
+CREATE INDEX IF NOT EXISTS idx_predictions_date ON predictions (created_at);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    action TEXT,
+    shares INTEGER,
+    status TEXT,
+    fill_price REAL, stop REAL, target REAL,
+    payload TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_orders_symbol_date ON orders (symbol, created_at);
+CREATE INDEX IF NOT EXISTS idx_orders_date ON orders (created_at);
+
+CREATE TABLE IF NOT EXISTS positions (
+    symbol TEXT PRIMARY KEY,
+    strategy_type TEXT,
+    type TEXT,
+    shares INTEGER,
+    entry_time TEXT,
+    payload TEXT NOT NULL
+);
+"""
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _to_json(data: dict) -> str:
+    # Signals carry pandas Timestamps and numpy scalars
+    return json.dumps(data, default=str)
+
+
+class PersistenceStore:
+    _STOP = object()
+
+    def __init__(self, db_path: str | None = None, batch_size: int = 500):
+        self.db_path = db_path or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'trading_bot.db')
+        self.batch_size = batch_size
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        # Schema is created synchronously so reads work immediately
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        self._queue: queue.Queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name='persistence-writer', daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def from_config(cls, config) -> 'PersistenceStore | None':
+        db_config = (config or {}).get('data', {}).get('persistence', {})
+        if not db_config.get('enabled', False):
+            return None
+        return cls(db_config.get('path'))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    # ------------------------------------------------------------------
+    # Background writer
+    # ------------------------------------------------------------------
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # Drain whatever else is already queued into the same transaction
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(op is self._STOP for op in batch)
+            ops = [op for op in batch if op is not self._STOP]
+            try:
+                with conn:
+                    # Consecutive ops with the same statement become one executemany
+                    i = 0
+                    while i < len(ops):
+                        sql = ops[i][0]
+                        rows = []
+                        while i < len(ops) and ops[i][0] == sql:
+                            rows.extend(ops[i][1])
+                            i += 1
+                        conn.executemany(sql, rows)
+            except Exception as e:
+                logger.error(f'Persistence write failed ({len(ops)} ops dropped): {e}')
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if stop:
+                conn.close()
+                return
+
+    def _enqueue(self, sql: str, rows: list[tuple]) -> None:
+        if rows:
+            self._queue.put((sql, rows))
+
+    def flush(self) -> None:
+        """Block until every queued write has been committed."""
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(self._STOP)
+        self._writer.join(timeout=10)
+
+    # ------------------------------------------------------------------
+    # Writes (non-blocking)
+    # ------------------------------------------------------------------
+    def record_signal(self, signal: dict) -> None:
+        row = (
+            _now(),
+            signal['symbol'],
+            signal.get('strategy_type'),
+            signal.get('type'),
+            signal.get('entry'),
+            signal.get('stop'),
+            signal.get('target'),
+            _to_json(signal),
+        )
+        self._enqueue(
+            'INSERT INTO signals (created_at, symbol, strategy_type, type, entry, stop, target, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [row]
+        )
+
+    def record_prediction(self, prediction: dict) -> None:
+        probs = prediction.get('probs', {})
+        row = (_now(), prediction['symbol'], prediction.get('class'), probs.get('SHORT'), probs.get('FLAT'), probs.get('LONG'))
+        self._enqueue('INSERT INTO predictions (created_at, symbol, class, prob_short, prob_flat, prob_long) VALUES (?, ?, ?, ?, ?, ?)', [row])
+
+    def record_order(self, symbol: str, action: str, shares: int, status: str, fill_price: float | None = None, signal: dict | None = None) -> None:
+        signal = signal or {}
+        row = (_now(), symbol, action, shares, status, fill_price, signal.get('stop'), signal.get('target'), _to_json(signal))
+        self._enqueue(
+            'INSERT INTO orders (created_at, symbol, action, shares, status, fill_price, stop, target, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [row],
+        )
+
+    def upsert_position(self, symbol: str, entry: dict) -> None:
+        row = (symbol, entry.get('strategy_type'), entry.get('type'), entry.get('shares'), entry.get('entry_time'), _to_json(entry))
+        self._enqueue('INSERT OR REPLACE INTO positions (symbol, strategy_type, type, shares, entry_time, payload) VALUES (?, ?, ?, ?, ?, ?)', [row])
+
+    def delete_position(self, symbol: str) -> None:
+        self._enqueue('DELETE FROM positions WHERE symbol = ?', [(symbol,)])
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def _query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+
+    def _select(self, table: str, symbol: str | None, since: str | None, until: str | None) -> pd.DataFrame:
+        clauses, params = [], []
+        if symbol is not None:
+            clauses.append('symbol = ?')
+            params.append(symbol)
+        if since is not None:
+            clauses.append('created_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('created_at <= ?')
+            params.append(until)
+        where = f' WHERE {" AND ".join(clauses)}' if clauses else ''
+        return self._query(f'SELECT * FROM {table}{where} ORDER BY created_at', tuple(params))
+
+    def signals(self, symbol: str | None = None, since: str | None = None, until: str | None = None) -> pd.DataFrame:
+        return self._select('signals', symbol, since, until)
+
+    def predictions(self, symbol: str | None = None, since: str | None = None, until: str | None = None) -> pd.DataFrame:
+        return self._select('predictions', symbol, since, until)
+
+    def orders(self, symbol: str | None = None, since: str | None = None, until: str | None = None) -> pd.DataFrame:
+        return self._select('orders', symbol, since, until)
+
+    def positions(self) -> dict[str, dict]:
+        """Saved positions in the same {symbol: entry} shape as positions.json."""
+        df = self._query('SELECT symbol, payload FROM positions')
+        return {row.symbol: json.loads(row.payload) for row in df.itertuples()}
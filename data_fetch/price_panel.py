@@ -0,0 +1,202 @@
+"""
+Memory-mapped price panel for the whole ticker universe.
+
+All tickers are aligned on one trading-day calendar and stored as 2-D
+``(ticker, day)`` arrays, one ``.npy`` file per field under ``data/panel/``:
+
+* open/high/low/close : float32, NaN where the ticker has no bar that day
+* volume              : int64, 0 where the ticker has no bar that day
+* dates               : datetime64[ns] trading calendar (union of all tickers)
+* bounds              : int64 (ticker, 2) first/last day index with a bar
+
+The files are opened with ``mmap_mode='r'``, so several processes (scans,
+backtests, parameter sweeps) share one copy in the page cache, and
+per-ticker views are plain slices of the mapped arrays.
+
+Every build writes a new version directory (``data/panel/v<ns>/``) and then
+switches the ``CURRENT`` pointer file to it with an atomic rename, so a
+reader always opens one complete panel, and a crash mid-build leaves the
+previous one in place. The previous version is kept for readers that
+resolved the pointer just before the switch; older ones are deleted.
+
+The panel also exposes ``get_historical_data`` / ``get_historical_data_batch``
+with the same signatures as StockDataFetcher, so anything that takes a
+fetcher (AIAnalyzer, the backtester) can read from it directly.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_fetch.bar_store import BarStore
+from data_fetch.historical_data import StockDataFetcher
+
+logger = logging.getLogger()
+
+
+class PricePanel:
+    PRICE_FIELDS = ['open', 'high', 'low', 'close']
+    FIELDS = PRICE_FIELDS + ['volume']
+    POINTER = 'CURRENT'
+
+    def __init__(self, root: str, symbols: list[str], dates: np.ndarray, arrays: dict[str, np.ndarray], bounds: np.ndarray, tz: str = ''):
+        self.root = root
+        self.symbols = symbols
+        self.dates = dates
+        self.tz = tz
+        self._arrays = arrays
+        self._bounds = bounds
+        self._index = {s: i for i, s in enumerate(symbols)}
+
+    @staticmethod
+    def default_root() -> str:
+        return os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'panel')
+
+    @classmethod
+    def resolve(cls, root: str | None = None) -> str:
+        """Directory of the current panel version under `root` (or `root` itself when it is one)."""
+        root = root or cls.default_root()
+        pointer = os.path.join(root, cls.POINTER)
+        if not os.path.exists(pointer):
+            return root
+        with open(pointer) as file:
+            return os.path.join(root, file.read().strip())
+
+    @classmethod
+    def open(cls, root: str | None = None) -> 'PricePanel':
+        """Map an existing panel read-only; `root` is the panel directory or one of its versions."""
+        root = cls.resolve(root)
+        with open(os.path.join(root, 'meta.json')) as file:
+            meta = json.load(file)
+        arrays = {field: np.load(os.path.join(root, f'{field}.npy'), mmap_mode='r') for field in cls.FIELDS}
+        dates = np.load(os.path.join(root, 'dates.npy'))
+        bounds = np.load(os.path.join(root, 'bounds.npy'))
+        return cls(root, meta['symbols'], dates, arrays, bounds, meta.get('tz', ''))
+
+    @classmethod
+    def build(cls, bar_store: BarStore, symbols: list[str], root: str | None = None) -> 'PricePanel':
+        """
+        Build the panel from the bar store and write it to `root`.
+
+        Two passes over the store keep peak memory at one ticker's frame: the
+        first collects the calendar, the second fills the memory-mapped files.
+        """
+        root = root or cls.default_root()
+
+        calendar: set = set()
+        tz = ''
+        kept: list[str] = []
+        for symbol in symbols:
+            df, _ = bar_store.load(symbol)
+            if df is None or df.empty:
+                continue
+            dates = pd.DatetimeIndex(df['date'])
+            if dates.tz is not None:
+                tz = str(dates.tz)
+                dates = dates.tz_localize(None)
+            calendar.update(dates.values)
+            kept.append(symbol)
+
+        dates = np.array(sorted(calendar), dtype='datetime64[ns]')
+        shape = (len(kept), len(dates))
+
+        version = f'v{time.time_ns()}'
+        version_root = os.path.join(root, version)
+        os.makedirs(version_root)
+
+        arrays = {
+            field: np.lib.format.open_memmap(os.path.join(version_root, f'{field}.npy'), mode='w+', dtype=np.float32, shape=shape)
+            for field in cls.PRICE_FIELDS
+        }
+        arrays['volume'] = np.lib.format.open_memmap(os.path.join(version_root, 'volume.npy'), mode='w+', dtype=np.int64, shape=shape)
+        bounds = np.zeros((len(kept), 2), dtype=np.int64)
+
+        for row, symbol in enumerate(kept):
+            df, _ = bar_store.load(symbol)
+            ticker_dates = pd.DatetimeIndex(df['date'])
+            if ticker_dates.tz is not None:
+                ticker_dates = ticker_dates.tz_localize(None)
+            cols = np.searchsorted(dates, ticker_dates.values.astype('datetime64[ns]'))
+
+            for field in cls.PRICE_FIELDS:
+                arrays[field][row, :] = np.nan
+                arrays[field][row, cols] = df[field].to_numpy(dtype=np.float32)
+            arrays['volume'][row, cols] = np.nan_to_num(df['volume'].to_numpy(dtype=np.float64)).astype(np.int64)
+            bounds[row] = (cols[0], cols[-1])
+
+        for array in arrays.values():
+            array.flush()
+        del arrays
+
+        np.save(os.path.join(version_root, 'dates.npy'), dates)
+        np.save(os.path.join(version_root, 'bounds.npy'), bounds)
+        with open(os.path.join(version_root, 'meta.json'), 'w') as file:
+            json.dump({'symbols': kept, 'tz': tz}, file)
+
+        pointer = os.path.join(root, cls.POINTER)
+        previous = os.path.basename(cls.resolve(root)) if os.path.exists(pointer) else None
+        with open(f'{pointer}.tmp', 'w') as file:
+            file.write(version)
+        os.replace(f'{pointer}.tmp', pointer)
+        cls._prune(root, keep={version, previous})
+
+        logger.info(f'Price panel built: {len(kept)} tickers x {len(dates)} days at {version_root}')
+        return cls.open(version_root)
+
+    @classmethod
+    def _prune(cls, root: str, keep: set) -> None:
+        # Drop older versions, half-written ones from a crashed build and the files of
+        # the unversioned layout; anything else in `root` is left alone. Processes that
+        # still map a deleted version keep their (unlinked) copy until they reopen.
+        legacy = {f'{field}.npy' for field in cls.FIELDS + ['dates', 'bounds']} | {'meta.json'}
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if name in keep:
+                continue
+            if re.fullmatch(r'v\d+', name) and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif name in legacy and os.path.isfile(path):
+                os.remove(path)
+
+    def field(self, name: str) -> np.ndarray:
+        """Full (ticker, day) array for one field."""
+        return self._arrays[name]
+
+    def has(self, symbol: str) -> bool:
+        return symbol in self._index
+
+    def view(self, symbol: str) -> dict[str, np.ndarray]:
+        """Zero-copy per-ticker views, trimmed to the days between its first and last bar."""
+        row = self._index[symbol]
+        first, last = self._bounds[row]
+        out = {field: self._arrays[field][row, first : last + 1] for field in self.FIELDS}
+        out['date'] = self.dates[first : last + 1]
+        return out
+
+    def frame(self, symbol: str, lookback_days: int | None = None) -> pd.DataFrame | None:
+        """One ticker's bars as a DataFrame in the StockDataFetcher schema."""
+        if symbol not in self._index:
+            return None
+
+        view = self.view(symbol)
+        valid = ~np.isnan(view['close'])
+        df = pd.DataFrame({field: view[field][valid].astype(np.float64) for field in self.FIELDS})
+        dates = pd.DatetimeIndex(view['date'][valid])
+        df['date'] = dates.tz_localize(self.tz) if self.tz else dates
+        df['symbol'] = symbol
+
+        if lookback_days is not None:
+            df = StockDataFetcher.slice_lookback(df, lookback_days)
+        return df
+
+    def get_historical_data(self, symbol: str, lookback_days: int) -> pd.DataFrame | None:
+        return self.frame(symbol, lookback_days)
+
+    def get_historical_data_batch(self, symbols: list[str], lookback_days: int) -> dict[str, pd.DataFrame]:
+        return {s: self.frame(s, lookback_days) for s in symbols if s in self._index}
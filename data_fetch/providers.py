@@ -0,0 +1,378 @@
+"""
+Market-data providers for daily bars.
+
+StockDataFetcher talks to one or more providers in priority order and falls
+back to the next one for symbols the previous provider could not serve:
+
+* ``yfinance`` : Yahoo Finance over HTTP, batched via ``yf.download``
+* ``ib``       : IB ``reqHistoricalDataAsync`` over the bot's Gateway connection,
+                 paced to stay inside IB's historical-data limits
+* ``local``    : CSV/Parquet files on disk, one per ticker
+
+Every provider returns frames in the same schema (open/high/low/close/volume/
+date/symbol, with tz-aware America/New_York dates), so callers never need to
+know where the bars came from.
+"""
+
+import abc
+import asyncio
+import contextlib
+import logging
+import math
+import os
+import time
+from collections import deque
+from collections.abc import Callable
+
+import pandas as pd
+import yfinance as yf
+from ib_insync import Stock, util
+
+logger = logging.getLogger()
+
+# Calendar days covered by each yfinance period string
+PERIOD_DAYS = {
+    '5d': 5,
+    '1mo': 30,
+    '3mo': 90,
+    '6mo': 182,
+    '1y': 365,
+    '2y': 730,
+    '5y': 1826,
+    '10y': 3652,
+}
+
+MARKET_TZ = 'America/New_York'
+
+
+def period_start(period: str | None, start: str | None) -> pd.Timestamp:
+    if start is not None:
+        return pd.Timestamp(start).normalize()
+    return pd.Timestamp.now().normalize() - pd.Timedelta(days=PERIOD_DAYS[period])
+
+
+def to_schema(df: pd.DataFrame, dates, symbol: str) -> pd.DataFrame:
+    """Bars with lower-case OHLCV columns + market-tz daily dates -> the bot's schema."""
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    dates = dates.tz_localize(MARKET_TZ) if dates.tz is None else dates.tz_convert(MARKET_TZ)
+    out = df[['open', 'high', 'low', 'close', 'volume']].reset_index(drop=True)
+    out['date'] = dates.normalize()
+    out['symbol'] = symbol
+    return out
+
+
+class BarProvider(abc.ABC):
+    """Base class for daily-bar sources."""
+
+    name = ''
+    # Providers that are plain thread-safe HTTP calls share the fetch executor's
+    # workers, rate limit and retries; the others pace themselves.
+    uses_executor = True
+    # Most symbols one request can carry
+    max_batch = 1
+
+    def fetch(self, symbol: str, period: str | None = None, start: str | None = None) -> pd.DataFrame | None:
+        """Bars for a single symbol; see fetch_many()."""
+        return self.fetch_many([symbol], period, start).get(symbol)
+
+    @abc.abstractmethod
+    def fetch_many(self, symbols: list[str], period: str | None = None, start: str | None = None) -> dict[str, pd.DataFrame]:
+        """
+        Bars for `symbols` since `start` (YYYY-MM-DD) or over a yfinance `period`.
+
+        Symbols the provider has no data for are left out. Raises on request
+        errors so the caller can retry or fall back.
+        """
+
+
+class YFinanceProvider(BarProvider):
+    name = 'yfinance'
+    max_batch = 1000
+
+    def __init__(self, timeout_seconds: float = 30.0):
+        self.timeout_seconds = timeout_seconds
+
+    def fetch(self, symbol: str, period: str | None = None, start: str | None = None) -> pd.DataFrame | None:
+        ticker = yf.Ticker(symbol)
+        if start is not None:
+            df = ticker.history(start=start, auto_adjust=True, timeout=self.timeout_seconds)
+        else:
+            df = ticker.history(period=period, auto_adjust=True, timeout=self.timeout_seconds)
+
+        if df is None or df.empty:
+            return None
+
+        return self.normalize(df, symbol)
+
+    def fetch_many(self, chunk: list[str], period: str | None = None, start: str | None = None) -> dict[str, pd.DataFrame]:
+        """One yf.download request for a chunk of symbols, split back into per-symbol frames."""
+        raw = yf.download(
+            chunk,
+            period=period if start is None else None,
+            start=start,
+            auto_adjust=True,
+            group_by='ticker',
+            ignore_tz=False,
+            threads=False,
+            progress=False,
+            timeout=self.timeout_seconds,
+        )
+
+        out: dict[str, pd.DataFrame] = {}
+        if raw is None or raw.empty:
+            return out
+
+        for symbol in chunk:
+            if isinstance(raw.columns, pd.MultiIndex):
+                if symbol not in raw.columns.get_level_values(0):
+                    continue
+                df = raw[symbol]
+            else:
+                df = raw
+            df = df.dropna(how='all')
+            if df.empty:
+                continue
+            out[symbol] = self.normalize(df, symbol)
+        return out
+
+    @staticmethod
+    def normalize(df: pd.DataFrame, symbol: str) -> pd.DataFrame:
+        df = df.rename(
+            columns={
+                'Open': 'open',
+                'High': 'high',
+                'Low': 'low',
+                'Close': 'close',
+                'Volume': 'volume',
+            }
+        )
+
+        df = df[['open', 'high', 'low', 'close', 'volume']]
+        df['date'] = df.index
+        df = df.reset_index(drop=True)
+        df['symbol'] = symbol
+
+        return df
+
+
+class IBHistoricalPacer:
+    """
+    Client-side pacing for IB historical-data requests.
+
+    IB rejects historical requests (error 162) when a client sends more than
+    `max_requests` in `window_seconds`, repeats an identical request within
+    `identical_gap_seconds`, or has too many requests open at once. Requests
+    wait here until all three limits allow them.
+    """
+
+    def __init__(
+        self,
+        max_requests: int = 60,
+        window_seconds: float = 600.0,
+        identical_gap_seconds: float = 15.0,
+        max_concurrent: int = 6,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], object] = asyncio.sleep,
+    ):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.identical_gap_seconds = identical_gap_seconds
+        self.max_concurrent = max_concurrent
+        self._clock = clock
+        self._sleep = sleep
+        self._sent: deque[float] = deque()
+        self._last_by_key: dict[tuple, float] = {}
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def _wait_time(self, key: tuple) -> float:
+        now = self._clock()
+        while self._sent and now - self._sent[0] >= self.window_seconds:
+            self._sent.popleft()
+
+        wait = 0.0
+        if len(self._sent) >= self.max_requests:
+            wait = self.window_seconds - (now - self._sent[0])
+        last = self._last_by_key.get(key)
+        if last is not None:
+            wait = max(wait, self.identical_gap_seconds - (now - last))
+        return wait
+
+    async def _acquire(self, key: tuple) -> None:
+        while True:
+            wait = self._wait_time(key)
+            if wait <= 0:
+                now = self._clock()
+                self._sent.append(now)
+                self._last_by_key[key] = now
+                return
+            logger.debug(f'IB historical pacing: waiting {wait:.1f}s')
+            await self._sleep(wait)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key: tuple):
+        """Hold one of the concurrent request slots, once the rate limits allow `key`."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        async with self._semaphore:
+            await self._acquire(key)
+            yield
+
+
+class IBHistoricalProvider(BarProvider):
+    name = 'ib'
+    uses_executor = False  # ib_insync runs on the bot's event loop, not in worker threads
+    max_batch = 1000
+
+    def __init__(self, ib, pacer: IBHistoricalPacer | None = None, timeout_seconds: float = 60.0, loop: asyncio.AbstractEventLoop | None = None):
+        """
+        Parameters
+        ----------
+        loop : event loop the IB connection runs on, when that is another thread's
+               (fetch_many() then schedules the requests there); None runs
+               them with ib.run() in the calling thread.
+        """
+        self.ib = ib
+        self.pacer = pacer or IBHistoricalPacer()
+        self.timeout_seconds = timeout_seconds
+        self.loop = loop
+        self._contracts: dict[str, Stock] = {}
+
+    @staticmethod
+    def duration(period: str | None, start: str | None) -> str:
+        """IB durationStr covering the requested range (IB only accepts up to 365 D, then years)."""
+        days = (pd.Timestamp.now().normalize() - period_start(period, start)).days + 1
+        if days <= 365:
+            return f'{days} D'
+        return f'{math.ceil(days / 365)} Y'
+
+    async def _fetch_async(self, symbol: str, duration: str) -> pd.DataFrame | None:
+        contract = self._contracts.get(symbol)
+        if contract is None:
+            qualified = await self.ib.qualifyContractsAsync(Stock(symbol, 'SMART', 'USD'))
+            if not qualified:
+                return None
+            contract = self._contracts[symbol] = qualified[0]
+
+        async with self.pacer.slot((symbol, duration, '1 day', 'ADJUSTED_LAST')):
+            bars = await asyncio.wait_for(
+                self.ib.reqHistoricalDataAsync(
+                    contract,
+                    endDateTime='',
+                    durationStr=duration,
+                    barSizeSetting='1 day',
+                    whatToShow='ADJUSTED_LAST',
+                    useRTH=True,
+                    formatDate=1,
+                ),
+                self.timeout_seconds,
+            )
+
+        if not bars:
+            return None
+        df = util.df(bars)
+        return to_schema(df, df['date'], symbol)
+
+    async def _fetch_all(self, symbols: list[str], duration: str) -> list:
+        return await asyncio.gather(*(self._fetch_async(s, duration) for s in symbols), return_exceptions=True)
+
+    def fetch_many(self, symbols: list[str], period: str | None = None, start: str | None = None) -> dict[str, pd.DataFrame]:
+        if not self.ib.isConnected():
+            raise ConnectionError('IB is not connected')
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            # Waiting here would block the loop the requests need to run on
+            raise RuntimeError('IBHistoricalProvider.fetch_many() called from a running event loop; await fetch_many_async() instead')
+
+        requests = self._fetch_all(symbols, self.duration(period, start))
+        if self.loop is not None and self.loop.is_running():
+            # The IB loop runs in another thread: schedule the requests there and wait
+            results = asyncio.run_coroutine_threadsafe(requests, self.loop).result()
+        else:
+            results = self.ib.run(requests)
+        return self._collect(symbols, results)
+
+    async def fetch_many_async(self, symbols: list[str], period: str | None = None, start: str | None = None) -> dict[str, pd.DataFrame]:
+        """fetch_many() for callers already running on the IB event loop."""
+        if not self.ib.isConnected():
+            raise ConnectionError('IB is not connected')
+        return self._collect(symbols, await self._fetch_all(symbols, self.duration(period, start)))
+
+    @staticmethod
+    def _collect(symbols: list[str], results: list) -> dict[str, pd.DataFrame]:
+        out: dict[str, pd.DataFrame] = {}
+        errors = 0
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, BaseException):
+                errors += 1
+                logger.debug(f'IB historical request for {symbol} failed: {result}')
+            elif result is not None and not result.empty:
+                out[symbol] = result
+        if errors and not out:
+            raise RuntimeError(f'IB historical requests failed for all {len(symbols)} symbols')
+        return out
+
+
+class LocalFileProvider(BarProvider):
+    """Daily bars from ``<root>/<SYMBOL>.csv`` or ``.parquet`` (columns date, open, high, low, close, volume)."""
+
+    name = 'local'
+    max_batch = 1000
+
+    def __init__(self, root: str | None = None):
+        self.root = root or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'local_bars')
+
+    def _read(self, symbol: str) -> pd.DataFrame | None:
+        for ext, reader in (('.parquet', pd.read_parquet), ('.csv', pd.read_csv)):
+            path = os.path.join(self.root, f'{symbol}{ext}')
+            if os.path.exists(path):
+                df = reader(path)
+                df.columns = [str(c).lower() for c in df.columns]
+                return df
+        return None
+
+    def fetch_many(self, symbols: list[str], period: str | None = None, start: str | None = None) -> dict[str, pd.DataFrame]:
+        cutoff = period_start(period, start)
+        out: dict[str, pd.DataFrame] = {}
+        for symbol in symbols:
+            df = self._read(symbol)
+            if df is None or df.empty:
+                continue
+            df = to_schema(df, df['date'], symbol).sort_values('date', ignore_index=True)
+            df = df[df['date'].dt.tz_localize(None) >= cutoff].reset_index(drop=True)
+            if not df.empty:
+                out[symbol] = df
+        return out
+
+
+def build_providers(config, ib=None, timeout_seconds: float = 30.0) -> list[BarProvider]:
+    """Providers named in ``data.providers`` (default ``["yfinance"]``), in priority order."""
+    data_config = (config or {}).get('data', {})
+    providers: list[BarProvider] = []
+    for name in data_config.get('providers', ['yfinance']):
+        if name == 'yfinance':
+            providers.append(YFinanceProvider(timeout_seconds))
+        elif name == 'ib':
+            if ib is None:
+                logger.warning('IB market-data provider configured but no IB connection was given, skipping it')
+                continue
+            pacing = data_config.get('ib_pacing', {})
+            pacer = IBHistoricalPacer(
+                max_requests=pacing.get('max_requests', 60),
+                window_seconds=pacing.get('window_seconds', 600),
+                identical_gap_seconds=pacing.get('identical_gap_seconds', 15),
+                max_concurrent=pacing.get('max_concurrent', 6),
+            )
+            providers.append(IBHistoricalProvider(ib, pacer, pacing.get('timeout_seconds', 60)))
+        elif name == 'local':
+            providers.append(LocalFileProvider(data_config.get('local_bars_path')))
+        elif name == 'replay':
+            from data_fetch.replay import ReplayDataset, ReplayProvider
+
+            replay = data_config.get('replay', {})
+            providers.append(ReplayProvider(ReplayDataset(replay['path'], replay.get('latency_seconds', 0.0))))
+        else:
+            logger.warning(f'Unknown market-data provider "{name}", skipping it')
+    return providers
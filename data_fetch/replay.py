@@ -0,0 +1,224 @@
+"""
+Offline replay of recorded market data.
+
+A replay dataset is a directory of fixture files:
+
+* ``bars/<SYMBOL>.csv`` : daily bars (date, open, high, low, close, volume)
+* ``market.csv``        : VIX / SPY closes (date, vix_close, spy_close)
+* ``metadata.json``     : {symbol: {"sector": ..., "industry": ...}}
+* ``universe.json``     : {"sp500": [...], "nasdaq": [...]}
+* ``manifest.json``     : {"end_date": "YYYY-MM-DD", "symbols": [...]}
+
+`ReplayProvider` serves the bars to StockDataFetcher, `market_extractor()`
+feeds MarketFeatureExtractor and `ReplayTickerFetcher` stands in for
+StockTickerFetcher, so the scan and training pipelines run without network.
+Every simulated request sleeps `latency_seconds`, which makes benchmarks of
+the I/O-bound paths deterministic.
+
+By default the recorded dates are shifted by whole business days so the last
+recorded day lands on the most recent business day; the fetcher's lookback
+slicing is relative to today and would otherwise cut old fixtures away.
+"""
+
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_fetch.fetch_executor import FetchExecutor
+from data_fetch.metadata_cache import TickerMetadataCache
+from data_fetch.providers import MARKET_TZ, BarProvider, period_start, to_schema
+from data_fetch.stock_fetcher import StockTickerFetcher
+from data_fetch.universe_snapshot import UniverseSnapshot
+from strategy.ai_analysis.data_preparation.market_features import MarketFeatureExtractor
+
+logger = logging.getLogger()
+
+
+class ReplayDataset:
+    def __init__(self, root: str, latency_seconds: float = 0.0, align_to_today: bool = True):
+        self.root = root
+        self.latency_seconds = latency_seconds
+        with open(os.path.join(root, 'manifest.json')) as file:
+            self.manifest = json.load(file)
+        self.symbols: list[str] = self.manifest['symbols']
+
+        self._shift = 0
+        if align_to_today:
+            today = np.datetime64(pd.Timestamp.now().normalize().date(), 'D')
+            last_business_day = np.busday_offset(today, 0, roll='backward')
+            self._shift = int(np.busday_count(np.datetime64(self.manifest['end_date'], 'D'), last_business_day))
+        self._bars: dict[str, pd.DataFrame | None] = {}
+        self._market: pd.DataFrame | None = None
+        self._metadata: dict[str, dict] | None = None
+
+    def wait(self) -> None:
+        """Simulated round-trip of one request."""
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+
+    def _shift_dates(self, dates: pd.Series) -> pd.DatetimeIndex:
+        days = pd.to_datetime(dates).values.astype('datetime64[D]')
+        if self._shift:
+            days = np.busday_offset(days, self._shift, roll='forward')
+        return pd.DatetimeIndex(days.astype('datetime64[ns]'))
+
+    def bars(self, symbol: str) -> pd.DataFrame | None:
+        """All recorded bars for `symbol` in the bot's schema, or None if it isn't recorded."""
+        if symbol not in self._bars:
+            path = os.path.join(self.root, 'bars', f'{symbol}.csv')
+            if os.path.exists(path):
+                raw = pd.read_csv(path)
+                self._bars[symbol] = to_schema(raw, self._shift_dates(raw['date']), symbol)
+            else:
+                self._bars[symbol] = None
+        return self._bars[symbol]
+
+    def market_data(self) -> pd.DataFrame:
+        """VIX/SPY closes indexed by (tz-naive) date, as MarketFeatureExtractor expects."""
+        if self._market is None:
+            raw = pd.read_csv(os.path.join(self.root, 'market.csv'))
+            self._market = pd.DataFrame(
+                {'vix_close': raw['vix_close'].to_numpy(), 'spy_close': raw['spy_close'].to_numpy()},
+                index=self._shift_dates(raw['date']),
+            )
+        self.wait()
+        return self._market
+
+    def market_extractor(self) -> MarketFeatureExtractor:
+        return MarketFeatureExtractor(market_data=self.market_data())
+
+    def metadata(self, symbol: str) -> dict:
+        if self._metadata is None:
+            with open(os.path.join(self.root, 'metadata.json')) as file:
+                self._metadata = json.load(file)
+        self.wait()
+        return self._metadata[symbol]
+
+    def universe(self, source: str) -> list[str]:
+        path = os.path.join(self.root, 'universe.json')
+        if not os.path.exists(path):
+            return list(self.symbols)
+        with open(path) as file:
+            universe = json.load(file)
+        self.wait()
+        return universe.get(source, [])
+
+    @staticmethod
+    def write(
+        root: str,
+        bars: dict[str, pd.DataFrame],
+        market: pd.DataFrame,
+        metadata: dict[str, dict],
+        universe: dict[str, list[str]] | None = None,
+    ) -> None:
+        """Write a dataset from in-memory frames (bars in the bot's schema, market indexed by date)."""
+        os.makedirs(os.path.join(root, 'bars'), exist_ok=True)
+        end_date = pd.Timestamp(0)
+        for symbol, df in bars.items():
+            dates = pd.DatetimeIndex(df['date'])
+            if dates.tz is not None:
+                dates = dates.tz_localize(None)
+            out = df[['open', 'high', 'low', 'close', 'volume']].copy()
+            out.insert(0, 'date', dates.strftime('%Y-%m-%d'))
+            out.to_csv(os.path.join(root, 'bars', f'{symbol}.csv'), index=False)
+            end_date = max(end_date, dates.max())
+
+        market_dates = pd.DatetimeIndex(market.index)
+        if market_dates.tz is not None:
+            market_dates = market_dates.tz_localize(None)
+        pd.DataFrame(
+            {'date': market_dates.strftime('%Y-%m-%d'), 'vix_close': market['vix_close'].to_numpy(), 'spy_close': market['spy_close'].to_numpy()}
+        ).to_csv(os.path.join(root, 'market.csv'), index=False)
+        end_date = max(end_date, market_dates.max())
+
+        with open(os.path.join(root, 'metadata.json'), 'w') as file:
+            json.dump(metadata, file, indent=4, sort_keys=True)
+        with open(os.path.join(root, 'universe.json'), 'w') as file:
+            json.dump(universe or {'sp500': sorted(bars), 'nasdaq': []}, file, indent=4)
+        with open(os.path.join(root, 'manifest.json'), 'w') as file:
+            json.dump({'end_date': end_date.strftime('%Y-%m-%d'), 'symbols': sorted(bars)}, file, indent=4)
+
+    @classmethod
+    def record(cls, root: str, stock_data, symbols: list[str], lookback_days: int, metadata: dict[str, dict]) -> None:
+        """Capture live bars (via a StockDataFetcher) and VIX/SPY into a dataset for later replay."""
+        bars = stock_data.get_historical_data_batch(symbols, lookback_days)
+        market = MarketFeatureExtractor()._fetch_market_data()
+        cls.write(root, bars, market, {s: metadata[s] for s in bars if s in metadata})
+        logger.info(f'Recorded replay dataset: {len(bars)} tickers at {root}')
+
+    @classmethod
+    def generate(cls, root: str, symbols: list[str], n_days: int = 600, end_date: str = '2026-06-30', seed: int = 7) -> None:
+        """Write a deterministic synthetic dataset (random-walk prices, sectors assigned round-robin)."""
+        rng = np.random.RandomState(seed)
+        dates = pd.bdate_range(end=end_date, periods=n_days)
+        sectors = ['Technology', 'Energy', 'Healthcare']
+
+        bars = {}
+        for symbol in symbols:
+            close = 50.0 * np.cumprod(1 + rng.randn(n_days) * 0.015 + 0.0003)
+            high = close * (1 + np.abs(rng.randn(n_days)) * 0.008)
+            low = close * (1 - np.abs(rng.randn(n_days)) * 0.008)
+            open_ = np.clip(close * (1 + rng.randn(n_days) * 0.004), low, high)
+            volume = rng.randint(500_000, 5_000_000, n_days).astype(float)
+            bars[symbol] = pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume, 'date': dates})
+
+        market = pd.DataFrame(
+            {
+                'vix_close': np.clip(18 + np.cumsum(rng.randn(n_days) * 0.5), 9, 80),
+                'spy_close': 400.0 * np.cumprod(1 + rng.randn(n_days) * 0.008 + 0.0003),
+            },
+            index=dates,
+        )
+        metadata = {s: {'sector': sectors[i % len(sectors)], 'industry': f'{sectors[i % len(sectors)]} Industry'} for i, s in enumerate(symbols)}
+        cls.write(root, bars, market, metadata)
+
+
+class ReplayProvider(BarProvider):
+    """BarProvider serving a ReplayDataset; one simulated request per call."""
+
+    name = 'replay'
+    max_batch = 1000
+
+    def __init__(self, dataset: ReplayDataset):
+        self.dataset = dataset
+
+    def fetch_many(self, symbols: list[str], period: str | None = None, start: str | None = None) -> dict[str, pd.DataFrame]:
+        self.dataset.wait()
+        cutoff = period_start(period, start).tz_localize(MARKET_TZ)
+        out: dict[str, pd.DataFrame] = {}
+        for symbol in symbols:
+            df = self.dataset.bars(symbol)
+            if df is None:
+                continue
+            start_row = int(df['date'].searchsorted(cutoff, side='left'))
+            if start_row < len(df):
+                out[symbol] = df.iloc[start_row:].reset_index(drop=True)
+        return out
+
+
+class ReplayTickerFetcher(StockTickerFetcher):
+    """StockTickerFetcher that reads the universe and sector metadata from a ReplayDataset."""
+
+    def __init__(self, dataset: ReplayDataset, workdir: str, config=None, executor: FetchExecutor | None = None):
+        self.dataset = dataset
+        os.makedirs(workdir, exist_ok=True)
+        super().__init__(
+            config,
+            executor=executor or FetchExecutor(requests_per_second=1e6, burst=1000, max_retries=0),
+            metadata_cache=TickerMetadataCache(os.path.join(workdir, 'ticker_metadata.json')),
+            universe=UniverseSnapshot(os.path.join(workdir, 'universe.json')),
+            stock_list_path=os.path.join(workdir, 'stock_list.txt'),
+        )
+
+    def get_sp500_tickers(self):
+        return self.dataset.universe('sp500')
+
+    def get_nasdaq100_tickers(self):
+        return self.dataset.universe('nasdaq')
+
+    def _fetch_metadata(self, ticker: str) -> dict:
+        return self.dataset.metadata(ticker)
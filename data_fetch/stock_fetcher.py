@@ -10,14 +10,32 @@ import requests
 import yfinance as yf
 from ib_insync import *
 
+from data_fetch.fetch_executor import FetchExecutor
+from data_fetch.metadata_cache import TickerMetadataCache
+from data_fetch.universe_snapshot import UniverseSnapshot
+
 # Setup logging
 logger = logging.getLogger()
 
 
 class StockTickerFetcher:
-    def __init__(self):
+    def __init__(
+        self,
+        config=None,
+        executor: FetchExecutor | None = None,
+        metadata_cache: TickerMetadataCache | None = None,
+        universe: UniverseSnapshot | None = None,
+        stock_list_path: str | None = None,
+    ):
         # Save to repo root data folder instead of data_fetch/data
-        self.file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'stock_list.txt')
+        self.file_path = stock_list_path or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'stock_list.txt')
+        self.executor = executor or FetchExecutor.from_config(config)
+        cache_config = (config or {}).get('data', {}).get('metadata_cache', {})
+        self.metadata_cache = metadata_cache or TickerMetadataCache(cache_config.get('path'), ttl_days=cache_config.get('ttl_days', 30))
+        universe_config = (config or {}).get('data', {}).get('universe', {})
+        self.universe = universe or UniverseSnapshot(universe_config.get('path'))
+        self.universe_refresh_hours = universe_config.get('refresh_hours', 24)
+        self.universe_diff: dict[str, list[str]] = {'added': [], 'removed': []}
         self.stock_list = self.save_stock_list()
         self.categorized_stocks = self.categorize_stocks()
 
@@ -27,19 +45,22 @@ class StockTickerFetcher:
             url = 'https://raw.githubusercontent.com/datasets/s-and-p-500-companies/master/data/constituents.csv'
             logger.info('Fetching S&P 500 from GitHub...')
 
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+            response = self._conditional_get('sp500', url)
+            if response is None:
+                tickers = self.universe.cached_tickers('sp500')
+                logger.info(f'S&P 500 unchanged since last refresh: {len(tickers)} stocks')
+                return tickers
 
             # Parse CSV
             lines = response.text.strip().split('\n')
             tickers = [line.split(',')[0] for line in lines[1:]]  # Skip header
 
+            self.universe.set_source('sp500', tickers, response.headers.get('ETag'), response.headers.get('Last-Modified'))
             logger.info(f'S&P 500: {len(tickers)} stocks')
             return tickers
 
         except Exception as e:
-            logger.error(f'Failed to fetch S&P 500: {e}')
-            return []
+            return self._fallback_tickers('sp500', 'S&P 500', e)
 
     def get_nasdaq100_tickers(self):
         """Fetch NASDAQ-100 from GitHub dataset"""
@@ -47,8 +68,12 @@ class StockTickerFetcher:
             url = 'https://raw.githubusercontent.com/rreichel3/US-Stock-Symbols/main/nasdaq/nasdaq_full_tickers.json'
             logger.info('Fetching NASDAQ from GitHub...')
 
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+            response = self._conditional_get('nasdaq', url)
+            if response is None:
+                tickers = self.universe.cached_tickers('nasdaq')
+                logger.info(f'NASDAQ unchanged since last refresh: {len(tickers)} stocks')
+                return tickers
+
             data = json.loads(response.text)
 
             # Extract symbols from dictionaries and filter
@@ -77,11 +102,29 @@ class StockTickerFetcher:
 
             logger.info(f'Filtered NASDAQ: {len(filtered_tickers)} stocks')
 
-            return filtered_tickers[:200]
+            tickers = filtered_tickers[:200]
+            self.universe.set_source('nasdaq', tickers, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return tickers
 
         except Exception as e:
-            logger.error(f'Failed to fetch NASDAQ: {e}')
-            return []
+            return self._fallback_tickers('nasdaq', 'NASDAQ', e)
+
+    def _conditional_get(self, source: str, url: str) -> requests.Response | None:
+        """GET `url`, revalidating against the cached copy. Returns None if the server says it's unchanged."""
+        response = requests.get(url, headers=self.universe.conditional_headers(source), timeout=10)
+        if response.status_code == 304 and self.universe.cached_tickers(source):
+            return None
+        response.raise_for_status()
+        return response
+
+    def _fallback_tickers(self, source: str, label: str, error: Exception) -> list[str]:
+        """Serve the last snapshot of a source when it can't be fetched (e.g. offline)."""
+        cached = self.universe.cached_tickers(source)
+        if cached:
+            logger.warning(f'Failed to fetch {label}, using last snapshot ({len(cached)} stocks): {error}')
+            return cached
+        logger.error(f'Failed to fetch {label}: {error}')
+        return []
 
     def get_stock_list(self, sp500=True, nasdaq=True):
         """Fetch S&P 500 and NASDAQ-100 tickers"""
@@ -98,13 +141,37 @@ class StockTickerFetcher:
     def save_stock_list(self, sp500=True, nasdaq=True):
         """Save comprehensive stock list to file"""
 
+        # The source lists change a few times a month, refresh at most once per interval
+        if self.universe.is_fresh(self.universe_refresh_hours) and os.path.exists(self.file_path):
+            logger.info(f'Using cached stock universe: {len(self.universe.symbols)} tickers (refreshed within {self.universe_refresh_hours}h)')
+            return list(self.universe.symbols)
+
         logger.info('Generating stock list...')
 
         # Use comprehensive hardcoded list
         stocks = self.get_stock_list(sp500, nasdaq)
+        if not stocks and self.universe.symbols:
+            logger.warning(f'No tickers fetched, keeping last universe snapshot ({len(self.universe.symbols)} tickers)')
+            return list(self.universe.symbols)
 
         logger.info(f'Using {len(stocks)} stocks from curated list')
 
+        self.universe_diff = self.universe.update_symbols(stocks)
+        self.universe.save()
+        added, removed = self.universe_diff['added'], self.universe_diff['removed']
+        if added or removed:
+            logger.info(f'Universe changed: +{len(added)} {added[:20]}, -{len(removed)} {removed[:20]}')
+
+        # Removed symbols are dropped from the metadata cache; added ones are looked up by categorize_stocks()
+        for ticker in removed:
+            self.metadata_cache.remove(ticker)
+        if removed:
+            self.metadata_cache.save()
+
+        if not (added or removed) and os.path.exists(self.file_path):
+            logger.info('Stock list unchanged, not rewriting file')
+            return stocks
+
         # Save to file (ensure directory exists)
         os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
 
@@ -120,19 +187,38 @@ class StockTickerFetcher:
         """Categorize stocks by sector and industry for better AI training"""
         categorized: dict[str, dict[str, list[str]]] = {}
 
+        # Only new or expired tickers need a (slow) .info lookup
+        to_fetch = self.metadata_cache.stale_symbols(self.stock_list)
+        if to_fetch:
+            logger.info(f'Looking up sector/industry for {len(to_fetch)} of {len(self.stock_list)} tickers')
+            results = self.executor.map((ticker, lambda ticker=ticker: self._fetch_metadata(ticker)) for ticker in to_fetch)
+            for ticker, info in zip(to_fetch, results):
+                if info is not None:
+                    self.metadata_cache.set(ticker, info['sector'], info['industry'])
+            self.metadata_cache.save()
+
         for ticker in self.stock_list:
-            try:
-                info = yf.Ticker(ticker).info
-                sector = info.get('sector', 'Unknown')
-                industry = info.get('industry', 'Unknown')
+            entry = self.metadata_cache.get(ticker)
+            if entry is None:
+                logger.warning(f'Failed to categorize {ticker}')
+                continue
 
-                if sector not in categorized:
-                    categorized[sector] = {}
-                if industry not in categorized[sector]:
-                    categorized[sector][industry] = []
+            sector = entry['sector']
+            industry = entry['industry']
 
-                categorized[sector][industry].append(ticker)
-            except Exception as e:
-                logger.warning(f'Failed to categorize {ticker}: {e}')
+            if sector not in categorized:
+                categorized[sector] = {}
+            if industry not in categorized[sector]:
+                categorized[sector][industry] = []
+
+            categorized[sector][industry].append(ticker)
 
         return categorized
+
+    @staticmethod
+    def _fetch_metadata(ticker: str) -> dict:
+        info = yf.Ticker(ticker).info
+        return {
+            'sector': info.get('sector', 'Unknown'),
+            'industry': info.get('industry', 'Unknown'),
+        }
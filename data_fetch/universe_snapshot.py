@@ -0,0 +1,72 @@
+"""
+Cached snapshot of the ticker universe (S&P 500 + NASDAQ source lists).
+
+The snapshot in ``data/universe.json`` keeps each source's ticker list
+together with the ETag / Last-Modified headers it was served with, so the
+next refresh can be a conditional request, and the bot can still start
+from the last known universe when the sources are unreachable.
+"""
+
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger()
+
+
+class UniverseSnapshot:
+    def __init__(self, file_path: str | None = None):
+        self.file_path = file_path or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'universe.json')
+        data = self._load()
+        self.fetched_at: float = data.get('fetched_at', 0.0)
+        self.symbols: list[str] = data.get('symbols', [])
+        self.sources: dict[str, dict] = data.get('sources', {})
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.file_path):
+            return {}
+        try:
+            with open(self.file_path) as file:
+                return json.load(file)
+        except Exception as e:
+            logger.warning(f'Failed to read universe snapshot, starting fresh: {e}')
+            return {}
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        tmp_path = f'{self.file_path}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump({'fetched_at': self.fetched_at, 'symbols': self.symbols, 'sources': self.sources}, file, indent=4)
+        os.replace(tmp_path, self.file_path)
+
+    def is_fresh(self, max_age_hours: float) -> bool:
+        return bool(self.symbols) and time.time() - self.fetched_at < max_age_hours * 3600
+
+    def conditional_headers(self, source: str) -> dict[str, str]:
+        """Request headers that let the server answer 304 Not Modified for `source`."""
+        cached = self.sources.get(source, {})
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    def cached_tickers(self, source: str) -> list[str]:
+        return self.sources.get(source, {}).get('tickers', [])
+
+    def set_source(self, source: str, tickers: list[str], etag: str | None, last_modified: str | None) -> None:
+        self.sources[source] = {'tickers': tickers, 'etag': etag, 'last_modified': last_modified}
+
+    def update_symbols(self, symbols: list[str]) -> dict[str, list[str]]:
+        """Replace the universe and return the diff against the previous one."""
+        previous = set(self.symbols)
+        current = set(symbols)
+        diff = {
+            'added': sorted(current - previous),
+            'removed': sorted(previous - current),
+        }
+        self.symbols = sorted(current)
+        self.fetched_at = time.time()
+        return diff
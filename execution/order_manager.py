@@ -7,13 +7,18 @@ import time
 from datetime import datetime
 from typing import Dict
 
+import pandas as pd
 from ib_insync import LimitOrder, MarketOrder, Stock, StopOrder
 
+from data_fetch.bar_context import BarContext
 from data_fetch.historical_data import StockDataFetcher
+from data_fetch.live_bars import LiveBarUpdater
+from data_fetch.persistence import PersistenceStore
 from execution.position_manager import PositionManager
 from execution.risk_manager import RiskManager
 from strategy.ai_analysis.ai_analyzer import AIAnalyzer
-from strategy.retest_200ma.indicators import TrendIndicator
+from strategy.retest_200ma.batch_scan import BatchPatternScanner
+from strategy.retest_200ma.indicator_state import IndicatorStateStore
 from utils.alerts import AlertManager
 
 # Setup logging
@@ -30,6 +35,7 @@ class OrderManager:
         ai_analyzers: dict[str, AIAnalyzer],
         config,
         params,
+        persistence: PersistenceStore | None = None,
     ):
         self.ib = ib
         self.stock_data = stock_data
@@ -38,12 +44,55 @@ class OrderManager:
         self.ai_analyzers = ai_analyzers
         self.config = config
         self.params = params
+        self.persistence = persistence
+
+        # With live bars, history is fetched once per day and later scans only patch today's bar
+        self.live_bars = LiveBarUpdater.from_config(ib, config)
+        self.bar_context = self._new_bar_context()
+        self._bar_day = None
+        # Running MA200 per ticker, so a scan only pays for the bars that changed
+        self.ma_state = IndicatorStateStore.from_config(config, params)
+
+    def _new_bar_context(self) -> BarContext:
+        # One fetch per ticker serves both the strategy and the AI lookback
+        return BarContext(
+            self.stock_data,
+            {
+                'strategy': self.params['strategy_retest_200ma']['lookback_days'],
+                'ai': self.params['ai_analyzer']['lookback_days'],
+            },
+        )
 
     def scan_stocks(self, categorized_stocks: dict[str, dict[str, list]]):
         """Scan all stocks for trading signals"""
         logger.info('Scanning all stocks...')
+        self.stock_data.executor.stats.reset()
+
+        # Trading day in New York, the time zone of the bar dates
+        now = pd.Timestamp.now(tz='America/New_York')
+        if self.live_bars is not None:
+            # Keep the day's history across scans; start over on a new trading day
+            if self._bar_day != now.date():
+                self.bar_context.clear()
+                self._bar_day = now.date()
+        bar_context = self.bar_context
+        # One scanner per scan, so the VIX behind the stop losses is fetched once and stays fresh
+        pattern_scanner = BatchPatternScanner(self.config, self.params, ma_state=self.ma_state)
 
         for sector, industries in categorized_stocks.items():
+            # Download the whole sector in a few batched requests instead of one per ticker
+            sector_tickers = [t for tickers in industries.values() for t in tickers if t not in self.position_manager.active_positions]
+            if self.live_bars is None:
+                bar_context.clear()
+                bar_context.load(sector_tickers)
+            else:
+                cached = {t for t in sector_tickers if bar_context.frame(t) is not None}
+                bar_context.load(sector_tickers)
+                self.live_bars.update(bar_context, [t for t in sector_tickers if t in cached], now)
+
+            # 200 MA pattern for the whole sector in one vectorized pass
+            signals_200ma = pattern_scanner.signals(pattern_scanner.scan_frames({t: bar_context.get(t, 'strategy') for t in sector_tickers}))
+
             for industry, tickers in industries.items():
                 for ticker in tickers:
                     # Skip if we already have a position
@@ -51,14 +100,16 @@ class OrderManager:
                         continue
 
                     # Get historical data
-                    df = self.stock_data.get_historical_data(ticker, self.params['strategy_retest_200ma']['lookback_days'])
+                    df = bar_context.get(ticker, 'strategy')
 
                     if df is None or len(df) < self.params['strategy_retest_200ma']['ma_period']:
                         continue
 
                     # AI predictions
                     try:
-                        prediction = self.ai_analyzers[sector].predict(ticker)
+                        prediction = self.ai_analyzers[sector].predict(ticker, bars=bar_context.get(ticker, 'ai'))
+                        if prediction is not None and self.persistence is not None:
+                            self.persistence.record_prediction(prediction)
                         if prediction is not None and 'probs' in prediction and prediction['class'] in prediction['probs']:
                             class_type = prediction['class']
                             if prediction['probs'][class_type] > self.params['ai_analyzer']['confidence_threshold'] and class_type in [
@@ -69,6 +120,8 @@ class OrderManager:
 
                                 ai_signal = self.ai_analyzers[sector].construct_signal(df, self.params, class_type, prediction['probs'][class_type])
                                 if ai_signal:
+                                    if self.persistence is not None:
+                                        self.persistence.record_signal(ai_signal)
                                     self.execute_signal(ai_signal)  # Execute immediately for each signal
                                     logger.info('Waiting 1 minute after executing signal...')
                                     self.ib.sleep(60)  # Small delay to avoid rate limiting
@@ -81,8 +134,7 @@ class OrderManager:
                         logger.warning(f'Unexpected AI error for {ticker}: {e}')
 
                     # Detect 200 MA pattern
-                    indicator_200ma = TrendIndicator(df, self.config, self.params)
-                    signal = indicator_200ma.detect_breakout_and_retest()
+                    signal = signals_200ma.get(ticker)
 
                     if signal:
                         logger.info(
@@ -90,11 +142,17 @@ class OrderManager:
                             f'Breakout Vol: {signal["breakout_volume_ratio"]:.2f}x, '
                             f'Retest Vol: {signal["retest_volume_ratio"]:.2f}x'
                         )
+                        if self.persistence is not None:
+                            self.persistence.record_signal(signal)
 
                         self.execute_signal(signal)  # Execute immediately for each signal
                         logger.info('Waiting 1 minute after executing signal...')
                         self.ib.sleep(60)  # Small delay to avoid rate limiting
 
+        self.stock_data.executor.stats.log_summary('Scan fetch')
+        if self.ma_state is not None:
+            self.ma_state.save()
+
     def execute_signal(self, signal: dict):
         """Execute trading signals"""
         # Get account info to determine position sizing
@@ -247,6 +305,8 @@ class OrderManager:
             fill_price = parent_trade.orderStatus.avgFillPrice
             if status != 'Filled' or fill_price <= 0:
                 logger.warning(f'{symbol} parent order did NOT fill (status={status}). Cancelling and skipping persistence.')
+                if self.persistence is not None:
+                    self.persistence.record_order(symbol, action, shares, status, fill_price or None, signal)
                 for trade in [parent_trade, tp_trade, sl_trade]:
                     try:
                         self.ib.cancelOrder(trade.order)
@@ -292,6 +352,8 @@ class OrderManager:
             if not child_ok:
                 # Cancel any remaining orders and flatten the filled parent position
                 logger.warning(f'Cancelling group and flattening position for {symbol} due to child order failure.')
+                if self.persistence is not None:
+                    self.persistence.record_order(symbol, action, shares, 'ChildRejected', float(fill_price), signal)
                 for trade in [tp_trade, sl_trade, parent_trade]:
                     try:
                         self.ib.cancelOrder(trade.order)
@@ -320,6 +382,8 @@ class OrderManager:
                 'entry_time': entry_time,
             }
             self.position_manager.add_position(symbol, signal, shares, entry_time)
+            if self.persistence is not None:
+                self.persistence.record_order(symbol, action, shares, status, float(fill_price), signal)
 
             logger.info(
                 f'FILLED {signal["type"]} {symbol}: {shares} sh @ ${fill_price:.2f}, Stop: ${signal["stop"]:.2f}, Target: ${signal["target"]:.2f}'
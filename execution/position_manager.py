@@ -9,6 +9,7 @@ from typing import Dict
 
 from ib_insync import *
 
+from data_fetch.persistence import PersistenceStore
 from utils.alerts import AlertManager
 
 # Setup logging
@@ -16,9 +17,10 @@ logger = logging.getLogger()
 
 
 class PositionManager:
-    def __init__(self, ib, alert_manager: AlertManager, config, params):
+    def __init__(self, ib, alert_manager: AlertManager, config, params, persistence: PersistenceStore | None = None):
         self.ib = ib
         self.file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'positions.json')
+        self.persistence = persistence
         self.active_positions: dict[str, dict] = {}
         self.config = config
         self.params = params
@@ -90,17 +92,37 @@ class PositionManager:
         else:
             logger.info('No active positions')
 
+    def _read_saved_positions(self) -> dict | None:
+        """Saved positions from the database, or positions.json when persistence is off."""
+        if self.persistence is not None:
+            data = self.persistence.positions()
+            if data or not os.path.exists(self.file_path):
+                return data
+            # First start on the database: import the legacy JSON once, then move it
+            # aside so positions closed later don't come back from it on a restart
+            with open(self.file_path) as file:
+                data = json.load(file)
+            for symbol, entry in data.items():
+                self.persistence.upsert_position(symbol, entry)
+            self.persistence.flush()
+            os.replace(self.file_path, f'{self.file_path}.migrated')
+            logger.info(f'Imported {len(data)} positions from positions.json into the database')
+            return data
+
+        if not os.path.exists(self.file_path):
+            return None
+        with open(self.file_path) as file:
+            return json.load(file)
+
     def load_positions(self) -> dict:
         """Load positions from JSON and sync with IB"""
         out: dict = {}
         try:
-            if not os.path.exists(self.file_path):
+            data = self._read_saved_positions()
+            if data is None:
                 logger.info('No positions.json file found - starting fresh')
                 return out
 
-            with open(self.file_path) as file:
-                data = json.load(file)
-
             if not data:
                 logger.info('positions.json is empty - starting fresh')
                 return out
@@ -165,10 +187,14 @@ class PositionManager:
 
             # Now safe to remove
             if symbols_to_remove:
-                for symbol in symbols_to_remove:
-                    del data[symbol]
-                with open(self.file_path, 'w') as file:
-                    json.dump(data, file, indent=4)
+                if self.persistence is not None:
+                    for symbol in symbols_to_remove:
+                        self.persistence.delete_position(symbol)
+                else:
+                    for symbol in symbols_to_remove:
+                        del data[symbol]
+                    with open(self.file_path, 'w') as file:
+                        json.dump(data, file, indent=4)
 
         except Exception as e:
             logger.error(f'Failed to load positions from JSON: {e}')
@@ -177,13 +203,6 @@ class PositionManager:
     def add_position(self, symbol: str, signal: dict, shares: int, entry_time: str):
         """Add new position to tracking"""
         try:
-            # Load existing data
-            if os.path.exists(self.file_path):
-                with open(self.file_path) as file:
-                    data = json.load(file)
-            else:
-                data = {}
-
             # Create entry with proper datetime serialization
             new_entry = None
             if signal['strategy_type'] == '200ma_retest':
@@ -230,6 +249,19 @@ class PositionManager:
                     'entry_time': entry_time,
                 }
 
+            # Single-row upsert instead of rewriting the whole file
+            if self.persistence is not None:
+                self.persistence.upsert_position(symbol, new_entry)
+                logger.debug(f'Saved position {symbol} to database')
+                return
+
+            # Load existing data
+            if os.path.exists(self.file_path):
+                with open(self.file_path) as file:
+                    data = json.load(file)
+            else:
+                data = {}
+
             # Add to data
             data[symbol] = new_entry
 
@@ -245,6 +277,11 @@ class PositionManager:
     def remove_position(self, symbol: str):
         """Remove closed position"""
         try:
+            if self.persistence is not None:
+                self.persistence.delete_position(symbol)
+                logger.debug(f'Removed position {symbol} from database')
+                return
+
             if not os.path.exists(self.file_path):
                 return
 
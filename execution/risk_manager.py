@@ -4,8 +4,10 @@ Risk management: position sizing, cash reserves, max positions
 
 import logging
 
+import numpy as np
 import pandas as pd
-import yfinance as yf
+
+from data_fetch.market_context import get_market_context
 
 # Setup logging
 logger = logging.getLogger()
@@ -59,27 +61,27 @@ class RiskManager:
         trade_cost = shares * entry_price
         return trade_cost <= available_cash
 
-    def get_stop_loss_pct(self, df: pd.DataFrame) -> float:
-        # Fetch the VIX ticker object
-        vix_today = 20.0
-        try:
-            vix_ticker = yf.Ticker('^VIX')
-            vix_today = vix_ticker.fast_info['lastPrice']
-        except Exception as e:
-            logger.warning(f'Failed to fetch VIX data, defaulting to 20.0: {e}')
-
-        # Calculate the daily range percentage
-        close = df['close'].astype(float)
-        high = df['high'].astype(float)
-        low = df['low'].astype(float)
-        daily_range_pct = (high - low) / close
+    def get_vix(self) -> float:
+        """Latest VIX level from the shared market context, 20.0 if it isn't available"""
+        vix_today = get_market_context().vix()
+        if vix_today is None:
+            logger.warning('VIX data unavailable, defaulting to 20.0')
+            return 20.0
+        return vix_today
 
-        sl = 0
+    def stop_loss_multiplier(self, vix_today: float) -> float:
+        """Daily-range multiple used for the stop: wider in high volatility, tighter in low"""
         if vix_today > 25:
-            sl = daily_range_pct.iloc[-1] * (self.params['strategy_retest_200ma']['ATR'] + 0.5)
+            return self.params['strategy_retest_200ma']['ATR'] + 0.5
         elif vix_today < 15:
-            sl = daily_range_pct.iloc[-1] * (self.params['strategy_retest_200ma']['ATR'] - 0.5)
-        else:
-            sl = daily_range_pct.iloc[-1] * self.params['strategy_retest_200ma']['ATR']
+            return self.params['strategy_retest_200ma']['ATR'] - 0.5
+        return self.params['strategy_retest_200ma']['ATR']
+
+    def get_stop_loss_pct(self, df: pd.DataFrame | dict) -> float:
+        # Daily range percentage of the last bar (works on a DataFrame or a dict of arrays)
+        close = float(np.asarray(df['close'])[-1])
+        high = float(np.asarray(df['high'])[-1])
+        low = float(np.asarray(df['low'])[-1])
+        daily_range_pct = (high - low) / close
 
-        return sl
+        return daily_range_pct * self.stop_loss_multiplier(self.get_vix())
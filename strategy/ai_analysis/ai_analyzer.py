@@ -12,15 +12,20 @@ Responsibilities
 """
 
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
 from data_fetch.historical_data import StockDataFetcher
+from data_fetch.market_context import MarketContext
 from execution.risk_manager import RiskManager
 from strategy.ai_analysis.cnn_trainer import CNNTrainer
 from strategy.ai_analysis.data_preparation.feature_builder import FeatureBuilder
+from strategy.ai_analysis.data_preparation.feature_cache import FeatureCache
+from strategy.ai_analysis.data_preparation.feature_store import FeatureStore
+from strategy.ai_analysis.data_preparation.windows import SlidingWindows
 from strategy.ai_analysis.lstm_trainer import LSTMTrainer
 from strategy.ai_analysis.walk_forward import WalkForwardValidator
 
@@ -42,11 +47,16 @@ class AIAnalyzer:
         # Deprecated — kept for backward compat, ignored
         rbm_hidden_dim: int = 64,
         rbm_epochs: int = 30,
+        market_context: MarketContext | None = None,
+        feature_store: FeatureStore | None = None,
+        feature_cache: FeatureCache | None = None,
     ):
         if model_type not in self.VALID_MODEL_TYPES:
             raise ValueError(f"model_type must be one of {self.VALID_MODEL_TYPES}, got '{model_type}'")
         self.stock_data = stock_data
-        self.feature_builder = feature_builder or FeatureBuilder(window_size=10, n_bits=4)
+        self.feature_builder = feature_builder or FeatureBuilder(
+            window_size=10, n_bits=4, market_context=market_context, feature_store=feature_store, feature_cache=feature_cache
+        )
         self.model_type = model_type
         self._trainer: CNNTrainer | LSTMTrainer | None = None
         self.cnn_epochs = cnn_epochs
@@ -78,19 +88,28 @@ class AIAnalyzer:
             self._bar_cache[symbol] = df
         return df
 
+    def prefetch(self, symbols: list[str]) -> None:
+        """Batch-download bars for every symbol not cached yet, ahead of add_ticker() calls."""
+        missing = [s for s in symbols if s not in self._bar_cache]
+        if not missing:
+            return
+        bars = self.stock_data.get_historical_data_batch(missing, self.params['ai_analyzer']['lookback_days'])
+        self._bar_cache.update(bars)
+        logger.info(f'Prefetched bars for {len(bars)}/{len(missing)} tickers')
+
     def reset_dataset(self) -> None:
         """Drop accumulated bars / features so the next add_ticker() starts fresh."""
         self._bar_cache.clear()
         self._continuous_per_ticker.clear()
         self._kept_tickers.clear()
 
-    def add_ticker(self, symbol: str) -> bool:
+    def add_ticker(self, symbol: str, features: pd.DataFrame | None = None) -> bool:
         """
         Incrementally add one ticker's data to the training corpus.
 
-        Fetches bars (if not already cached), computes continuous features and
-        stores them for the next `finalize_training()` call. Does **not**
-        train anything yet.
+        Fetches bars (if not already cached), computes continuous features
+        (unless already extracted, see `add_tickers()`) and stores them for the
+        next `finalize_training()` call. Does **not** train anything yet.
 
         Returns True if the ticker was added, False if skipped.
         """
@@ -104,7 +123,7 @@ class AIAnalyzer:
             return False
 
         try:
-            feats = self.feature_builder.build_continuous_features(bars)
+            feats = features if features is not None else self.feature_builder.build_continuous_features(bars)
         except ValueError as e:
             logger.warning(f'{symbol}: {e}')
             return False
@@ -114,10 +133,30 @@ class AIAnalyzer:
         logger.debug(f'Added {symbol} to dataset ({len(self._kept_tickers)} tickers accumulated)')
         return True
 
-    def build_dataset(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    def add_tickers(self, symbols: list[str], workers: int | None = None, pool: ProcessPoolExecutor | None = None) -> int:
+        """
+        `add_ticker()` for every symbol, with the bars batch-downloaded first and
+        the features extracted on `workers` processes (default: CPU count), on
+        `pool` when given (see parallel_features.extraction_pool).
+
+        Returns the number of tickers added.
+        """
+        self.prefetch(symbols)
+        frames = {
+            s: self._bar_cache[s]
+            for s in dict.fromkeys(symbols)
+            if s not in self._kept_tickers and self._bar_cache.get(s) is not None and len(self._bar_cache[s]) >= 250
+        }
+        features = self.feature_builder.build_continuous_features_parallel(frames, workers, pool) if frames else {}
+        return sum(self.add_ticker(s, features.get(s)) for s in symbols)
+
+    def build_dataset(self, lazy: bool = False) -> tuple[np.ndarray | SlidingWindows, np.ndarray, np.ndarray]:
         """
         Assemble the pooled training tensors.
 
+        With `lazy`, cnn_x is a SlidingWindows over the pooled feature rows instead
+        of a dense array; the trainers copy out one batch of windows at a time.
+
         Returns
         -------
         cnn_x  : (N, input_length) float32
@@ -132,7 +171,7 @@ class AIAnalyzer:
         cnn_chunks, label_chunks, ticker_ids = [], [], []
         for idx, sym in enumerate(self._kept_tickers):
             bars = self._bar_cache[sym]
-            _, cnn_x, labels = self.feature_builder.build_windows(bars, include_labels=True, include_rbm=False)
+            _, cnn_x, labels = self.feature_builder.build_windows(bars, include_labels=True, include_rbm=False, lazy=lazy)
             if len(cnn_x) == 0:
                 continue
             cnn_chunks.append(cnn_x)
@@ -142,7 +181,7 @@ class AIAnalyzer:
         if not cnn_chunks:
             raise RuntimeError('No tickers produced usable windowed samples')
 
-        cnn_all = np.concatenate(cnn_chunks, axis=0)
+        cnn_all = SlidingWindows.concat(cnn_chunks) if lazy else np.concatenate(cnn_chunks, axis=0)
         labels_all = np.concatenate(label_chunks, axis=0)
         ids_all = np.concatenate(ticker_ids, axis=0)
 
@@ -164,7 +203,7 @@ class AIAnalyzer:
                 f'finalize_training() called with only {len(self._kept_tickers)} ticker(s); pooled training needs several tickers to generalise.'
             )
 
-        cnn_x, labels, _ = self.build_dataset()
+        cnn_x, labels, _ = self.build_dataset(lazy=True)
 
         self._trainer = self._create_trainer()
         self._trainer.train(cnn_x, labels, val_split=val_split)
@@ -186,15 +225,15 @@ class AIAnalyzer:
         Returns per-fold metrics and averages. The final model (trained on
         all data) is stored in self._trainer so predict() works.
         """
-        cnn_x, labels, _ = self.build_dataset()
+        cnn_x, labels, _ = self.build_dataset(lazy=True)
         validator = WalkForwardValidator(n_splits=n_splits)
         splits = validator.split(len(cnn_x))
 
         fold_metrics = []
         for fold_idx, (train_idx, val_idx) in enumerate(splits):
             trainer = self._create_trainer()
-            train_x, train_y = cnn_x[train_idx], labels[train_idx]
-            val_x, val_y = cnn_x[val_idx], labels[val_idx]
+            train_x, train_y = cnn_x.take(train_idx), labels[train_idx]
+            val_x, val_y = cnn_x.take(val_idx), labels[val_idx]
 
             trainer.train(train_x, train_y, val_split=0.0)
 
@@ -222,23 +261,26 @@ class AIAnalyzer:
             'total_samples': len(cnn_x),
         }
 
-    def predict(self, symbol: str) -> dict | None:
+    def predict(self, symbol: str, bars: pd.DataFrame | None = None) -> dict | None:
         """
         Fetch the latest bars for `symbol`, build the most recent window and
         classify it. Returns None if anything is missing / not trained.
+
+        `bars` can be passed in when the caller already holds the ticker's
+        history (e.g. the scan's shared BarContext) to skip the fetch.
         """
         if self._trainer is None:
             raise RuntimeError('Call train() or finalize_training() before predict()')
 
-        df = self.stock_data.get_historical_data(symbol, self.params['ai_analyzer']['lookback_days'])
+        df = bars if bars is not None else self.stock_data.get_historical_data(symbol, self.params['ai_analyzer']['lookback_days'])
         if df is None or len(df) < 250:
             return None
 
-        _, cnn_x, _ = self.feature_builder.build_windows(df, include_labels=False, include_rbm=False)
-        if len(cnn_x) == 0:
+        # Only the most recent window; with online features only the bars new since the last call are processed
+        cnn_last = self.feature_builder.latest_window(df, symbol)
+        if cnn_last is None:
             return None
 
-        cnn_last = cnn_x[-1:]
         preds, probs = self._trainer.predict(cnn_last)
 
         cls = int(preds[0])
@@ -10,6 +10,7 @@ Labels
 
 import copy
 import logging
+from functools import partial
 from typing import Optional, Tuple
 
 import numpy as np
@@ -19,6 +20,8 @@ import torch.optim as optim
 from torch.utils.data import DataLoader, TensorDataset
 
 from ai_modules.cnn.convolution_neural_network import ConvolutionNeuralNetwork
+from strategy.ai_analysis.data_preparation.windows import SlidingWindows
+from strategy.ai_analysis.window_dataset import WindowDataset
 
 logger = logging.getLogger(__name__)
 
@@ -58,7 +61,7 @@ class CNNTrainer:
     # ---------------------------------------------------------------- train
     def train(
         self,
-        cnn_x: np.ndarray,
+        cnn_x: np.ndarray | SlidingWindows,
         labels: np.ndarray,
         rbm_feats: np.ndarray | None = None,
         val_split: float = 0.2,
@@ -67,6 +70,7 @@ class CNNTrainer:
 
         Uses a chronological train/val split so validation = most recent samples.
         Tracks validation loss and restores the best model weights after training.
+        SlidingWindows input is materialized one batch at a time.
         """
         if cnn_x.shape[1] != self.input_length:
             raise ValueError(f'cnn_x second dim must be {self.input_length}; got {cnn_x.shape[1]}')
@@ -82,21 +86,26 @@ class CNNTrainer:
             rbm_features=self.rbm_feature_dim,
         ).to(self.device)
 
-        x_img = torch.tensor(cnn_x, dtype=torch.float32).unsqueeze(1)
-        y = torch.tensor(labels, dtype=torch.long)
+        split = int(len(labels) * (1.0 - val_split))
 
-        split = int(len(y) * (1.0 - val_split))
-
-        if self._has_rbm:
-            x_rbm = torch.tensor(rbm_feats, dtype=torch.float32)
-            train_ds = TensorDataset(x_img[:split], x_rbm[:split], y[:split])
-            val_ds = TensorDataset(x_img[split:], x_rbm[split:], y[split:])
+        if isinstance(cnn_x, SlidingWindows) and not self._has_rbm:
+            to_image = partial(torch.unsqueeze, dim=1)
+            train_ds = WindowDataset(cnn_x.take(np.arange(split)), labels[:split], to_image)
+            val_ds = WindowDataset(cnn_x.take(np.arange(split, len(cnn_x))), labels[split:], to_image)
+            train_loader = train_ds.loader(self.batch_size, shuffle=True)
+            val_loader = val_ds.loader(self.batch_size)
         else:
-            train_ds = TensorDataset(x_img[:split], y[:split])
-            val_ds = TensorDataset(x_img[split:], y[split:])
-
-        train_loader = DataLoader(train_ds, batch_size=self.batch_size, shuffle=True)
-        val_loader = DataLoader(val_ds, batch_size=self.batch_size)
+            x_img = torch.tensor(np.asarray(cnn_x), dtype=torch.float32).unsqueeze(1)
+            y = torch.tensor(labels, dtype=torch.long)
+            if self._has_rbm:
+                x_rbm = torch.tensor(rbm_feats, dtype=torch.float32)
+                train_ds = TensorDataset(x_img[:split], x_rbm[:split], y[:split])
+                val_ds = TensorDataset(x_img[split:], x_rbm[split:], y[split:])
+            else:
+                train_ds = TensorDataset(x_img[:split], y[:split])
+                val_ds = TensorDataset(x_img[split:], y[split:])
+            train_loader = DataLoader(train_ds, batch_size=self.batch_size, shuffle=True)
+            val_loader = DataLoader(val_ds, batch_size=self.batch_size)
 
         optimizer = optim.Adam(
             self.model.parameters(),
@@ -199,7 +208,7 @@ class CNNTrainer:
         return total_loss / max(total_samples, 1)
 
     # ------------------------------------------------------------- inference
-    def predict(self, cnn_x: np.ndarray, rbm_feats: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    def predict(self, cnn_x: np.ndarray | SlidingWindows, rbm_feats: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
         """
         Returns
         -------
@@ -210,7 +219,7 @@ class CNNTrainer:
             raise RuntimeError('CNN has not been trained yet')
         self.model.eval()
         with torch.no_grad():
-            img = torch.tensor(cnn_x, dtype=torch.float32).unsqueeze(1).to(self.device)
+            img = torch.tensor(np.asarray(cnn_x), dtype=torch.float32).unsqueeze(1).to(self.device)
             feat = None
             if self._has_rbm and rbm_feats is not None:
                 feat = torch.tensor(rbm_feats, dtype=torch.float32).to(self.device)
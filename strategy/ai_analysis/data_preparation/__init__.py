@@ -1,10 +1,14 @@
 """Feature extraction and dataset building for the AI analysis pipeline."""
 
 from strategy.ai_analysis.data_preparation.feature_builder import FeatureBuilder
+from strategy.ai_analysis.data_preparation.feature_cache import FeatureCache
+from strategy.ai_analysis.data_preparation.feature_store import FeatureStore
 from strategy.ai_analysis.data_preparation.indicator_features import IndicatorFeatureExtractor
 from strategy.ai_analysis.data_preparation.market_features import MarketFeatureExtractor
+from strategy.ai_analysis.data_preparation.online_features import OnlineFeatureEngine
 from strategy.ai_analysis.data_preparation.price_features import PriceFeatureExtractor
 from strategy.ai_analysis.data_preparation.volume_features import VolumeFeatureExtractor
+from strategy.ai_analysis.data_preparation.windows import SlidingWindows
 
 __all__ = [
     'PriceFeatureExtractor',
@@ -12,4 +16,8 @@ __all__ = [
     'IndicatorFeatureExtractor',
     'MarketFeatureExtractor',
     'FeatureBuilder',
+    'FeatureCache',
+    'FeatureStore',
+    'OnlineFeatureEngine',
+    'SlidingWindows',
 ]
@@ -12,15 +12,22 @@ Pipeline
 """
 
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+from data_fetch.market_context import MarketContext
+from strategy.ai_analysis.data_preparation.feature_cache import FeatureCache, bars_key, extractors_hash
+from strategy.ai_analysis.data_preparation.feature_store import FeatureStore
 from strategy.ai_analysis.data_preparation.indicator_features import IndicatorFeatureExtractor
 from strategy.ai_analysis.data_preparation.market_features import MarketFeatureExtractor
+from strategy.ai_analysis.data_preparation.online_features import OnlineFeatureEngine
+from strategy.ai_analysis.data_preparation.parallel_features import extract_parallel
 from strategy.ai_analysis.data_preparation.price_features import PriceFeatureExtractor
 from strategy.ai_analysis.data_preparation.volume_features import VolumeFeatureExtractor
+from strategy.ai_analysis.data_preparation.windows import SlidingWindows
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +42,11 @@ class FeatureBuilder:
         label_threshold: float = 0.01,
         volatility_adjusted_labels: bool = True,
         volatility_threshold: float = 1.0,
+        market_context: MarketContext | None = None,
+        feature_cache_mb: float = 256,
+        online_features: bool = True,
+        feature_store: FeatureStore | None = None,
+        feature_cache: FeatureCache | None = None,
     ):
         """
         Parameters
@@ -50,6 +62,16 @@ class FeatureBuilder:
                                      before applying the threshold.
         volatility_threshold : ATR-normalized return threshold (used when
                                volatility_adjusted_labels is True).
+        market_context : VIX/SPY source for the default market extractor; the
+                         process-wide one when None.
+        feature_cache_mb : memory bound of the per-ticker feature cache (LRU);
+                           0 disables it.
+        online_features : keep per-ticker streaming feature state so latest_window()
+                          only processes new bars (default extractors only).
+        feature_store : on-disk per-ticker feature store; when set, only the days
+                        added since the stored rows are extracted.
+        feature_cache : feature cache shared with other builders; replaces the
+                        builder's own (`feature_cache_mb`) when set.
         """
         self.window_size = window_size
         self.n_bits = n_bits
@@ -57,24 +79,89 @@ class FeatureBuilder:
             PriceFeatureExtractor(),
             VolumeFeatureExtractor(),
             IndicatorFeatureExtractor(),
-            MarketFeatureExtractor(),
+            MarketFeatureExtractor(context=market_context),
         ]
         self.forward_horizon = forward_horizon
         self.label_threshold = label_threshold
         self.volatility_adjusted_labels = volatility_adjusted_labels
         self.volatility_threshold = volatility_threshold
 
+        cache = feature_cache if feature_cache is not None else FeatureCache(int(feature_cache_mb * 1024**2))
+        self.feature_cache = cache if cache.max_bytes > 0 else None
+        self.feature_store = feature_store
+        self.online = (
+            OnlineFeatureEngine(self.extractors, window_size + 1, self.build_continuous_features)
+            if online_features and OnlineFeatureEngine.supports(self.extractors)
+            else None
+        )
+
         self.feature_names: list[str] = []
         self.bin_edges: dict[str, np.ndarray] = {}
         self._feat_mean: np.ndarray | None = None
         self._feat_std: np.ndarray | None = None
 
     def build_continuous_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Run every extractor on one ticker's bars and concat side-by-side."""
-        frames = [ex.extract(df) for ex in self.extractors]
-        combined = pd.concat(frames, axis=1)
+        """
+        Run every extractor on one ticker's bars and concat side-by-side.
+
+        Results are cached per ticker and bars (see feature_cache), so add_ticker(),
+        build_windows() and predict() on the same bars extract only once. With a
+        feature store, cache misses read the stored rows and extract only new days.
+        """
+        key = bars_key(df) if self.feature_cache is not None else None
+        if key is not None:
+            key = (*key, extractors_hash(self.extractors))
+            cached = self.feature_cache.get(key)
+            if cached is not None:
+                return cached if cached.index.equals(df.index) else cached.set_axis(df.index)
+
+        combined = self.feature_store.read(df, self.extractors) if self.feature_store is not None else None
+        if combined is None:
+            frames = [ex.extract(df) for ex in self.extractors]
+            combined = pd.concat(frames, axis=1)
+            if self.feature_store is not None:
+                self.feature_store.write(df, self.extractors, combined)
+        if key is not None:
+            self.feature_cache.put(key, combined)
         return combined
 
+    def build_continuous_features_parallel(
+        self, frames: dict[str, pd.DataFrame], workers: int | None = None, pool: ProcessPoolExecutor | None = None
+    ) -> dict[str, pd.DataFrame]:
+        """
+        build_continuous_features() for many tickers at once, on a process pool
+        (see parallel_features). Results go into the feature cache, so the
+        add_ticker() / build_windows() calls that follow don't extract again.
+        Tickers the feature store can serve aren't sent to the pool. Tickers that
+        can't be extracted are missing from the result. `pool` is a shared
+        extraction_pool() to run on.
+        """
+        keys = {s: bars_key(df) for s, df in frames.items()} if self.feature_cache is not None else {}
+        digest = extractors_hash(self.extractors) if self.feature_cache is not None else None
+        out, pending = {}, {}
+        for symbol, df in frames.items():
+            key = keys.get(symbol)
+            cached = self.feature_cache.get((*key, digest)) if key is not None else None
+            if cached is not None:
+                out[symbol] = cached if cached.index.equals(df.index) else cached.set_axis(df.index)
+                continue
+            stored = self.feature_store.read(df, self.extractors) if self.feature_store is not None and df is not None else None
+            if stored is not None:
+                out[symbol] = stored
+                if key is not None:
+                    self.feature_cache.put((*key, digest), stored)
+            else:
+                pending[symbol] = df
+
+        extracted = extract_parallel(self.extractors, pending, workers, pool=pool) if pending else {}
+        for symbol, features in extracted.items():
+            if self.feature_store is not None:
+                self.feature_store.write(pending[symbol], self.extractors, features)
+            if keys.get(symbol) is not None:
+                self.feature_cache.put((*keys[symbol], digest), features)
+        out.update(extracted)
+        return out
+
     def fit_bin_edges(self, per_ticker_frames: Iterable[pd.DataFrame]) -> None:
         """
         Learn quantile based bin edges for every feature from the entire
@@ -116,10 +203,15 @@ class FeatureBuilder:
         df: pd.DataFrame,
         include_labels: bool = True,
         include_rbm: bool = False,
-    ) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+        lazy: bool = False,
+    ) -> tuple[np.ndarray | SlidingWindows, np.ndarray | SlidingWindows, np.ndarray | None]:
         """
         Build sliding window samples for one ticker.
 
+        With `lazy` the windows come back as SlidingWindows: strided views over the
+        (days, features) matrix that are only copied out when indexed (one batch at
+        a time during training, the last window for a prediction).
+
         Returns
         -------
         rbm_x  : binarized windows (empty if include_rbm=False)
@@ -142,18 +234,20 @@ class FeatureBuilder:
         n_features = len(self.feature_names) if self.feature_names else len(features.columns)
 
         if len(features) <= self.window_size + (self.forward_horizon if include_labels else 0):
+            no_starts = np.empty(0, dtype=np.int64)
             return (
-                np.empty((0, self.window_size * n_features * self.n_bits), dtype=np.uint8),
-                np.empty((0, self.window_size * n_features), dtype=np.float32),
+                SlidingWindows(np.empty((0, n_features * self.n_bits), dtype=np.uint8), self.window_size, no_starts)
+                if lazy
+                else np.empty((0, self.window_size * n_features * self.n_bits), dtype=np.uint8),
+                SlidingWindows(np.empty((0, n_features), dtype=np.float32), self.window_size, no_starts)
+                if lazy
+                else np.empty((0, self.window_size * n_features), dtype=np.float32),
                 None if not include_labels else np.empty((0,), dtype=np.int64),
             )
 
         cont_raw = features[self.feature_names].values.astype(np.float32) if self.feature_names else features.values.astype(np.float32)
 
-        if self._feat_mean is not None and self._feat_std is not None:
-            cont = (cont_raw - self._feat_mean) / self._feat_std
-        else:
-            cont = cont_raw
+        cont = self._standardize(cont_raw)
 
         if include_rbm and self.bin_edges:
             bits = self.binarize(features)
@@ -164,12 +258,14 @@ class FeatureBuilder:
         last_start = T - self.window_size - (self.forward_horizon if include_labels else 0)
         starts = np.arange(0, last_start)
 
+        # Strided views over the feature rows; the dense arrays copy each window exactly once
         if bits is not None:
-            rbm_x = np.stack([bits[s : s + self.window_size].reshape(-1) for s in starts]).astype(np.uint8)
+            rbm_x = SlidingWindows(bits, self.window_size, starts)
         else:
-            rbm_x = np.empty((len(starts), 0), dtype=np.uint8)
-
-        cnn_x = np.stack([cont[s : s + self.window_size].reshape(-1) for s in starts])
+            rbm_x = SlidingWindows(np.empty((T, 0), dtype=np.uint8), self.window_size, starts)
+        cnn_x = SlidingWindows(cont, self.window_size, starts)
+        if not lazy:
+            rbm_x, cnn_x = rbm_x[:], cnn_x[:]
 
         labels = None
         if include_labels and close is not None:
@@ -196,6 +292,34 @@ class FeatureBuilder:
 
         return rbm_x, cnn_x, labels
 
+    def _standardize(self, cont_raw: np.ndarray) -> np.ndarray:
+        if self._feat_mean is not None and self._feat_std is not None:
+            return (cont_raw - self._feat_mean) / self._feat_std
+        return cont_raw
+
+    def latest_window(self, df: pd.DataFrame, symbol: str | None = None) -> np.ndarray | None:
+        """
+        The most recent prediction window for one ticker: build_windows(df,
+        include_labels=False)[1][-1:], shape (1, cnn_input_length), or None when
+        there are too few valid rows.
+
+        With online features and a `symbol`, the ticker's stream is synced to df
+        so only bars it hasn't seen yet are processed.
+        """
+        if self.online is None or symbol is None:
+            _, cnn_x, _ = self.build_windows(df, include_labels=False, include_rbm=False, lazy=True)
+            return cnn_x[-1:] if len(cnn_x) else None
+
+        self.online.sync(symbol, df)
+        rows = self.online.recent_rows(symbol)
+        if len(rows) <= self.window_size:
+            return None
+        # build_windows(include_labels=False) ends its last window one valid row before the newest
+        window = rows[-self.window_size - 1 : -1]
+        if self.feature_names and self.feature_names != self.online.columns:
+            window = window[:, [self.online.columns.index(name) for name in self.feature_names]]
+        return self._standardize(window.astype(np.float32)).reshape(1, -1)
+
     @property
     def visible_dim(self) -> int:
         """visible_dim to pass to the RBM constructor (legacy)."""
@@ -0,0 +1,110 @@
+"""
+In-memory LRU cache of per-ticker continuous features.
+
+A training pass extracts each ticker's features in add_ticker() and again in
+build_dataset() (through build_windows), and the scan's predict() extracts
+them once more. FeatureBuilder keeps the result here, keyed by the bars it was
+computed from (ticker, first / last bar date, bar count, last close and
+volume, so an intraday revision of today's bar is a new entry, plus a digest
+of the whole close column, so a split or dividend adjustment of older bars is
+one too) and by a hash of the extractor configuration. The least recently
+used frames are dropped once the cache holds more than `max_bytes`. The bot
+shares one cache between all sector analyzers, so the bound holds for the
+whole process.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def bars_key(df: pd.DataFrame) -> tuple | None:
+    """Cache key for one ticker's bars; None when they carry no symbol or are empty."""
+    if df.empty or 'symbol' not in df.columns or 'date' not in df.columns:
+        return None
+    dates = df['date']
+    return (
+        str(df['symbol'].iloc[-1]),
+        str(dates.iloc[0]),
+        str(dates.iloc[-1]),
+        len(df),
+        float(df['close'].iloc[-1]) if 'close' in df.columns else None,
+        float(df['volume'].iloc[-1]) if 'volume' in df.columns else None,
+        # Tens of microseconds for a 5-year history, far below one extraction
+        hashlib.sha1(np.ascontiguousarray(df['close'].to_numpy(dtype=np.float64)).tobytes()).hexdigest() if 'close' in df.columns else None,
+    )
+
+
+def extractors_hash(extractors: list) -> str:
+    """
+    Hash of the extractor classes, their feature names and settings.
+
+    Settings are the extractor's primitive attributes, or what its cache_key()
+    returns when it has one (extractors holding data or other objects). Any other
+    attribute has no stable value to hash and raises TypeError.
+    """
+    parts = []
+    for extractor in extractors:
+        if hasattr(extractor, 'cache_key'):
+            settings = extractor.cache_key()
+        else:
+            settings = []
+            for name, value in sorted(vars(extractor).items()):
+                if not isinstance(value, (bool, int, float, str, type(None))):
+                    raise TypeError(
+                        f'{type(extractor).__name__}.{name} ({type(value).__name__}) is not a cache key; define {type(extractor).__name__}.cache_key()'
+                    )
+                settings.append((name, value))
+            settings = tuple(settings)
+        parts.append((type(extractor).__qualname__, tuple(getattr(extractor, 'FEATURE_NAMES', ())), settings))
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+class FeatureCache:
+    def __init__(self, max_bytes: int = 256 * 1024**2):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._frames: OrderedDict[tuple, tuple[pd.DataFrame, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'FeatureCache':
+        max_mb = (config or {}).get('data', {}).get('feature_cache', {}).get('max_mb', 256)
+        return cls(int(max_mb * 1024**2))
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def get(self, key: tuple) -> pd.DataFrame | None:
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, frame: pd.DataFrame) -> None:
+        size = int(frame.memory_usage(index=True, deep=False).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._frames.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._frames[key] = (frame, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._frames.popitem(last=False)
+                self.bytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+            self.bytes = 0
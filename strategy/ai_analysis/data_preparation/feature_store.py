@@ -0,0 +1,188 @@
+"""
+On-disk store of continuous features, one columnar file per ticker.
+
+A feature row only depends on its bar and a bounded stretch of the bars
+before it, so once a bar is final its row never changes. Every retrain used
+to recompute all rows from the raw bars anyway; with the store, only the
+days added since the last retrain are extracted (on a WARMUP_BARS tail of
+the history, enough for the 200-day MA, its 20-day slope and the EWMs to
+match a full-history run) and appended.
+
+Layout: ``data/features/<version>/<SYMBOL>.npz`` with one float64 array per
+feature column, the bar ``date`` and the bars' ``close`` / ``volume``. The
+version hashes the extractor classes, their feature names and settings and
+the source of their modules, so changing an extractor starts a fresh
+directory instead of mixing rows. Stored close and volume are compared with
+the bars on every read; any difference (dividend adjustment, a revised
+intraday bar) recomputes the ticker.
+
+Market features are not stored: they only depend on the date and are looked
+up from the current VIX/SPY history on read, like the batch extractor does.
+Stored rows are trimmed to the bars they were last read with, so a file
+stays about one lookback long. When the bars start later than the stored
+rows (a sliding lookback), the first WARMUP_BARS rows are re-extracted from
+the bars themselves so they carry the same warm-up NaNs as a fresh run.
+"""
+
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from strategy.ai_analysis.data_preparation.online_features import ROW_EXTRACTORS
+
+logger = logging.getLogger(__name__)
+
+# Bars extracted before the first new day; covers the 200 MA + 20-day slope, and
+# the slowest EWM (alpha 1/14) has decayed to ~1e-16 of its starting value
+WARMUP_BARS = 500
+
+
+@functools.cache
+def _source_hash(cls: type) -> str:
+    try:
+        with open(inspect.getsourcefile(cls), 'rb') as file:
+            return hashlib.sha1(file.read()).hexdigest()
+    except (OSError, TypeError):
+        return ''
+
+
+def feature_version(extractors: list) -> str:
+    """Version of the stored columns: extractor classes, feature names, settings and module source."""
+    parts = []
+    for extractor in extractors:
+        settings = sorted((name, value) for name, value in vars(extractor).items() if isinstance(value, (bool, int, float, str, type(None))))
+        parts.append((type(extractor).__qualname__, tuple(extractor.FEATURE_NAMES), tuple(settings), _source_hash(type(extractor))))
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+def _naive_dates(df: pd.DataFrame) -> np.ndarray:
+    dates = pd.DatetimeIndex(df['date'])
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    return dates.to_numpy(dtype='datetime64[ns]')
+
+
+class FeatureStore:
+    def __init__(self, root: str | None = None):
+        self.root = root or os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'data', 'features')
+        self.hits = 0
+        self.rebuilds = 0
+
+    @classmethod
+    def from_config(cls, config) -> 'FeatureStore | None':
+        store_config = (config or {}).get('data', {}).get('feature_store', {})
+        if not store_config.get('enabled', False):
+            return None
+        return cls(store_config.get('path'))
+
+    def _path(self, version: str, symbol: str) -> str:
+        # Same file naming as the bar store
+        safe = re.sub(r'[^A-Za-z0-9.\-]', '_', symbol)
+        return os.path.join(self.root, version, f'{safe}.npz')
+
+    @staticmethod
+    def _stored_extractors(extractors: list) -> list:
+        return [ex for ex in extractors if type(ex) not in ROW_EXTRACTORS]
+
+    def load(self, symbol: str, extractors: list) -> pd.DataFrame | None:
+        """The stored rows for `symbol` (feature columns plus date / close / volume), or None."""
+        stored = self._stored_extractors(extractors)
+        path = self._path(feature_version(stored), symbol)
+        if not os.path.exists(path):
+            return None
+        columns = [name for ex in stored for name in ex.FEATURE_NAMES]
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                data = {name: archive[name] for name in columns + ['date', 'close', 'volume']}
+        except Exception as e:
+            logger.warning(f'Feature store: failed to read {path}, recomputing: {e}')
+            return None
+        return pd.DataFrame(data)
+
+    def save(self, symbol: str, extractors: list, df: pd.DataFrame, features: pd.DataFrame) -> None:
+        """Overwrite the stored rows for `symbol` with `features` of the bars in `df` (atomic rename)."""
+        stored = self._stored_extractors(extractors)
+        columns = [name for ex in stored for name in ex.FEATURE_NAMES]
+        arrays = {name: features[name].to_numpy(dtype=np.float64) for name in columns}
+        arrays['date'] = _naive_dates(df)
+        arrays['close'] = df['close'].to_numpy(dtype=np.float64)
+        arrays['volume'] = df['volume'].to_numpy(dtype=np.float64)
+
+        path = self._path(feature_version(stored), symbol)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp.npz'
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _extract(stored: list, columns: list[str], df: pd.DataFrame) -> np.ndarray:
+        return pd.concat([ex.extract(df) for ex in stored], axis=1)[columns].to_numpy(dtype=np.float64)
+
+    def read(self, df: pd.DataFrame, extractors: list) -> pd.DataFrame | None:
+        """
+        Continuous features for one ticker's bars, as build_continuous_features()
+        returns them, from the stored rows plus the newly extracted days (which are
+        stored as well). None when the store can't serve `df`: no symbol, nothing
+        stored, bars reaching back before the stored rows, or bars that no longer
+        match them.
+        """
+        if df.empty or 'symbol' not in df.columns or not {'date', 'close', 'volume'} <= set(df.columns):
+            return None
+        symbol = str(df['symbol'].iloc[-1])
+        stored_rows = self.load(symbol, extractors)
+        if stored_rows is None:
+            return None
+
+        dates = _naive_dates(df)
+        stored_dates = stored_rows['date'].to_numpy()
+        start = int(np.searchsorted(stored_dates, dates[0]))
+        overlap = len(stored_dates) - start
+        if start == len(stored_dates) or stored_dates[start] != dates[0] or overlap > len(df):
+            return None
+        rows = stored_rows.iloc[start:]
+        if (
+            not np.array_equal(rows['date'].to_numpy(), dates[:overlap])
+            or not np.allclose(rows['close'].to_numpy(), df['close'].to_numpy(dtype=np.float64)[:overlap], rtol=1e-9, atol=0.0)
+            or not np.array_equal(rows['volume'].to_numpy(), df['volume'].to_numpy(dtype=np.float64)[:overlap], equal_nan=True)
+        ):
+            logger.debug(f'{symbol}: stored features no longer match the bars, recomputing')
+            return None
+
+        stored = self._stored_extractors(extractors)
+        columns = [name for ex in stored for name in ex.FEATURE_NAMES]
+        values = rows[columns].to_numpy()
+        tail_start = max(overlap - WARMUP_BARS, 0) if overlap < len(df) else len(df)
+        head_stop = min(WARMUP_BARS, len(df)) if start > 0 else 0
+        if head_stop >= tail_start:
+            # Too short to gain anything from the stored rows
+            values = self._extract(stored, columns, df)
+        else:
+            if tail_start < len(df):
+                # New days, on a tail long enough to reproduce a full-history run
+                delta = self._extract(stored, columns, df.iloc[tail_start:])
+                values = np.concatenate([values, delta[overlap - tail_start :]])
+            if head_stop:
+                # Bars now start later than the stored rows did: the first rows lose
+                # their warm-up, exactly as a fresh extraction of `df` would
+                values = values.copy()
+                values[:head_stop] = self._extract(stored, columns, df.iloc[:head_stop])
+        features = pd.DataFrame(values, index=df.index, columns=columns)
+        if overlap < len(df) or start > 0:
+            self.save(symbol, extractors, df, features)
+
+        self.hits += 1
+        frames = [features[ex.FEATURE_NAMES] if type(ex) not in ROW_EXTRACTORS else ex.extract(df) for ex in extractors]
+        return pd.concat(frames, axis=1)
+
+    def write(self, df: pd.DataFrame, extractors: list, features: pd.DataFrame) -> None:
+        """Store freshly extracted `features` of `df` (a no-op for bars without symbol / date / close / volume)."""
+        if df.empty or 'symbol' not in df.columns or not {'date', 'close', 'volume'} <= set(df.columns):
+            return
+        self.rebuilds += 1
+        self.save(str(df['symbol'].iloc[-1]), extractors, df, features)
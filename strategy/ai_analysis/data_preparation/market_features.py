@@ -6,12 +6,14 @@ for every ticker on a given day. These help the model understand whether
 the broader market is in a risk-on or risk-off regime.
 """
 
+import hashlib
 import logging
 from typing import List, Optional
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+
+from data_fetch.market_context import MarketContext, get_market_context
 
 logger = logging.getLogger(__name__)
 
@@ -23,76 +25,79 @@ class MarketFeatureExtractor:
         'spy_vs_ma200',
     ]
 
-    def __init__(self, market_data: pd.DataFrame | None = None):
+    def __init__(self, market_data: pd.DataFrame | None = None, context: MarketContext | None = None):
+        """
+        Parameters
+        ----------
+        market_data : fixed VIX/SPY history (tests, backtests); read from the market context when None.
+        context     : market context to read from; the process-wide one when None.
+        """
         self._market_data = market_data
+        self._context = context
+        # (market history, its features) for the last history this extractor read
+        self._derived: tuple[pd.DataFrame, pd.DataFrame] | None = None
 
     def _fetch_market_data(self) -> pd.DataFrame:
         if self._market_data is not None:
             return self._market_data
 
-        try:
-            vix = yf.Ticker('^VIX').history(period='10y', auto_adjust=True)
-            spy = yf.Ticker('SPY').history(period='10y', auto_adjust=True)
-
-            if vix.empty or spy.empty:
-                logger.warning('Market data fetch returned empty, using defaults')
-                return pd.DataFrame()
-
-            vix_close = vix['Close'].rename('vix_close')
-            spy_close = spy['Close'].rename('spy_close')
+        # Shared, TTL-cached VIX/SPY history; not kept on the instance so long-lived
+        # extractors pick up the daily refresh
+        market = (self._context or get_market_context()).history()
+        if market.empty:
+            logger.warning('Market data unavailable, using defaults')
+        return market
+
+    def cache_key(self) -> str:
+        """Digest of the VIX/SPY history extract() reads, so cached features follow its refresh."""
+        market = self._market_data if self._market_data is not None else (self._context or get_market_context()).history()
+        return hashlib.sha1(pd.util.hash_pandas_object(market, index=True).to_numpy().tobytes()).hexdigest()
+
+    def _market_features(self, market: pd.DataFrame) -> pd.DataFrame:
+        """
+        The three features on every market day (sorted index).
+
+        Derived once per market history: the context hands out the same frame until
+        its TTL refresh, and every ticker's extract() until then reuses the SPY MA200
+        and 50-day return. The pair is replaced in one assignment, so threads sharing
+        the extractor at worst derive the same history twice.
+        """
+        cached = self._derived
+        if cached is not None and cached[0] is market:
+            return cached[1]
 
-            market = pd.DataFrame(
-                {
-                    'vix_close': vix_close,
-                    'spy_close': spy_close,
-                }
-            )
-            market.index = market.index.tz_localize(None)
-            market = market.ffill()
-            self._market_data = market
-            return market
-
-        except Exception as e:
-            logger.warning(f'Failed to fetch market data: {e}')
-            return pd.DataFrame()
+        market_sorted = market.sort_index()
+        spy_close = market_sorted['spy_close']
+        spy_ma200 = spy_close.rolling(window=200, min_periods=1).mean()
+        spy_return_50d = np.log(spy_close / spy_close.shift(50))
+
+        features = pd.DataFrame(
+            {
+                'vix_normalized': market_sorted['vix_close'] / 20.0,
+                'spy_50d_return': spy_return_50d.fillna(0.0),
+                'spy_vs_ma200': (spy_close / spy_ma200 - 1.0).where(spy_ma200.notna() & (spy_ma200 > 0), 0.0),
+            },
+            index=market_sorted.index,
+        )
+        self._derived = (market, features)
+        return features
 
     def extract(self, df: pd.DataFrame) -> pd.DataFrame:
-        out = pd.DataFrame(index=df.index)
-        market = self._fetch_market_data()
-
-        if market.empty or 'date' not in df.columns:
-            out['vix_normalized'] = 1.0
-            out['spy_50d_return'] = 0.0
-            out['spy_vs_ma200'] = 0.0
-            return out[self.FEATURE_NAMES]
-
-        dates = pd.to_datetime(df['date']).dt.tz_localize(None)
+        values = self.values(df['date'] if 'date' in df.columns else None, len(df))
+        return pd.DataFrame(values, index=df.index, columns=self.FEATURE_NAMES)
 
-        market_sorted = market.sort_index()
-        spy_ma200 = market_sorted['spy_close'].rolling(window=200, min_periods=1).mean()
-        spy_return_50d = np.log(market_sorted['spy_close'] / market_sorted['spy_close'].shift(50))
-
-        vix_vals = []
-        spy_ret_vals = []
-        spy_ma_vals = []
-
-        for d in dates:
-            mask = market_sorted.index <= d
-            if not mask.any():
-                vix_vals.append(1.0)
-                spy_ret_vals.append(0.0)
-                spy_ma_vals.append(0.0)
-                continue
-
-            idx = market_sorted.index[mask][-1]
-            vix_vals.append(market_sorted.loc[idx, 'vix_close'] / 20.0)
-            spy_ret_vals.append(spy_return_50d.loc[idx] if pd.notna(spy_return_50d.loc[idx]) else 0.0)
-            ma_val = spy_ma200.loc[idx]
-            spy_val = market_sorted.loc[idx, 'spy_close']
-            spy_ma_vals.append((spy_val / ma_val - 1.0) if pd.notna(ma_val) and ma_val > 0 else 0.0)
-
-        out['vix_normalized'] = vix_vals
-        out['spy_50d_return'] = spy_ret_vals
-        out['spy_vs_ma200'] = spy_ma_vals
-
-        return out[self.FEATURE_NAMES]
+    def values(self, dates: pd.Series | None, n_rows: int) -> np.ndarray:
+        """The (n_rows, 3) feature values for bars on `dates`; the neutral defaults without market data or dates."""
+        market = self._fetch_market_data()
+        if market.empty or dates is None:
+            return np.tile(np.array([1.0, 0.0, 0.0]), (n_rows, 1))
+
+        dates = pd.DatetimeIndex(pd.to_datetime(dates)).tz_localize(None)
+        features = self._market_features(market)
+
+        # As-of join: the last market day on or before each bar's date
+        pos = features.index.searchsorted(dates, side='right') - 1
+        known = (pos >= 0) & ~dates.isna()
+        values = features.to_numpy(dtype=np.float64)[np.maximum(pos, 0)]
+        values[~known] = (1.0, 0.0, 0.0)
+        return values
@@ -0,0 +1,390 @@
+"""
+Streaming feature extraction for last-window predictions.
+
+predict() only needs the newest window, but the batch extractors recompute
+every rolling mean, EWM and the cumulative OBV over the ticker's whole
+history to get it. The online extractors here keep that state per ticker
+(ring buffers for the rolling windows, EWM accumulators, the running OBV)
+and turn one new bar into one feature row in O(longest window).
+
+They mirror price_features, volume_features and indicator_features formula
+by formula; a change there has to be made here as well (the unit tests
+compare both on every bar). Market features only depend on the bar's own
+date and are looked up with MarketFeatureExtractor.values() for the new rows.
+
+OnlineFeatureEngine keeps one stream per ticker in step with the bars a scan
+sees, like IndicatorStateStore does for the 200 MA: new bars are fed, a
+revised last bar is re-fed from the state saved before it, and a history
+that no longer lines up is rebuilt from the batch features.
+"""
+
+import logging
+import math
+from collections import deque
+from collections.abc import Callable
+from copy import copy
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from strategy.ai_analysis.data_preparation.indicator_features import IndicatorFeatureExtractor
+from strategy.ai_analysis.data_preparation.market_features import MarketFeatureExtractor
+from strategy.ai_analysis.data_preparation.price_features import PriceFeatureExtractor
+from strategy.ai_analysis.data_preparation.volume_features import VolumeFeatureExtractor
+
+logger = logging.getLogger(__name__)
+
+# Most new bars fed one by one before a rebuild from the batch features is cheaper
+MAX_CATCH_UP = 10
+
+NAN = float('nan')
+
+
+def _div(a: float, b: float) -> float:
+    # Python floats raise on /0 where the batch extractors give inf; both make the row invalid
+    return a / b if b != 0 else NAN
+
+
+def _log_ratio(a: float, b: float) -> float:
+    return math.log(a / b) if a > 0 and b > 0 else NAN
+
+
+def _tail_mean(values: deque, n: int) -> float:
+    """Mean of the newest `n` values, NaN until there are `n` (rolling(n, min_periods=n))."""
+    if len(values) < n:
+        return NAN
+    return sum(islice(reversed(values), n)) / n
+
+
+class _Ewm:
+    """``Series.ewm(alpha=..., adjust=False, min_periods=...).mean()`` one value at a time."""
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    @classmethod
+    def from_series(cls, values: pd.Series, alpha: float, min_periods: int) -> '_Ewm':
+        """The accumulator after all of `values`, in one vectorized pass."""
+        ewm = cls(alpha, min_periods)
+        observed = np.flatnonzero(values.notna().to_numpy())
+        if len(observed):
+            ewm.weighted = float(values.ewm(alpha=alpha, adjust=False).mean().iat[-1])
+            ewm.old_wt = (1.0 - alpha) ** (len(values) - 1 - observed[-1])
+            ewm.nobs = len(observed)
+        return ewm
+
+    def update(self, x: float) -> float:
+        # Same recurrence as pandas (ignore_na=False): a NaN only ages the old weight
+        if x == x:
+            self.nobs += 1
+            if self.weighted == self.weighted:
+                old_wt = self.old_wt * (1.0 - self.alpha)
+                if self.weighted != x:
+                    self.weighted = (old_wt * self.weighted + self.alpha * x) / (old_wt + self.alpha)
+                self.old_wt = 1.0
+            else:
+                self.weighted = x
+        elif self.weighted == self.weighted:
+            self.old_wt *= 1.0 - self.alpha
+        return self.weighted if self.nobs >= self.min_periods else NAN
+
+
+class _OnlineState:
+    FEATURE_NAMES: list[str] = []
+
+    def copy(self) -> '_OnlineState':
+        clone = copy(self)
+        for name, value in vars(self).items():
+            if isinstance(value, deque):
+                setattr(clone, name, deque(value, value.maxlen))
+            elif isinstance(value, _Ewm):
+                setattr(clone, name, copy(value))
+        return clone
+
+
+class OnlinePriceFeatures(_OnlineState):
+    FEATURE_NAMES = PriceFeatureExtractor.FEATURE_NAMES
+
+    def __init__(self):
+        self.closes: deque = deque(maxlen=200)
+
+    @classmethod
+    def from_bars(cls, df: pd.DataFrame) -> 'OnlinePriceFeatures':
+        state = cls()
+        state.closes.extend(df['close'].astype(float).to_numpy()[-200:].tolist())
+        return state
+
+    def update(self, high: float, low: float, close: float, volume: float) -> tuple:
+        closes = self.closes
+        prev = closes[-1] if closes else NAN
+        prev5 = closes[-5] if len(closes) >= 5 else NAN
+        closes.append(close)
+        return (
+            _log_ratio(close, prev),
+            _log_ratio(close, prev5),
+            _div(close, _tail_mean(closes, 20)) - 1.0,
+            _div(close, _tail_mean(closes, 50)) - 1.0,
+            _div(close, _tail_mean(closes, 200)) - 1.0,
+            _div(high - low, close),
+            _div(high - close, close),
+            _div(close - low, close),
+        )
+
+
+class OnlineVolumeFeatures(_OnlineState):
+    FEATURE_NAMES = VolumeFeatureExtractor.FEATURE_NAMES
+
+    def __init__(self):
+        self.volumes: deque = deque(maxlen=50)  # zero volume stored as NaN
+        self.obv: deque = deque(maxlen=21)
+        self.prev_close = NAN
+
+    @classmethod
+    def from_bars(cls, df: pd.DataFrame) -> 'OnlineVolumeFeatures':
+        state = cls()
+        close = df['close'].astype(float)
+        volume = df['volume'].astype(float).replace(0, np.nan)
+        obv = (np.sign(close.diff()).fillna(0.0) * volume.fillna(0.0)).cumsum()
+        state.volumes.extend(volume.to_numpy()[-50:].tolist())
+        state.obv.extend(obv.to_numpy()[-21:].tolist())
+        state.prev_close = float(close.iat[-1]) if len(close) else NAN
+        return state
+
+    def update(self, high: float, low: float, close: float, volume: float) -> tuple:
+        volume = volume if volume != 0 else NAN
+        prev_volume = self.volumes[-1] if self.volumes else NAN
+        self.volumes.append(volume)
+
+        change = close - self.prev_close
+        sign = (change > 0) - (change < 0) if change == change else 0.0
+        self.obv.append((self.obv[-1] if self.obv else 0.0) + sign * (volume if volume == volume else 0.0))
+        self.prev_close = close
+
+        avg20 = _tail_mean(self.volumes, 20)
+        obv_slope = (self.obv[-1] - self.obv[0]) / 20.0 if len(self.obv) == 21 else NAN
+        return (
+            _div(volume, avg20),
+            _div(volume, _tail_mean(self.volumes, 50)),
+            _log_ratio(volume, prev_volume),
+            _div(obv_slope, avg20),
+        )
+
+
+class OnlineIndicatorFeatures(_OnlineState):
+    FEATURE_NAMES = IndicatorFeatureExtractor.FEATURE_NAMES
+
+    def __init__(self):
+        self.closes: deque = deque(maxlen=200)
+        self.ma200: deque = deque(maxlen=21)
+        self.prev_close = NAN
+        self.avg_gain = _Ewm(1.0 / 14, 14)
+        self.avg_loss = _Ewm(1.0 / 14, 14)
+        self.ema12 = _Ewm(2.0 / 13, 12)
+        self.ema26 = _Ewm(2.0 / 27, 26)
+        self.signal = _Ewm(2.0 / 10, 9)
+        self.atr = _Ewm(1.0 / 14, 14)
+
+    @classmethod
+    def from_bars(cls, df: pd.DataFrame) -> 'OnlineIndicatorFeatures':
+        state = cls()
+        close = df['close'].astype(float)
+        high = df['high'].astype(float)
+        low = df['low'].astype(float)
+
+        delta = close.diff()
+        state.avg_gain = _Ewm.from_series(delta.clip(lower=0.0), 1.0 / 14, 14)
+        state.avg_loss = _Ewm.from_series((-delta).clip(lower=0.0), 1.0 / 14, 14)
+        ema12 = close.ewm(span=12, adjust=False, min_periods=12).mean()
+        ema26 = close.ewm(span=26, adjust=False, min_periods=26).mean()
+        state.ema12 = _Ewm.from_series(close, 2.0 / 13, 12)
+        state.ema26 = _Ewm.from_series(close, 2.0 / 27, 26)
+        state.signal = _Ewm.from_series(ema12 - ema26, 2.0 / 10, 9)
+
+        prev_close = close.shift(1)
+        tr = pd.concat([(high - low), (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+        state.atr = _Ewm.from_series(tr, 1.0 / 14, 14)
+
+        state.closes.extend(close.to_numpy()[-200:].tolist())
+        state.ma200.extend(close.rolling(window=200, min_periods=200).mean().to_numpy()[-21:].tolist())
+        state.prev_close = float(close.iat[-1]) if len(close) else NAN
+        return state
+
+    def update(self, high: float, low: float, close: float, volume: float) -> tuple:
+        prev = self.prev_close
+        self.prev_close = close
+        self.closes.append(close)
+
+        # RSI(14), Wilder's smoothing
+        delta = close - prev
+        avg_gain = self.avg_gain.update(max(delta, 0.0) if delta == delta else NAN)
+        avg_loss = self.avg_loss.update(max(-delta, 0.0) if delta == delta else NAN)
+        rs = _div(avg_gain, avg_loss)
+        rsi = 100.0 - (100.0 / (1.0 + rs))
+
+        # MACD histogram / close
+        macd_line = self.ema12.update(close) - self.ema26.update(close)
+        macd_hist = _div(macd_line - self.signal.update(macd_line), close)
+
+        # Bollinger Band position
+        ma20 = _tail_mean(self.closes, 20)
+        if len(self.closes) >= 20:
+            window = list(islice(reversed(self.closes), 20))
+            std20 = math.sqrt(sum((x - ma20) ** 2 for x in window) / 19)
+        else:
+            std20 = NAN
+        upper = ma20 + 2.0 * std20
+        lower = ma20 - 2.0 * std20
+        bb_position = _div(close - lower, upper - lower)
+
+        # ATR(14) / close
+        ranges = [r for r in (high - low, abs(high - prev), abs(low - prev)) if r == r]
+        atr = self.atr.update(max(ranges) if ranges else NAN)
+
+        # 20-day slope of the 200MA / close
+        self.ma200.append(_tail_mean(self.closes, 200))
+        ma200_slope = _div(self.ma200[-1] - self.ma200[0], 20.0 * close) if len(self.ma200) == 21 else NAN
+
+        return rsi, macd_hist, bb_position, _div(atr, close), ma200_slope
+
+
+# Batch extractor -> its online counterpart
+ONLINE_EXTRACTORS: dict[type, type[_OnlineState]] = {
+    PriceFeatureExtractor: OnlinePriceFeatures,
+    VolumeFeatureExtractor: OnlineVolumeFeatures,
+    IndicatorFeatureExtractor: OnlineIndicatorFeatures,
+}
+
+# Extractors whose row only depends on that bar; their values() run on the new rows
+ROW_EXTRACTORS: tuple[type, ...] = (MarketFeatureExtractor,)
+
+
+class _Stream:
+    """One ticker's online states, its newest valid feature rows and the last bar fed."""
+
+    def __init__(self, states: list, rows_kept: int):
+        self.states = states
+        self.rows: deque = deque(maxlen=rows_kept)
+        self.newest: np.ndarray | None = None
+        self.last_date = None
+        self.last_close = NAN
+
+    def copy(self) -> '_Stream':
+        clone = copy(self)
+        clone.states = [s.copy() if s is not None else None for s in self.states]
+        clone.rows = deque(self.rows, self.rows.maxlen)
+        return clone
+
+
+class OnlineFeatureEngine:
+    def __init__(self, extractors: list, rows_kept: int, batch_features: Callable[[pd.DataFrame], pd.DataFrame] | None = None):
+        """
+        Parameters
+        ----------
+        extractors     : the FeatureBuilder's extractors; see supports().
+        rows_kept      : newest valid feature rows kept per ticker.
+        batch_features : the batch feature frame for a ticker's bars, used to
+                         (re)build a stream; every extractor concatenated when None.
+        """
+        if not self.supports(extractors):
+            raise ValueError('OnlineFeatureEngine supports only the price, volume, indicator and market extractors')
+        self.extractors = extractors
+        self.rows_kept = rows_kept
+        self.batch_features = batch_features or (lambda df: pd.concat([ex.extract(df) for ex in extractors], axis=1))
+        self.columns = [name for ex in extractors for name in ex.FEATURE_NAMES]
+
+        bounds = np.cumsum([0] + [len(ex.FEATURE_NAMES) for ex in extractors])
+        self._slices = [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:])]
+        # symbol -> (stream before its last bar, stream after it)
+        self._streams: dict[str, tuple[_Stream, _Stream]] = {}
+        self.rebuilds = 0
+
+    @staticmethod
+    def supports(extractors: list) -> bool:
+        # Exact types: a subclass may compute something the online states don't
+        return all(type(ex) in ONLINE_EXTRACTORS or type(ex) in ROW_EXTRACTORS for ex in extractors)
+
+    def sync(self, symbol: str, df: pd.DataFrame) -> np.ndarray | None:
+        """
+        Bring `symbol`'s stream up to the last bar of `df` and return that bar's
+        feature row (in `columns` order, NaN where a window isn't full yet).
+        """
+        if df is None or df.empty:
+            return None
+        # Only the newest rows are looked at unless the stream has to be rebuilt
+        tail = df.iloc[-(MAX_CATCH_UP + 2) :]
+        entry = self._streams.get(symbol)
+        resumed = self._catch_up(entry, tail) if entry is not None else None
+        if resumed is None:
+            self.rebuilds += 1
+            resumed = self._rebuild(df), len(tail) - 1
+        stream, start = resumed
+        self._streams[symbol] = self._feed(stream, tail.iloc[start:])
+        return self._streams[symbol][1].newest
+
+    def recent_rows(self, symbol: str) -> np.ndarray:
+        """The newest valid (all finite) feature rows, oldest first: (<= rows_kept, n_features)."""
+        entry = self._streams.get(symbol)
+        if entry is None or not entry[1].rows:
+            return np.empty((0, len(self.columns)))
+        return np.stack(entry[1].rows)
+
+    def reset(self) -> None:
+        self._streams.clear()
+
+    def _catch_up(self, entry: tuple[_Stream, _Stream], tail: pd.DataFrame) -> tuple[_Stream, int] | None:
+        before, after = entry
+        dates = tail['date'].to_numpy()
+        closes = tail['close'].to_numpy(dtype=np.float64)
+        n = len(tail)
+
+        # Find the stream's last bar among the newest few rows of df
+        for k in range(n - 1, 0, -1):
+            if dates[k] == after.last_date:
+                break
+        else:
+            return None
+
+        # The bar before it is final on both sides; a mismatch means the history was adjusted
+        if dates[k - 1] != before.last_date or not np.isclose(closes[k - 1], before.last_close, rtol=1e-9, atol=0.0):
+            return None
+
+        # Re-feed the last bar (it may have been revised intraday) and everything after it
+        return before.copy(), k
+
+    def _rebuild(self, df: pd.DataFrame) -> _Stream:
+        """A stream after every bar but the last one, from the batch features."""
+        history = df.iloc[:-1]
+        states = [ONLINE_EXTRACTORS[type(ex)].from_bars(history) if type(ex) in ONLINE_EXTRACTORS else None for ex in self.extractors]
+        stream = _Stream(states, self.rows_kept)
+        if len(history):
+            features = self.batch_features(df)[self.columns].iloc[:-1]
+            features = features.replace([np.inf, -np.inf], np.nan).dropna(how='any')
+            stream.rows.extend(features.to_numpy(dtype=np.float64)[-self.rows_kept :])
+            stream.last_date = history['date'].to_numpy()[-1]
+            stream.last_close = float(history['close'].iat[-1])
+        return stream
+
+    def _feed(self, stream: _Stream, bars: pd.DataFrame) -> tuple[_Stream, _Stream]:
+        """Push `bars` through the stream; returns (state before the last bar, state after it)."""
+        row_values = {i: ex.values(bars['date'], len(bars)) for i, ex in enumerate(self.extractors) if type(ex) in ROW_EXTRACTORS}
+        ohlcv = zip(*(bars[col].to_numpy(dtype=np.float64).tolist() for col in ('high', 'low', 'close', 'volume')))
+        dates = bars['date'].to_numpy()
+
+        before = stream
+        for j, (high, low, close, volume) in enumerate(ohlcv):
+            if j == len(bars) - 1:
+                before = stream.copy()
+            row = np.empty(len(self.columns))
+            for i, (state, cols) in enumerate(zip(stream.states, self._slices)):
+                row[cols] = state.update(high, low, close, volume) if state is not None else row_values[i][j]
+            if np.isfinite(row).all():
+                stream.rows.append(row)
+            stream.newest = row
+            stream.last_date = dates[j]
+            stream.last_close = close
+        return before, stream
@@ -0,0 +1,180 @@
+"""
+Continuous feature extraction for many tickers on a process pool.
+
+A retrain extracts features for every ticker of a sector, one pandas pass per
+extractor and ticker. extract_parallel() spreads the tickers over worker
+processes without pickling any DataFrame:
+
+* the parent writes every ticker's bars end to end into one ``bars.npy``
+  (plus ``dates.npy``) in a scratch directory; the workers map it read-only;
+* each worker rebuilds its tickers' frames from slices of that map, runs the
+  extractors and writes the rows into a shared ``features.npy`` opened with
+  ``mmap_mode='r+'`` (every ticker owns a disjoint row range);
+* market features only depend on the date, so the parent computes them for
+  all rows at once (MarketFeatureExtractor.values()) instead of shipping the
+  VIX/SPY history to every worker.
+
+Workers only report back ticker indices and errors. The extractors go out
+with each chunk of tickers, so they must be picklable, and the same pool
+(extraction_pool()) serves every call of a retrain. Its workers start from a
+fresh interpreter (forkserver or spawn), not a fork of the bot with its IB
+connection, event loop and threads.
+"""
+
+import functools
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from strategy.ai_analysis.data_preparation.online_features import ROW_EXTRACTORS
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class _ExtractionWorker:
+    def __init__(self, scratch_dir: str, symbols: list[str], offsets: np.ndarray, extractors: list, slices: list[slice]):
+        self.symbols = symbols
+        self.offsets = offsets
+        self.extractors = extractors
+        self.slices = slices
+        self.bars = np.load(os.path.join(scratch_dir, 'bars.npy'), mmap_mode='r')
+        self.dates = np.load(os.path.join(scratch_dir, 'dates.npy'), mmap_mode='r')
+        self.features = np.load(os.path.join(scratch_dir, 'features.npy'), mmap_mode='r+')
+
+    def frame(self, idx: int) -> pd.DataFrame:
+        start, stop = self.offsets[idx], self.offsets[idx + 1]
+        df = pd.DataFrame(np.array(self.bars[start:stop]), columns=FIELDS)
+        df['date'] = pd.DatetimeIndex(np.array(self.dates[start:stop]))
+        df['symbol'] = self.symbols[idx]
+        return df
+
+    def extract(self, indices: list[int]) -> list[tuple[int, str | None]]:
+        """Write the features of the tickers at `indices`; (index, error or None) for each."""
+        done = []
+        for idx in indices:
+            try:
+                df = self.frame(idx)
+                rows = self.features[self.offsets[idx] : self.offsets[idx + 1]]
+                for ex, cols in zip(self.extractors, self.slices):
+                    rows[:, cols] = ex.extract(df).to_numpy(dtype=np.float64)
+                done.append((idx, None))
+            except ValueError as e:
+                done.append((idx, str(e)))
+        self.features.flush()
+        return done
+
+
+def _extract(args: tuple, indices: list[int]) -> list[tuple[int, str | None]]:
+    # Pool task: map this call's scratch arrays (cheap) and extract one chunk
+    return _ExtractionWorker(*args).extract(indices)
+
+
+def extraction_pool(workers: int | None = None) -> ProcessPoolExecutor | None:
+    """
+    A process pool for extract_parallel() calls to share, with `workers` processes
+    (default: CPU count); None when that is 1 (extract in this process).
+    The caller shuts it down.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        return None
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+
+def _naive_dates(dates: pd.Series) -> np.ndarray:
+    # Wall-clock dates, as MarketFeatureExtractor reads them
+    index = pd.DatetimeIndex(dates)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.to_numpy(dtype='datetime64[ns]')
+
+
+def extract_parallel(
+    extractors: list,
+    frames: dict[str, pd.DataFrame],
+    workers: int | None = None,
+    scratch_dir: str | None = None,
+    pool: ProcessPoolExecutor | None = None,
+) -> dict[str, pd.DataFrame]:
+    """
+    Continuous features for every frame in `frames`, the same frames
+    FeatureBuilder.build_continuous_features() returns, extracted on `workers`
+    processes (default: CPU count). Tickers without full OHLCV bars, or whose
+    bars an extractor rejects (ValueError), are left out.
+
+    `scratch_dir` is where the shared arrays are created (default: a temporary
+    directory, removed afterwards). `pool` is an extraction_pool() to run on;
+    without one, a pool is started and shut down for this call.
+    """
+    usable = {s: df for s, df in frames.items() if df is not None and not df.empty and set(FIELDS + ['date']) <= set(df.columns)}
+    for symbol in frames.keys() - usable.keys():
+        logger.debug(f'{symbol}: bars missing for parallel feature extraction')
+    if not usable:
+        return {}
+
+    symbols = list(usable)
+    offsets = np.cumsum([0] + [len(usable[s]) for s in symbols])
+    n_rows = int(offsets[-1])
+    columns = [name for ex in extractors for name in ex.FEATURE_NAMES]
+    bounds = np.cumsum([0] + [len(ex.FEATURE_NAMES) for ex in extractors])
+    slices = [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:])]
+    pooled = [i for i, ex in enumerate(extractors) if type(ex) not in ROW_EXTRACTORS]
+    workers = min(workers or os.cpu_count() or 1, len(symbols))
+
+    root = tempfile.mkdtemp(prefix='features_', dir=scratch_dir)
+    try:
+        bars = np.lib.format.open_memmap(os.path.join(root, 'bars.npy'), mode='w+', dtype=np.float64, shape=(n_rows, len(FIELDS)))
+        dates = np.empty(n_rows, dtype='datetime64[ns]')
+        for symbol, start, stop in zip(symbols, offsets[:-1], offsets[1:]):
+            bars[start:stop] = usable[symbol][FIELDS].to_numpy(dtype=np.float64)
+            dates[start:stop] = _naive_dates(usable[symbol]['date'])
+        bars.flush()
+        del bars
+        np.save(os.path.join(root, 'dates.npy'), dates)
+        features = np.lib.format.open_memmap(os.path.join(root, 'features.npy'), mode='w+', dtype=np.float64, shape=(n_rows, len(columns)))
+        features.flush()
+        del features
+
+        args = (root, symbols, offsets, [extractors[i] for i in pooled], [slices[i] for i in pooled])
+        # A few chunks per worker, dealt out longest history first so the chunks hold about as many rows
+        order = np.argsort(-np.diff(offsets), kind='stable')
+        n_chunks = min(workers * 4, len(symbols))
+        chunks = [order[i::n_chunks].tolist() for i in range(n_chunks)]
+        if workers <= 1:
+            worker = _ExtractionWorker(*args)
+            done = [result for chunk in chunks for result in worker.extract(chunk)]
+            del worker
+        else:
+            executor = pool or extraction_pool(workers)
+            try:
+                done = [result for results in executor.map(functools.partial(_extract, args), chunks) for result in results]
+            finally:
+                if executor is not pool:
+                    executor.shutdown()
+
+        values = np.load(os.path.join(root, 'features.npy'))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    for i, ex in enumerate(extractors):
+        if type(ex) in ROW_EXTRACTORS:
+            values[:, slices[i]] = ex.values(pd.Series(dates), len(dates))
+
+    out = {}
+    for idx, error in sorted(done):
+        symbol = symbols[idx]
+        if error is not None:
+            logger.debug(f'{symbol}: {error}')
+            continue
+        out[symbol] = pd.DataFrame(values[offsets[idx] : offsets[idx + 1]], index=usable[symbol].index, columns=columns)
+    logger.info(f'Extracted features for {len(out)}/{len(frames)} tickers on {workers} worker(s)')
+    return out
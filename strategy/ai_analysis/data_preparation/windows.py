@@ -0,0 +1,75 @@
+"""
+Lazily materialized sliding windows.
+
+A model sample is `window_size` consecutive feature rows flattened into one
+vector. Stacking every window of every ticker repeats each feature row
+`window_size` times. SlidingWindows instead keeps the (rows, features) array
+once and a read-only strided ``(windows, window_size, features)`` view over
+it; indexing copies out only the windows asked for, e.g. one training batch.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+
+class SlidingWindows:
+    def __init__(self, base: np.ndarray, window_size: int, starts: np.ndarray | None = None):
+        """
+        Parameters
+        ----------
+        base        : (rows, features) array the windows are taken from.
+        window_size : rows per window.
+        starts      : first row of each window, in sample order; every start when None.
+        """
+        self.base = np.asarray(base)
+        self.window_size = window_size
+        n_windows = max(len(self.base) - window_size + 1, 0)
+        self.starts = np.arange(n_windows) if starts is None else np.asarray(starts, dtype=np.int64)
+
+        row_stride, col_stride = self.base.strides
+        self._windows = as_strided(
+            self.base,
+            shape=(n_windows, window_size, self.base.shape[1]),
+            strides=(row_stride, row_stride, col_stride),
+            writeable=False,
+        )
+
+    @classmethod
+    def concat(cls, parts: list['SlidingWindows']) -> 'SlidingWindows':
+        """One window set over several bases (e.g. tickers), in the given order."""
+        offsets = np.cumsum([0] + [len(p.base) for p in parts[:-1]])
+        return cls(
+            np.concatenate([p.base for p in parts]),
+            parts[0].window_size,
+            np.concatenate([p.starts + offset for p, offset in zip(parts, offsets)]),
+        )
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.starts), self.window_size * self.base.shape[1]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.base.dtype
+
+    @property
+    def ndim(self) -> int:
+        return 2
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, key) -> np.ndarray:
+        """Flattened windows, materialized: (window_size * features,) for an int, (n, ...) otherwise."""
+        if isinstance(key, (int, np.integer)):
+            return self._windows[self.starts[key]].reshape(self.shape[1])
+        picked = self.starts[key]
+        return self._windows[picked].reshape(len(picked), self.shape[1])
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        dense = self[:]
+        return dense if dtype is None else dense.astype(dtype, copy=False)
+
+    def take(self, indices: np.ndarray) -> 'SlidingWindows':
+        """The windows at `indices`, still lazy."""
+        return SlidingWindows(self.base, self.window_size, self.starts[indices])
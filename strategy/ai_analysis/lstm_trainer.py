@@ -14,6 +14,7 @@ Labels
 
 import copy
 import logging
+from functools import partial
 from typing import Optional, Tuple
 
 import numpy as np
@@ -23,6 +24,8 @@ import torch.optim as optim
 from torch.utils.data import DataLoader, TensorDataset
 
 from ai_modules.lstm.lstm_network import LSTMClassifier
+from strategy.ai_analysis.data_preparation.windows import SlidingWindows
+from strategy.ai_analysis.window_dataset import WindowDataset
 
 logger = logging.getLogger(__name__)
 
@@ -60,14 +63,14 @@ class LSTMTrainer:
 
         self.model: LSTMClassifier | None = None
 
-    def _reshape_to_sequence(self, flat_x: np.ndarray) -> np.ndarray:
+    def _reshape_to_sequence(self, flat_x: np.ndarray | SlidingWindows) -> np.ndarray:
         """Reshape (N, window_size * n_features) -> (N, window_size, n_features)."""
-        return flat_x.reshape(-1, self.window_size, self.n_features)
+        return np.asarray(flat_x).reshape(-1, self.window_size, self.n_features)
 
     # ---------------------------------------------------------------- train
     def train(
         self,
-        cnn_x: np.ndarray,
+        cnn_x: np.ndarray | SlidingWindows,
         labels: np.ndarray,
         val_split: float = 0.2,
     ) -> None:
@@ -75,10 +78,9 @@ class LSTMTrainer:
 
         Accepts the same flattened input as CNNTrainer and reshapes it into
         a (batch, window_size, n_features) sequence internally. Uses gradient
-        clipping (max_norm=1.0) to prevent exploding gradients.
+        clipping (max_norm=1.0) to prevent exploding gradients. SlidingWindows
+        input is materialized one batch at a time.
         """
-        seq_x = self._reshape_to_sequence(cnn_x)
-
         self.model = LSTMClassifier(
             n_features=self.n_features,
             window_size=self.window_size,
@@ -89,15 +91,20 @@ class LSTMTrainer:
             bidirectional=self.bidirectional,
         ).to(self.device)
 
-        x_tensor = torch.tensor(seq_x, dtype=torch.float32)
-        y_tensor = torch.tensor(labels, dtype=torch.long)
-
-        split = int(len(y_tensor) * (1.0 - val_split))
-        train_ds = TensorDataset(x_tensor[:split], y_tensor[:split])
-        val_ds = TensorDataset(x_tensor[split:], y_tensor[split:])
-
-        train_loader = DataLoader(train_ds, batch_size=self.batch_size, shuffle=True)
-        val_loader = DataLoader(val_ds, batch_size=self.batch_size)
+        split = int(len(labels) * (1.0 - val_split))
+        if isinstance(cnn_x, SlidingWindows):
+            to_sequence = partial(torch.reshape, shape=(-1, self.window_size, self.n_features))
+            train_ds = WindowDataset(cnn_x.take(np.arange(split)), labels[:split], to_sequence)
+            val_ds = WindowDataset(cnn_x.take(np.arange(split, len(cnn_x))), labels[split:], to_sequence)
+            train_loader = train_ds.loader(self.batch_size, shuffle=True)
+            val_loader = val_ds.loader(self.batch_size)
+        else:
+            x_tensor = torch.tensor(self._reshape_to_sequence(cnn_x), dtype=torch.float32)
+            y_tensor = torch.tensor(labels, dtype=torch.long)
+            train_ds = TensorDataset(x_tensor[:split], y_tensor[:split])
+            val_ds = TensorDataset(x_tensor[split:], y_tensor[split:])
+            train_loader = DataLoader(train_ds, batch_size=self.batch_size, shuffle=True)
+            val_loader = DataLoader(val_ds, batch_size=self.batch_size)
 
         optimizer = optim.Adam(
             self.model.parameters(),
@@ -183,7 +190,7 @@ class LSTMTrainer:
         return total_loss / max(total_samples, 1)
 
     # ------------------------------------------------------------- inference
-    def predict(self, cnn_x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    def predict(self, cnn_x: np.ndarray | SlidingWindows) -> tuple[np.ndarray, np.ndarray]:
         """
         Returns
         -------
@@ -20,7 +20,8 @@ from typing import Optional
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+
+from data_fetch.market_context import get_market_context
 
 logger = logging.getLogger(__name__)
 
@@ -57,8 +58,9 @@ class RetrainTrigger:
     def snapshot_market(self) -> None:
         """Capture current VIX and SPY levels. Call after each training run."""
         try:
-            vix = yf.Ticker('^VIX').fast_info.get('lastPrice', None)
-            spy = yf.Ticker('SPY').fast_info.get('lastPrice', None)
+            market = get_market_context()
+            vix = market.vix()
+            spy = market.spy()
             self._train_vix = float(vix) if vix else None
             self._train_spy = float(spy) if spy else None
             logger.info(f'Retrain trigger snapshot: VIX={self._train_vix}, SPY={self._train_spy}')
@@ -79,8 +81,9 @@ class RetrainTrigger:
             return False
 
         try:
-            current_vix = yf.Ticker('^VIX').fast_info.get('lastPrice', None)
-            current_spy = yf.Ticker('SPY').fast_info.get('lastPrice', None)
+            market = get_market_context()
+            current_vix = market.vix()
+            current_spy = market.spy()
 
             if current_vix is None or current_spy is None:
                 return False
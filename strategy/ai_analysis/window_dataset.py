@@ -0,0 +1,38 @@
+"""
+Torch batches from lazily materialized windows.
+
+TensorDataset needs every window as one dense tensor up front. WindowDataset
+keeps the SlidingWindows and copies out a batch's windows only when the
+DataLoader asks for that batch.
+"""
+
+from collections.abc import Callable
+
+import numpy as np
+import torch
+from torch.utils.data import BatchSampler, DataLoader, Dataset, RandomSampler, SequentialSampler
+
+from strategy.ai_analysis.data_preparation.windows import SlidingWindows
+
+
+class WindowDataset(Dataset):
+    def __init__(self, windows: SlidingWindows, labels: np.ndarray, transform: Callable[[torch.Tensor], torch.Tensor] | None = None):
+        """`transform` reshapes a (batch, window_size * n_features) tensor into the model's input."""
+        self.windows = windows
+        self.labels = np.asarray(labels)
+        self.transform = transform
+
+    def __len__(self) -> int:
+        return len(self.windows)
+
+    def __getitem__(self, indices: list[int]) -> tuple[torch.Tensor, torch.Tensor]:
+        """One batch: the windows and labels at `indices`."""
+        x = torch.from_numpy(self.windows[np.asarray(indices)].astype(np.float32, copy=False))
+        if self.transform is not None:
+            x = self.transform(x)
+        return x, torch.from_numpy(self.labels[indices].astype(np.int64, copy=False))
+
+    def loader(self, batch_size: int, shuffle: bool = False) -> DataLoader:
+        sampler = RandomSampler(self) if shuffle else SequentialSampler(self)
+        # batch_size=None: the sampler yields whole batches of indices, fetched in one __getitem__
+        return DataLoader(self, batch_size=None, sampler=BatchSampler(sampler, batch_size, drop_last=False))
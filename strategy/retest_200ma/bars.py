@@ -0,0 +1,34 @@
+"""
+Read-only bar views for the 200MA strategy.
+
+The strategy classes only read a handful of columns, so rather than copying
+DataFrames around they share one dict of NumPy views per ticker:
+``open/high/low/close/volume`` (float arrays), ``date`` (array of
+Timestamps), ``symbol`` (str) and, once computed, ``ma200``.
+"""
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def bar_view(df: pd.DataFrame | dict, start: int = 0) -> dict:
+    """Zero-copy views of `df` from row `start` on; a dict that already is a view is returned as is."""
+    if isinstance(df, dict):
+        return df
+
+    bars = {name: df[name].to_numpy()[start:] for name in PRICE_COLUMNS + ['ma200'] if name in df}
+    bars['date'] = df['date'].array[start:]
+    bars['symbol'] = df['symbol'].iat[0] if 'symbol' in df and len(df) else ''
+    return bars
+
+
+def rolling_mean_tail(values: np.ndarray, period: int, n: int) -> np.ndarray:
+    """The last `n` values of ``rolling(period).mean()``, computed from the last period + n - 1 values only."""
+    out = np.full(n, np.nan)
+    values = np.asarray(values, dtype=np.float64)[-(period + n - 1) :]
+    if len(values) >= period:
+        ma = np.lib.stride_tricks.sliding_window_view(values, period).mean(axis=-1)
+        out[n - len(ma) :] = ma
+    return out
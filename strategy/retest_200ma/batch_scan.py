@@ -0,0 +1,371 @@
+"""
+Universe-wide 200MA breakout/retest scan.
+
+TrendIndicator checks one ticker per call. BatchPatternScanner takes the whole
+universe as aligned ``(ticker, day)`` arrays and runs the same rules for every
+ticker at once:
+
+1. each row is compacted to its last ``ma_period + 29`` bars (gaps and
+   leading NaNs from a shared calendar are skipped);
+2. the 200 MA of the last 30 bars comes from one sliding-window mean, or
+   from the incremental IndicatorStateStore when the scanner has one;
+3. pattern_engine.detect evaluates LONG for every row, then SHORT for the
+   rows without a LONG hit (TrendIndicator's precedence).
+
+The VIX used by the stop loss is fetched once per scan, and only when some
+row reaches the stop-loss step. The result is a compact table with one row
+per hit. `signals()` turns it back into the dicts TrendDetector returns.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from data_fetch.price_panel import PricePanel
+from execution.risk_manager import RiskManager
+from strategy.retest_200ma import pattern_engine
+from strategy.retest_200ma.indicator_state import IndicatorStateStore
+
+logger = logging.getLogger()
+
+# Bars TrendIndicator hands to the detector
+PATTERN_DAYS = 30
+
+HIT_COLUMNS = [
+    'symbol',
+    'type',
+    'entry',
+    'stop',
+    'target',
+    'risk',
+    'breakout_date',
+    'retest_date',
+    'current_date',
+    'volume_ratio',
+    'retest_volume_ratio',
+    'avg_volume',
+    'bounce_strength',
+    'breakout_strength',
+    'ma_slope',
+]
+
+
+class BatchPatternScanner:
+    def __init__(self, config, params, vix: float | None = None, ma_state: IndicatorStateStore | None = None):
+        """
+        Parameters
+        ----------
+        vix      : VIX level for the stop loss; fetched lazily (once per scan) when None.
+        ma_state : incremental MA state; scan_frames then updates it instead of
+                   recomputing the MA from each ticker's full window.
+        """
+        self.config = config
+        self.params = params
+        self.vix = vix
+        self.ma_state = ma_state
+
+    @property
+    def window(self) -> int:
+        """Bars per ticker needed for a fully defined MA over the last PATTERN_DAYS days."""
+        return self.params['strategy_retest_200ma']['ma_period'] + PATTERN_DAYS - 1
+
+    def scan(
+        self,
+        symbols: list[str],
+        dates: np.ndarray,
+        close: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        volume: np.ndarray,
+    ) -> pd.DataFrame:
+        """
+        Scan aligned (ticker, day) arrays on one shared calendar.
+
+        `dates` is the (days,) calendar; NaN closes mark days a ticker has no bar.
+        """
+        close = np.asarray(close, dtype=np.float64)
+        valid = ~np.isnan(close)
+        window = self.window
+
+        # Column of each row's last `window` valid bars, right-aligned
+        rank_from_end = valid[:, ::-1].cumsum(axis=1)[:, ::-1]
+        keep = valid & (rank_from_end <= window)
+        rows, cols = np.nonzero(keep)
+        column_map = np.zeros((len(close), window), dtype=np.int64)
+        column_map[rows, window - rank_from_end[rows, cols]] = cols
+        eligible = valid.sum(axis=1) >= window
+
+        take = np.take_along_axis
+        bars = {
+            'close': take(close, column_map, axis=1),
+            'high': take(np.asarray(high, dtype=np.float64), column_map, axis=1),
+            'low': take(np.asarray(low, dtype=np.float64), column_map, axis=1),
+            'volume': take(np.asarray(volume, dtype=np.float64), column_map, axis=1),
+        }
+        table = self._scan_window(symbols, np.asarray(dates)[column_map[:, -PATTERN_DAYS:]], bars, eligible)
+        logger.info(f'Batch 200MA scan: {len(table)} hits across {len(symbols)} tickers ({int(eligible.sum())} with enough history)')
+        return table
+
+    def scan_panel(self, panel: PricePanel, symbols: list[str] | None = None) -> pd.DataFrame:
+        """Scan the memory-mapped panel (all of its tickers unless `symbols` is given)."""
+        recent = slice(max(len(panel.dates) - self.window * 2, 0), None)
+        if symbols is None:
+            rows = slice(None)
+            symbols = panel.symbols
+        else:
+            symbols = [s for s in symbols if panel.has(s)]
+            index = {s: i for i, s in enumerate(panel.symbols)}
+            rows = [index[s] for s in symbols]
+
+        # Reading only the trailing columns keeps the scan to a few pages per ticker
+        fields = {f: panel.field(f)[rows, recent] for f in PricePanel.FIELDS}
+        dates = pd.DatetimeIndex(panel.dates[recent])
+        if panel.tz:
+            dates = dates.tz_localize(panel.tz)
+        return self.scan(symbols, dates.to_numpy(), fields['close'], fields['high'], fields['low'], fields['volume'])
+
+    def scan_frames(self, frames: dict[str, pd.DataFrame | None]) -> pd.DataFrame:
+        """Scan per-ticker frames in the StockDataFetcher schema (each ticker on its own calendar)."""
+        window = self.window
+        # With MA state only the pattern days are read; the MA comes from the state
+        width = PATTERN_DAYS if self.ma_state is not None else window
+        symbols = list(frames)
+        bars = {field: np.full((len(symbols), width), np.nan) for field in ('close', 'high', 'low', 'volume')}
+        dates = np.empty((len(symbols), PATTERN_DAYS), dtype=object)
+        eligible = np.zeros(len(symbols), dtype=bool)
+        ma = np.full((len(symbols), PATTERN_DAYS), np.nan) if self.ma_state is not None else None
+
+        for row, symbol in enumerate(symbols):
+            df = frames[symbol]
+            if df is None or len(df) < window:
+                continue
+            tail = df.iloc[-width:]
+            for field, array in bars.items():
+                array[row] = tail[field].to_numpy(dtype=np.float64)
+            dates[row] = tail['date'].iloc[-PATTERN_DAYS:].to_numpy(dtype=object)
+            eligible[row] = True
+            if ma is not None:
+                ma[row] = self.ma_state.sync(symbol, df)
+
+        table = self._scan_window(symbols, dates, bars, eligible, ma)
+        logger.info(f'Batch 200MA scan: {len(table)} hits across {len(symbols)} tickers ({int(eligible.sum())} with enough history)')
+        return table
+
+    def walk_through(self, df: pd.DataFrame, vix: float | pd.Series | None = None) -> pd.DataFrame:
+        """
+        Evaluate the detector as of every bar of one ticker (StockDataFetcher schema) in one pass.
+
+        Row t of the result is what TrendIndicator(df.iloc[:t + 1]) would have returned, so the
+        table has at most one hit per day (`current_date`). Each day is a row of the same
+        (row, PATTERN_DAYS) arrays the universe scan uses: the 30-bar windows are strided views
+        of the ticker's columns and the 200 MA is computed once for the whole history.
+
+        `vix` is one level for every day, or a VIX close series (tz-naive date index, e.g.
+        ``MarketContext.history()['vix_close']``) read as of each day. When None the scanner's
+        VIX is used, as in the live scan.
+        """
+        prepared = self.prepare_walk(df, vix)
+        if prepared is None:
+            return pd.DataFrame(columns=HIT_COLUMNS)
+        return self.walk_prepared(prepared)
+
+    def prepare_walk(self, df: pd.DataFrame, vix: float | pd.Series | None = None) -> dict | None:
+        """
+        The per-day arrays walk_through runs on (None when `df` is too short).
+
+        Only `ma_period` shapes them, so callers evaluating many parameter sets keep
+        them and call walk_prepared() once per set.
+        """
+        period = self.params['strategy_retest_200ma']['ma_period']
+        days = len(df) - self.window + 1
+        if days <= 0:
+            return None
+
+        # Day t (from bar window - 1 on) sees bars t - 29 .. t; MA value k belongs to bar k + period - 1
+        first = self.window - PATTERN_DAYS
+        bars = {
+            field: sliding_window_view(df[field].to_numpy(dtype=np.float64)[first:], PATTERN_DAYS) for field in ('close', 'high', 'low', 'volume')
+        }
+        ma = sliding_window_view(sliding_window_view(df['close'].to_numpy(dtype=np.float64), period).mean(axis=-1), PATTERN_DAYS)
+        dates = sliding_window_view(df['date'].to_numpy(dtype=object)[first:], PATTERN_DAYS)
+        symbol = str(df['symbol'].iloc[0]) if 'symbol' in df.columns else ''
+
+        day_vix = None
+        if isinstance(vix, pd.Series):
+            history = vix.dropna().sort_index()
+            as_of = pd.DatetimeIndex(pd.to_datetime(dates[:, -1])).tz_localize(None)
+            idx = history.index.searchsorted(as_of, side='right') - 1
+            day_vix = np.where(idx >= 0, history.to_numpy(dtype=np.float64)[np.maximum(idx, 0)], 20.0)
+        elif vix is not None:
+            day_vix = np.full(days, float(vix))
+
+        return {'symbols': np.full(days, symbol, dtype=object), 'dates': dates, 'bars': bars, 'ma': ma, 'vix': day_vix}
+
+    @staticmethod
+    def narrow_walk(prepared: dict) -> dict:
+        """Keep only the days of prepare_walk() arrays on which some parameter set could find the pattern."""
+        close, ma = prepared['bars']['close'], prepared['ma']
+        keep = np.flatnonzero(pattern_engine.can_match('LONG', ma, close) | pattern_engine.can_match('SHORT', ma, close))
+        return {
+            'symbols': prepared['symbols'][keep],
+            'dates': prepared['dates'][keep],
+            'bars': {field: array[keep] for field, array in prepared['bars'].items()},
+            'ma': ma[keep],
+            'vix': prepared['vix'][keep] if prepared['vix'] is not None else None,
+        }
+
+    @staticmethod
+    def concat_walks(walks: list[dict]) -> dict:
+        """Stack several tickers' prepare_walk() arrays so one walk_prepared() call covers all of them."""
+        return {
+            'symbols': np.concatenate([w['symbols'] for w in walks]),
+            'dates': np.concatenate([w['dates'] for w in walks]),
+            'bars': {field: np.concatenate([w['bars'][field] for w in walks]) for field in walks[0]['bars']},
+            'ma': np.concatenate([w['ma'] for w in walks]),
+            'vix': np.concatenate([w['vix'] for w in walks]) if walks[0]['vix'] is not None else None,
+        }
+
+    def walk_prepared(self, prepared: dict) -> pd.DataFrame:
+        """walk_through() on arrays from prepare_walk() (built with the same `ma_period`)."""
+        days = len(prepared['dates'])
+        table = self._scan_window(
+            prepared['symbols'], prepared['dates'], prepared['bars'], np.ones(days, dtype=bool), prepared['ma'], prepared['vix']
+        )
+        table = table.sort_values(['symbol', 'current_date'], kind='stable', ignore_index=True)
+        logger.debug(f'200MA walk-through: {len(table)} signal days out of {days}')
+        return table
+
+    def _scan_window(
+        self,
+        symbols: list[str] | np.ndarray,
+        dates: np.ndarray,
+        bars: dict[str, np.ndarray],
+        eligible: np.ndarray,
+        ma: np.ndarray | None = None,
+        vix: np.ndarray | None = None,
+    ) -> pd.DataFrame:
+        """
+        Run both sides over right-aligned (row, window) bars; `dates` covers the last PATTERN_DAYS columns.
+
+        `ma` is the (row, PATTERN_DAYS) MA when it is already known, otherwise it's computed from the bars.
+        `vix` gives each row its own VIX level instead of the scanner's.
+        """
+        params = self.params['strategy_retest_200ma']
+        if ma is None:
+            ma = sliding_window_view(bars['close'], params['ma_period'], axis=1).mean(axis=-1)
+        eligible = eligible & ~np.isnan(ma).any(axis=1)
+        rows = np.flatnonzero(eligible)
+
+        recent = {field: array[rows, -PATTERN_DAYS:] for field, array in bars.items()}
+        ma = ma[rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            range_pct = (recent['high'][:, -1] - recent['low'][:, -1]) / recent['close'][:, -1]
+
+        def stop_loss_fn(subset: np.ndarray):
+            def fn(candidates: np.ndarray) -> np.ndarray:
+                risk_manager = RiskManager(self.params)
+                if vix is not None:
+                    multiplier = np.array([risk_manager.stop_loss_multiplier(v) for v in vix[rows[subset[candidates]]]])
+                    return range_pct[subset[candidates]] * multiplier
+                if self.vix is None:
+                    self.vix = risk_manager.get_vix()
+                return range_pct[subset[candidates]] * risk_manager.stop_loss_multiplier(self.vix)
+
+            return fn
+
+        hits = []
+        remaining = np.arange(len(rows))
+        for side in ('LONG', 'SHORT'):
+            if remaining.size == 0:
+                break
+            found = pattern_engine.detect(
+                side,
+                ma[remaining],
+                recent['close'][remaining],
+                recent['high'][remaining],
+                recent['low'][remaining],
+                recent['volume'][remaining],
+                params,
+                stop_loss_fn(remaining),
+            )
+            hit = found['found']
+            if not hit.any():
+                continue
+            hits.append(
+                self._hit_table(side, [symbols[r] for r in rows[remaining[hit]]], dates[rows[remaining[hit]]], recent, remaining[hit], ma, found, hit)
+            )
+            remaining = remaining[~hit]
+
+        return pd.concat(hits, ignore_index=True) if hits else pd.DataFrame(columns=HIT_COLUMNS)
+
+    def _hit_table(
+        self,
+        side: str,
+        symbols: list[str],
+        dates: np.ndarray,
+        recent: dict[str, np.ndarray],
+        rows: np.ndarray,
+        ma: np.ndarray,
+        found: dict[str, np.ndarray],
+        hit: np.ndarray,
+    ) -> pd.DataFrame:
+        params = self.params['strategy_retest_200ma']
+        entry = recent['close'][rows, -1]
+        risk = found['risk'][hit]
+        target = entry + risk * params['risk_reward_ratio'] if side == 'LONG' else entry - risk * params['risk_reward_ratio']
+        ma_slope = pattern_engine.ma_slope(ma[rows], params['ma_slope_period'])[:, -1]
+        picks = np.arange(len(rows))
+
+        return pd.DataFrame(
+            {
+                'symbol': symbols,
+                'type': side,
+                'entry': entry,
+                'stop': found['stop'][hit],
+                'target': target,
+                'risk': risk,
+                'breakout_date': dates[picks, found['breakout_idx'][hit]],
+                'retest_date': dates[picks, found['retest_idx'][hit]],
+                'current_date': dates[:, -1],
+                'volume_ratio': found['volume_ratio'][hit],
+                'retest_volume_ratio': found['retest_volume_ratio'][hit],
+                'avg_volume': found['avg_volume'][hit],
+                'bounce_strength': found['bounce_strength'][hit],
+                'breakout_strength': found['breakout_strength'][hit],
+                'ma_slope': ma_slope,
+            },
+            columns=HIT_COLUMNS,
+        )
+
+    def signals(self, hits: pd.DataFrame) -> dict[str, dict]:
+        """Hit table -> {symbol: signal dict} in the format TrendDetector returns."""
+        params = self.params['strategy_retest_200ma']
+        out = {}
+        for hit in hits.itertuples(index=False):
+            long = hit.type == 'LONG'
+            entry, stop, target = np.float64(hit.entry), np.float64(hit.stop), np.float64(hit.target)
+            digits = 4 if entry < 1 else 2
+            signal = {
+                'strategy_type': '200ma_retest',
+                'type': hit.type,
+                'symbol': hit.symbol,
+                'entry': round(entry, digits),
+                'stop': round(stop, digits),
+                'target': round(target, digits),
+                'risk': hit.risk,
+                'reward': hit.risk * params['risk_reward_ratio'],
+                'breakout_date': hit.breakout_date,
+                'retest_date': hit.retest_date,
+                'current_date': hit.current_date,
+            }
+            signal['breakout_volume_ratio' if long else 'breakdown_volume_ratio'] = hit.volume_ratio
+            signal['retest_volume_ratio'] = hit.retest_volume_ratio
+            signal['avg_volume'] = hit.avg_volume
+            signal['bounce_strength'] = hit.bounce_strength
+            signal['breakout_strength' if long else 'breakdown_strength'] = hit.breakout_strength
+            signal['ma_slope'] = hit.ma_slope
+            signal['ma_slope_pct'] = hit.ma_slope * 100  # For easier reading
+            out[hit.symbol] = signal
+        return out
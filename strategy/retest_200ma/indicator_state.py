@@ -0,0 +1,216 @@
+"""
+Incremental 200 MA state per ticker.
+
+Recomputing ``rolling(200).mean()`` over the full history on every scan is
+wasted work when only today's bar changed. MovingAverageState keeps the last
+`period` closes in a ring buffer with their running sum, plus a ring of the
+most recent MA values (enough for the 30-day pattern window and its 20-day
+slope), so a new bar or a revised last bar costs O(1).
+
+IndicatorStateStore holds one state per ticker, keeps it in sync with the
+frames a scan sees, and persists everything to ``data/indicator_state.npz``
+so a restarted bot doesn't have to rebuild it.
+"""
+
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger()
+
+# MA values kept per ticker: the pattern window TrendIndicator looks at
+MA_HISTORY = 30
+
+# Most new bars synced one by one before a full rebuild is cheaper
+MAX_CATCH_UP = 10
+
+
+class MovingAverageState:
+    def __init__(self, period: int = 200, history: int = MA_HISTORY):
+        self.period = period
+        self.history = history
+        self._closes = np.full(period, np.nan)
+        self._pos = 0  # next write slot in _closes
+        self._count = 0
+        self._total = 0.0
+        self._ma = np.full(history, np.nan)
+        self._ma_pos = 0
+        self._updates = 0
+        self.last_date: pd.Timestamp | None = None
+
+    @classmethod
+    def from_closes(cls, closes: np.ndarray, last_date: pd.Timestamp | None, period: int = 200, history: int = MA_HISTORY) -> 'MovingAverageState':
+        """Build the state from a close history (oldest first) in one vectorized pass."""
+        state = cls(period, history)
+        closes = np.asarray(closes, dtype=np.float64)[-(period + history - 1) :]
+        recent = closes[-period:]
+        state._closes[: len(recent)] = recent
+        state._count = len(recent)
+        state._pos = len(recent) % period
+        state._total = recent.sum()
+        if len(closes) >= period:
+            ma = sliding_window_view(closes, period).mean(axis=-1)
+            state._ma[: len(ma)] = ma
+            state._ma_pos = len(ma) % history
+        state.last_date = last_date
+        return state
+
+    @property
+    def last_close(self) -> float:
+        return self._closes[(self._pos - 1) % self.period] if self._count else np.nan
+
+    @property
+    def previous_close(self) -> float:
+        return self._closes[(self._pos - 2) % self.period] if self._count > 1 else np.nan
+
+    def _current_ma(self) -> float:
+        return self._total / self.period if self._count >= self.period else np.nan
+
+    def _resum(self) -> None:
+        # Re-anchor the running sum once per `period` updates so float error can't accumulate
+        self._updates += 1
+        if self._updates >= self.period:
+            self._total = np.nansum(self._closes)
+            self._updates = 0
+
+    def push(self, date: pd.Timestamp, close: float) -> None:
+        """Append a new bar."""
+        if self._count == self.period:
+            self._total -= self._closes[self._pos]
+        else:
+            self._count += 1
+        self._closes[self._pos] = close
+        self._total += close
+        self._pos = (self._pos + 1) % self.period
+        self._resum()
+
+        self._ma[self._ma_pos] = self._current_ma()
+        self._ma_pos = (self._ma_pos + 1) % self.history
+        self.last_date = date
+
+    def revise(self, close: float) -> None:
+        """Replace the close of the last bar (e.g. today's bar updated intraday)."""
+        last = (self._pos - 1) % self.period
+        self._total += close - self._closes[last]
+        self._closes[last] = close
+        self._resum()
+        self._ma[(self._ma_pos - 1) % self.history] = self._current_ma()
+
+    def ma_tail(self) -> np.ndarray:
+        """The last `history` MA values, oldest first (NaN where not enough bars yet)."""
+        return np.roll(self._ma, -self._ma_pos)
+
+    def closes(self) -> np.ndarray:
+        """The last `period` closes, oldest first."""
+        if self._count < self.period:
+            return self._closes[: self._count].copy()
+        return np.roll(self._closes, -self._pos)
+
+    def slope(self, slope_period: int) -> float:
+        """MA change over `slope_period` bars as a fraction (0 without enough MA history)."""
+        ma = self.ma_tail()
+        if slope_period >= self.history or np.isnan(ma[-1 - slope_period]) or ma[-1 - slope_period] == 0:
+            return 0.0
+        return (ma[-1] - ma[-1 - slope_period]) / ma[-1 - slope_period]
+
+
+class IndicatorStateStore:
+    def __init__(self, file_path: str | None = None, period: int = 200, history: int = MA_HISTORY):
+        self.file_path = file_path or os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'indicator_state.npz')
+        self.period = period
+        self.history = history
+        self._states: dict[str, MovingAverageState] = self._load()
+        self.rebuilds = 0
+
+    @classmethod
+    def from_config(cls, config, params) -> 'IndicatorStateStore | None':
+        state_config = config.get('data', {}).get('indicator_state', {})
+        if not state_config.get('enabled', False):
+            return None
+        return cls(state_config.get('path'), params['strategy_retest_200ma']['ma_period'])
+
+    def _load(self) -> dict[str, MovingAverageState]:
+        if not os.path.exists(self.file_path):
+            return {}
+        try:
+            with np.load(self.file_path, allow_pickle=False) as data:
+                if int(data['period']) != self.period or data['ma'].shape[1] != self.history:
+                    logger.info('Indicator state was saved with different settings, rebuilding it')
+                    return {}
+                states = {}
+                for symbol, closes, count, ma, last_date in zip(data['symbols'], data['closes'], data['counts'], data['ma'], data['last_dates']):
+                    state = MovingAverageState(self.period, self.history)
+                    state._closes[:count] = closes[:count]
+                    state._count = int(count)
+                    state._pos = int(count) % self.period
+                    state._total = closes[:count].sum()
+                    state._ma[:] = ma
+                    state.last_date = pd.Timestamp(str(last_date))
+                    states[str(symbol)] = state
+                return states
+        except Exception as e:
+            logger.warning(f'Failed to read indicator state, starting fresh: {e}')
+            return {}
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        symbols = [s for s, state in self._states.items() if state.last_date is not None]
+        closes = np.full((len(symbols), self.period), np.nan)
+        counts = np.zeros(len(symbols), dtype=np.int64)
+        for row, symbol in enumerate(symbols):
+            recent = self._states[symbol].closes()
+            closes[row, : len(recent)] = recent
+            counts[row] = len(recent)
+        tmp_path = f'{self.file_path}.tmp.npz'
+        np.savez(
+            tmp_path,
+            period=np.int64(self.period),
+            symbols=np.array(symbols, dtype=str),
+            closes=closes,
+            counts=counts,
+            ma=np.array([self._states[s].ma_tail() for s in symbols]).reshape(len(symbols), self.history),
+            last_dates=np.array([self._states[s].last_date.isoformat() for s in symbols], dtype=str),
+        )
+        os.replace(tmp_path, self.file_path)
+
+    def get(self, symbol: str) -> MovingAverageState | None:
+        return self._states.get(symbol)
+
+    def sync(self, symbol: str, df: pd.DataFrame) -> np.ndarray:
+        """
+        Bring `symbol`'s state up to the last bar of `df` and return its MA tail.
+
+        New bars are pushed and a changed last bar is revised in place. A
+        history that no longer matches (split/dividend adjustment, gap, first
+        sight of the ticker) rebuilds the state from `df`.
+        """
+        state = self._states.get(symbol)
+        if state is None or not self._catch_up(state, df):
+            self.rebuilds += 1
+            state = self._states[symbol] = MovingAverageState.from_closes(df['close'].to_numpy(), df['date'].iat[-1], self.period, self.history)
+        return state.ma_tail()
+
+    def _catch_up(self, state: MovingAverageState, df: pd.DataFrame) -> bool:
+        dates = df['date']
+        closes = df['close'].to_numpy()
+        n = len(df)
+
+        # Find the state's last bar among the newest few rows of df
+        for k in range(n - 1, max(n - 2 - MAX_CATCH_UP, -1), -1):
+            if dates.iat[k] == state.last_date:
+                break
+        else:
+            return False
+
+        # The bar before it is final on both sides; a mismatch means the history was adjusted
+        if k < 1 or not np.isclose(closes[k - 1], state.previous_close, rtol=1e-9, atol=0.0):
+            return False
+
+        if closes[k] != state.last_close:
+            state.revise(closes[k])
+        for row in range(k + 1, n):
+            state.push(dates.iat[row], closes[row])
+        return True
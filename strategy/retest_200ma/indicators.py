@@ -8,6 +8,7 @@ from typing import Dict, Optional
 import numpy as np
 import pandas as pd
 
+from strategy.retest_200ma.bars import bar_view
 from strategy.retest_200ma.trend_detector import TrendDetector
 from strategy.retest_200ma.validators import TrendValidator
 
@@ -17,26 +18,27 @@ logger = logging.getLogger()
 
 class TrendIndicator:
     def __init__(self, df: pd.DataFrame, config, params):
-        self.df = df.copy()
+        self.df = df  # read only, never modified
         self.config = config
         self.params = params
+        self.trend_validator = TrendValidator(df, config, params)
+        self.trend_detector = TrendDetector(df, config, params)
 
     def detect_breakout_and_retest(self) -> dict | None:
         """
         Detect breakout and retest pattern
         Returns: Dict with signal info or None
         """
-        if len(self.df) < self.params['strategy_retest_200ma']['ma_period'] + 20:
+        ma_period = self.params['strategy_retest_200ma']['ma_period']
+        if len(self.df) < ma_period + 20:
             return None
 
-        # Calculate 200 MA
-        trend_validator = TrendValidator(self.df, self.config, self.params)
-        self.df['ma200'] = trend_validator.calculate_ma(self.params['strategy_retest_200ma']['ma_period'])
+        # 200 MA for the last 30 days only, computed once and shared with the detector
+        recent_data = bar_view(self.df, len(self.df) - 30)
+        recent_data['ma200'] = self.trend_validator.calculate_ma_tail(ma_period, len(recent_data['close']))
 
         # Need at least 20 days after MA is calculated
-        recent_data = self.df.tail(30).copy()
-
-        if recent_data['ma200'].isna().any():
+        if np.isnan(recent_data['ma200']).any():
             return None
 
         # Look for breakout and retest pattern
@@ -44,7 +46,7 @@ class TrendIndicator:
 
         return signal
 
-    def analyze_pattern(self, df: pd.DataFrame) -> dict | None:
+    def analyze_pattern(self, df: pd.DataFrame | dict) -> dict | None:
         """
         Analyze for breakout and retest pattern
         Pattern:
@@ -52,16 +54,15 @@ class TrendIndicator:
         2. Price comes back to test 200 MA (retest)
         3. Price bounces off 200 MA in breakout direction
         """
-        DF = df.reset_index(drop=True)
+        bars = bar_view(df)
 
         # LONG SETUP: Breakout above, retest, bounce up
-        trend_detector = TrendDetector(self.df, self.config, self.params)
-        long_signal = trend_detector.detect_long_pattern(DF)
+        long_signal = self.trend_detector.detect_long_pattern(bars)
         if long_signal:
             return long_signal
 
         # SHORT SETUP: Breakout below, retest, bounce down
-        short_signal = trend_detector.detect_short_pattern(DF)
+        short_signal = self.trend_detector.detect_short_pattern(bars)
         if short_signal:
             return short_signal
 
@@ -0,0 +1,328 @@
+"""
+Parameter sweep for the 200MA breakout/retest strategy.
+
+Evaluates many ``strategy_retest_200ma`` parameter sets over the history of the
+whole universe and writes a ranked table to ``results/``:
+
+* every parameter set is run through BatchPatternScanner.walk_through for each
+  ticker, i.e. the signals the live scan would have produced on every past day;
+* each signal is followed for `horizon_days` bars: reaching the target first
+  scores ``+risk_reward_ratio`` R, the stop (or both on the same bar) ``-1`` R,
+  neither is marked to market at the horizon close;
+* the sets are ranked by expectancy (mean R per trade), sets with fewer than
+  `min_trades` trades last.
+
+Parameter sets are spread over a process pool. What doesn't depend on the
+swept values is built once, before the pool starts: for each `ma_period`, one
+stacked block of the 30-day windows and MA of the days on which any parameter
+set could fire (pattern_engine.can_match), written to a scratch directory.
+Workers map those blocks and the read-only PricePanel fields (one copy of each
+in the page cache), so a parameter set costs one vectorized detector pass over
+the block and a lookup of the followed bars in the panel.
+
+    python -m strategy.retest_200ma.param_sweep
+"""
+
+import itertools
+import json
+import logging
+import os
+import random
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from data_fetch.market_context import get_market_context
+from data_fetch.price_panel import PricePanel
+from strategy.retest_200ma.batch_scan import BatchPatternScanner
+
+logger = logging.getLogger()
+
+DEFAULT_SPACE = {
+    'min_breakout_volume': [1.3, 1.5, 1.7, 2.0, 2.5],
+    'retest_distance': [0.003, 0.005, 0.0075, 0.01],
+    'max_retest_volume_ratio': [0.4, 0.5, 0.7, 0.9],
+    'ATR': [1.0, 1.5, 2.0, 2.5],
+}
+
+METRIC_COLUMNS = ['trades', 'wins', 'losses', 'open', 'win_rate', 'expectancy_r', 'total_r', 'profit_factor']
+
+
+def grid(space: dict[str, list]) -> list[dict]:
+    """Every combination of the values in `space`."""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_configs(space: dict[str, list], n: int, seed: int = 0) -> list[dict]:
+    """Up to `n` distinct combinations drawn at random from `space`."""
+    rng = random.Random(seed)
+    total = int(np.prod([len(values) for values in space.values()]))
+    configs: dict[tuple, dict] = {}
+    while len(configs) < min(n, total):
+        config = {name: rng.choice(values) for name, values in space.items()}
+        configs.setdefault(tuple(config.values()), config)
+    return list(configs.values())
+
+
+def score_signals(
+    hits: pd.DataFrame, positions: np.ndarray, ends: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, horizon: int, rr: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    R multiple and outcome (1 target, -1 stop, 0 open at the horizon) of each hit.
+
+    Each hit is followed for `horizon` bars after its signal bar. `positions` are the
+    signal bars' indices in `high` / `low` / `close` and `ends` the index of the last
+    bar of the hit's ticker. Only the followed bars are read, so the arrays can be
+    (flattened) panel mmaps; NaN bars (days the ticker has no bar) neither stop nor
+    reach the target, and the mark is the last close on or before the horizon. Hits
+    on their ticker's last bar have nothing to follow and score NaN.
+    """
+    steps = positions[:, None] + np.arange(1, horizon + 1)[None, :]
+    beyond = steps > ends[:, None]
+    steps = np.minimum(steps, ends[:, None])
+    forward_high = np.where(beyond, np.nan, high[steps].astype(np.float64))
+    forward_low = np.where(beyond, np.nan, low[steps].astype(np.float64))
+    forward_close = np.where(beyond, np.nan, close[steps].astype(np.float64))
+
+    long = (hits['type'] == 'LONG').to_numpy()
+    entry = hits['entry'].to_numpy(dtype=np.float64)
+    stop = hits['stop'].to_numpy(dtype=np.float64)
+    target = hits['target'].to_numpy(dtype=np.float64)
+    risk = np.abs(entry - stop)
+
+    stopped = np.where(long[:, None], forward_low <= stop[:, None], forward_high >= stop[:, None])
+    reached = np.where(long[:, None], forward_high >= target[:, None], forward_low <= target[:, None])
+    first_stop = np.where(stopped.any(axis=1), stopped.argmax(axis=1), horizon)
+    first_target = np.where(reached.any(axis=1), reached.argmax(axis=1), horizon)
+
+    closed = ~np.isnan(forward_close)
+    last = horizon - 1 - closed[:, ::-1].argmax(axis=1)
+    mark = np.where(closed.any(axis=1), forward_close[np.arange(len(hits)), last], entry)
+    marked = np.where(long, mark - entry, entry - mark) / risk
+    outcome = np.where(first_stop <= first_target, -1, 1)
+    outcome[(first_stop == horizon) & (first_target == horizon)] = 0
+    r = np.select([outcome == 1, outcome == -1], [rr, -1.0], marked)
+    return np.where(positions < ends, r, np.nan), outcome
+
+
+BLOCK_ARRAYS = ['symbols', 'dates', 'close', 'high', 'low', 'volume', 'ma', 'vix']
+
+
+def write_blocks(config, params, panel: PricePanel, symbols: list[str], vix: float | pd.Series, periods: set[int], scratch: str) -> None:
+    """
+    Write the candidate-day block of every `ma_period` in `periods` under `scratch`, for _SweepWorker to map.
+
+    A block is the narrowed, stacked prepare_walk() arrays of all tickers, with the
+    symbol stored as the ticker's panel row and each window day as its panel column,
+    so a hit's flat index in the panel fields is ``row * days + column``.
+    """
+    rows = {s: i for i, s in enumerate(panel.symbols)}
+    frames = {s: df for s in symbols if (df := panel.frame(s)) is not None and not df.empty}
+    for period in periods:
+        scanner = BatchPatternScanner(config, {**params, 'strategy_retest_200ma': {**params['strategy_retest_200ma'], 'ma_period': period}})
+        walks = []
+        for symbol, df in frames.items():
+            walk = scanner.prepare_walk(df, vix)
+            # Most days can't fire under any parameters; drop them once for all sets
+            if walk is not None:
+                walk = scanner.narrow_walk(walk)
+                walk['symbols'] = np.full(len(walk['symbols']), rows[symbol], dtype=np.int64)
+                dates = pd.DatetimeIndex(walk['dates'].ravel())
+                if dates.tz is not None:
+                    dates = dates.tz_localize(None)
+                walk['dates'] = np.searchsorted(panel.dates, dates.values).reshape(walk['dates'].shape)
+                walks.append(walk)
+        if not walks:
+            continue
+
+        block = scanner.concat_walks(walks)
+        directory = os.path.join(scratch, f'ma{period}')
+        os.makedirs(directory)
+        arrays = {'symbols': block['symbols'], 'dates': block['dates'], **block['bars'], 'ma': block['ma'], 'vix': block['vix']}
+        for name, array in arrays.items():
+            if array is not None:
+                np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(array))
+        logger.info(f'Parameter sweep: {len(block["symbols"])} candidate days across {len(frames)} tickers (ma_period {period})')
+
+
+class _SweepWorker:
+    """
+    Evaluates parameter sets on arrays mapped read-only from disk.
+
+    The bars are the PricePanel's float32 fields, flattened, and the candidate days
+    of each `ma_period` come from the blocks write_blocks() left in `scratch`, so
+    every process shares one copy of both in the page cache. A parameter set is a
+    single walk_prepared() call plus a single score_signals() call.
+    """
+
+    def __init__(self, config, params, panel_root: str | None, scratch: str, horizon_days: int):
+        self.config = config
+        self.params = params
+        self.scratch = scratch
+        self.horizon_days = horizon_days
+        self._blocks: dict[int, dict | None] = {}  # ma_period -> mapped block
+
+        panel = PricePanel.open(panel_root)
+        self._days = len(panel.dates)
+        self._bars = {field: panel.field(field).reshape(-1) for field in ('high', 'low', 'close')}
+        # Flat index of each ticker's last bar
+        last_days = np.searchsorted(panel.dates, np.array([panel.view(s)['date'][-1] for s in panel.symbols], dtype='datetime64[ns]'))
+        self._ends = np.arange(len(panel.symbols), dtype=np.int64) * self._days + last_days
+
+    def _params(self, overrides: dict) -> dict:
+        params = dict(self.params)
+        params['strategy_retest_200ma'] = {**self.params['strategy_retest_200ma'], **overrides}
+        return params
+
+    def _block(self, period: int) -> dict | None:
+        if period not in self._blocks:
+            directory = os.path.join(self.scratch, f'ma{period}')
+            block = None
+            if os.path.isdir(directory):
+                arrays = {
+                    name: np.load(path, mmap_mode='r') if os.path.exists(path := os.path.join(directory, f'{name}.npy')) else None
+                    for name in BLOCK_ARRAYS
+                }
+                bars = {field: arrays.pop(field) for field in ('close', 'high', 'low', 'volume')}
+                block = {**arrays, 'bars': bars}
+            self._blocks[period] = block
+        return self._blocks[period]
+
+    def evaluate(self, overrides: dict) -> dict:
+        params = self._params(overrides)
+        scanner = BatchPatternScanner(self.config, params)
+        rr = params['strategy_retest_200ma']['risk_reward_ratio']
+
+        r = np.empty(0)
+        outcome = np.empty(0, dtype=np.int64)
+        block = self._block(params['strategy_retest_200ma']['ma_period'])
+        hits = scanner.walk_prepared(block) if block is not None else None
+        if hits is not None and not hits.empty:
+            rows = hits['symbol'].to_numpy(dtype=np.int64)
+            positions = rows * self._days + hits['current_date'].to_numpy(dtype=np.int64)
+            r, outcome = score_signals(
+                hits, positions, self._ends[rows], self._bars['high'], self._bars['low'], self._bars['close'], self.horizon_days, rr
+            )
+
+        traded = ~np.isnan(r)
+        r, outcome = r[traded], outcome[traded]
+        gains, losses = r[r > 0].sum(), -r[r < 0].sum()
+        return {
+            **overrides,
+            'trades': len(r),
+            'wins': int(np.sum(outcome == 1)),
+            'losses': int(np.sum(outcome == -1)),
+            'open': int(np.sum(outcome == 0)),
+            'win_rate': float(np.mean(outcome == 1)) if len(r) else 0.0,
+            'expectancy_r': float(r.mean()) if len(r) else 0.0,
+            'total_r': float(r.sum()),
+            'profit_factor': float(gains / losses) if losses > 0 else (np.inf if gains > 0 else 0.0),
+        }
+
+
+# One evaluator per pool process, created by the pool initializer
+_worker: _SweepWorker | None = None
+
+
+def _init_worker(*args) -> None:
+    global _worker
+    _worker = _SweepWorker(*args)
+
+
+def _evaluate(overrides: dict) -> dict:
+    return _worker.evaluate(overrides)
+
+
+class ParameterSweep:
+    def __init__(
+        self,
+        config,
+        params,
+        panel_root: str | None = None,
+        symbols: list[str] | None = None,
+        workers: int | None = None,
+        horizon_days: int = 20,
+        min_trades: int = 30,
+        vix: float | pd.Series | None = None,
+    ):
+        """
+        Parameters
+        ----------
+        panel_root   : PricePanel directory (default ``data/panel/``), built beforehand.
+        symbols      : tickers to evaluate; all of the panel's when None.
+        workers      : pool size (default: CPU count); 1 evaluates in this process.
+        horizon_days : bars each signal is followed for.
+        min_trades   : sets with fewer trades are ranked after all others.
+        vix          : VIX for the stops, a level or a daily close series read as of each
+                       signal day; the shared market context's history when None.
+        """
+        self.config = config
+        self.params = params
+        self.panel_root = panel_root
+        self.symbols = symbols
+        self.workers = workers or os.cpu_count() or 1
+        self.horizon_days = horizon_days
+        self.min_trades = min_trades
+        self.vix = vix
+
+    def _resolve_vix(self) -> float | pd.Series:
+        if self.vix is not None:
+            return self.vix
+        history = get_market_context().history()
+        if history.empty:
+            logger.warning('VIX history unavailable, sweeping with VIX 20')
+            return 20.0
+        return history['vix_close']
+
+    def run(self, configs: list[dict], output_dir: str | None = None) -> pd.DataFrame:
+        """Evaluate `configs` (parameter overrides) and write the ranked table; returns it."""
+        known = self.params['strategy_retest_200ma']
+        unknown = {name for config in configs for name in config} - set(known)
+        if unknown:
+            raise ValueError(f'Unknown strategy_retest_200ma parameters: {sorted(unknown)}')
+
+        started = datetime.now()
+        panel = PricePanel.open(self.panel_root)
+        periods = {config.get('ma_period', known['ma_period']) for config in configs}
+        with tempfile.TemporaryDirectory(prefix='param_sweep_') as scratch:
+            # Parameter-independent arrays are built once here; workers only map them
+            write_blocks(self.config, self.params, panel, self.symbols or panel.symbols, self._resolve_vix(), periods, scratch)
+            args = (self.config, self.params, panel.root, scratch, self.horizon_days)
+            if self.workers <= 1:
+                worker = _SweepWorker(*args)
+                rows = [worker.evaluate(config) for config in configs]
+            else:
+                chunksize = max(1, len(configs) // (self.workers * 4))
+                with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=args) as executor:
+                    rows = list(executor.map(_evaluate, configs, chunksize=chunksize))
+
+        table = self.rank(pd.DataFrame(rows, columns=list(dict.fromkeys(name for config in configs for name in config)) + METRIC_COLUMNS))
+        logger.info(f'Parameter sweep: {len(configs)} sets in {(datetime.now() - started).total_seconds():.1f}s on {self.workers} workers')
+
+        output_dir = output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'results')
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f'param_sweep_{started:%Y%m%d_%H%M%S}.csv')
+        table.to_csv(path, index=False)
+        logger.info(f'Parameter sweep results written to {path}')
+        return table
+
+    def rank(self, table: pd.DataFrame) -> pd.DataFrame:
+        enough = table['trades'] >= self.min_trades
+        order = np.lexsort((-table['total_r'].to_numpy(), -table['expectancy_r'].to_numpy(), ~enough.to_numpy()))
+        table = table.iloc[order].reset_index(drop=True)
+        table.insert(0, 'rank', np.arange(1, len(table) + 1))
+        return table
+
+
+if __name__ == '__main__':
+    root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    with open(os.path.join(root, 'config', 'config.json')) as file:
+        config = json.load(file)
+    with open(os.path.join(root, 'config', 'trading_params.json')) as file:
+        params = json.load(file)
+    logging.basicConfig(level=logging.INFO)
+    print(ParameterSweep(config, params).run(grid(DEFAULT_SPACE)).head(20).to_string(index=False))
@@ -0,0 +1,225 @@
+"""
+Vectorized breakout / retest detection.
+
+Evaluates every step of the TrendDetector pattern as NumPy masks instead of
+nested Python loops. All inputs are ``(rows, days)`` arrays with time on the
+last axis, so the same code scans one ticker (a single row) or the whole
+universe at once. A row's result is identical to TrendDetector's loop: the
+latest breakout day ``i`` that has a qualifying retest wins, and within that
+breakout the earliest retest day ``j`` (``i + 2 .. i + 7``).
+
+The stop-loss percentage is only needed for rows where every other check
+already passed, so it is requested lazily through `stop_loss_fn` and only for
+those rows.
+"""
+
+from collections.abc import Callable
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Retest offsets after the breakout day: j in range(i + 2, i + 8)
+RETEST_OFFSETS = np.arange(2, 8)
+
+
+def ma_slope(ma: np.ndarray, period: int) -> np.ndarray:
+    """Slope of the MA over `period` days at every index; 0 where there is not enough history or the past MA is 0."""
+    out = np.zeros(ma.shape, dtype=np.float64)
+    if ma.shape[-1] <= period:
+        return out
+    past = ma[..., :-period]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (ma[..., period:] - past) / past
+    out[..., period:] = np.where(past == 0, 0.0, slope)
+    return out
+
+
+def _mean_before(x: np.ndarray, n: int = 5) -> np.ndarray:
+    """Mean of x[..., i - n : i] at every index i (NaN where i < n)."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] > n:
+        out[..., n:] = sliding_window_view(x, n, axis=-1)[..., :-1, :].mean(axis=-1)
+    return out
+
+
+def _shift_left(mask: np.ndarray, k: int) -> np.ndarray:
+    """out[..., i] = mask[..., i + k], False past the end."""
+    out = np.zeros(mask.shape, dtype=bool)
+    if k < mask.shape[-1]:
+        out[..., : mask.shape[-1] - k] = mask[..., k:]
+    return out
+
+
+def _shift_values_left(x: np.ndarray, k: int) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    if k < x.shape[-1]:
+        out[..., : x.shape[-1] - k] = x[..., k:]
+    return out
+
+
+def can_match(side: str, ma: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    Rows that pass the parameter-free part of detect(): a crossing after a setup and the last-day momentum.
+
+    detect() can't find the pattern in any other row, whatever the parameters, so callers
+    evaluating many parameter sets drop those rows once.
+    """
+    long = side == 'LONG'
+    ma, close = (np.atleast_2d(np.asarray(a, dtype=np.float64)) for a in (ma, close))
+    n = close.shape[-1]
+    if n < 7:
+        return np.zeros(len(close), dtype=bool)
+
+    mean_close = _mean_before(close)
+    mean_ma = _mean_before(ma)
+    with np.errstate(invalid='ignore'):
+        if long:
+            breakout = (mean_close[:, 1:] < mean_ma[:, 1:] * 0.98) & (close[:, 1:] > ma[:, 1:]) & (close[:, :-1] <= ma[:, :-1])
+            momentum = close[:, -1] > close[:, -2]
+        else:
+            breakout = (mean_close[:, 1:] > mean_ma[:, 1:] * 1.02) & (close[:, 1:] < ma[:, 1:]) & (close[:, :-1] >= ma[:, :-1])
+            momentum = close[:, -1] < close[:, -2]
+    # Breakout days i in 5 .. n - 5 (column i - 1 of the shifted masks)
+    return breakout[:, 4 : n - 5].any(axis=1) & momentum
+
+
+def detect(
+    side: str,
+    ma: np.ndarray,
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    volume: np.ndarray,
+    params: dict,
+    stop_loss_fn: Callable[[np.ndarray], np.ndarray],
+) -> dict[str, np.ndarray]:
+    """
+    Find the LONG or SHORT breakout/retest pattern in every row.
+
+    Parameters
+    ----------
+    side         : 'LONG' or 'SHORT'.
+    ma .. volume : (rows, days) float arrays, oldest day first.
+    params       : the ``strategy_retest_200ma`` parameter block.
+    stop_loss_fn : called with the row indices that reached the stop-loss step,
+                   returns their stop-loss fraction (one value per row).
+
+    Returns
+    -------
+    dict of per-row arrays: ``found`` plus, where found, ``breakout_idx``,
+    ``retest_idx``, ``volume_ratio``, ``retest_volume_ratio``,
+    ``breakout_strength``, ``bounce_strength``, ``stop``, ``risk`` and
+    ``avg_volume``.
+    """
+    long = side == 'LONG'
+    ma, close, high, low, volume = (np.atleast_2d(np.asarray(a, dtype=np.float64)) for a in (ma, close, high, low, volume))
+    rows, n = close.shape
+    idx = np.arange(n)
+
+    result = {
+        'found': np.zeros(rows, dtype=bool),
+        'breakout_idx': np.full(rows, -1),
+        'retest_idx': np.full(rows, -1),
+    }
+    for key in ('volume_ratio', 'retest_volume_ratio', 'breakout_strength', 'bounce_strength', 'stop', 'risk'):
+        result[key] = np.full(rows, np.nan)
+
+    avg_volume = volume[:, -50:].mean(axis=-1)
+    result['avg_volume'] = avg_volume
+    if n < 7:
+        return result
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = ma_slope(ma, params['ma_slope_period'])
+        trend_ok = slope >= params['min_uptrend_slope'] if long else slope <= params['max_downtrend_slope']
+        vol_ratio = volume / avg_volume[:, None]
+
+        # Step 1: breakout day i
+        mean_close = _mean_before(close)
+        mean_ma = _mean_before(ma)
+        crossed = np.zeros((rows, n), dtype=bool)
+        if long:
+            setup = mean_close < mean_ma * 0.98
+            crossed[:, 1:] = (close[:, 1:] > ma[:, 1:]) & (close[:, :-1] <= ma[:, :-1])
+        else:
+            setup = mean_close > mean_ma * 1.02
+            crossed[:, 1:] = (close[:, 1:] < ma[:, 1:]) & (close[:, :-1] >= ma[:, :-1])
+
+        day_range = high - low
+        body = close - low if long else high - close
+        strength = np.where(day_range > 0, body / day_range, 0.0)
+
+        # Same window as range(n - 5, max(n - lookback_days, 0), -1) with i >= 5
+        valid_i = (idx >= 5) & (idx <= n - 5) & (idx > max(n - params['lookback_days'], 0))
+        breakout = valid_i & trend_ok & setup & crossed & ~(vol_ratio < params['min_breakout_volume']) & ~(strength < params['min_breakout_strength'])
+
+        # Step 2/3: retest day j, everything that doesn't depend on i or the stop loss
+        last_close = close[:, -1:]
+        if long:
+            distance = np.abs(low - ma) / ma
+            bounce = (last_close - low) / low
+            bounced = ~(bounce < params['min_bounce_strength'])
+            momentum = close[:, -1] > close[:, -2]
+        else:
+            distance = np.abs(high - ma) / ma
+            bounce = (high - last_close) / high
+            bounced = ~(last_close >= low) & ~(bounce < params['min_bounce_strength'])
+            momentum = close[:, -1] < close[:, -2]
+
+        retest = (
+            trend_ok
+            & (distance < params['retest_distance'])
+            & ~(vol_ratio > params['max_retest_volume_absolute'])
+            & (idx <= n - 2)
+            & bounced
+            & ~(n - 1 - idx > params['max_days_since_retest'])
+            & momentum[:, None]
+        )
+
+        # Pair (i, j = i + k): retest volume must also stay below a fraction of the breakout volume
+        pairs = np.stack(
+            [
+                breakout & _shift_left(retest, k) & ~(_shift_values_left(vol_ratio, k) > vol_ratio * params['max_retest_volume_ratio'])
+                for k in RETEST_OFFSETS
+            ],
+            axis=-1,
+        )
+
+    candidates = np.flatnonzero(pairs.any(axis=(1, 2)))
+    if candidates.size == 0:
+        return result
+
+    # Stop-loss check, only for rows that got this far
+    sl = np.asarray(stop_loss_fn(candidates), dtype=np.float64)
+    entry = close[candidates, -1]
+    j_all = np.minimum(idx[:, None] + RETEST_OFFSETS[None, :], n - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if long:
+            stop = low[candidates][:, j_all] * (1 - sl[:, None, None])
+            risk = entry[:, None, None] - stop
+        else:
+            stop = high[candidates][:, j_all] * (1 + sl[:, None, None])
+            risk = stop - entry[:, None, None]
+        final = pairs[candidates] & ~((risk <= 0) | (risk / entry[:, None, None] > 0.05))
+
+    # Latest breakout first, then earliest retest
+    ordered = final[:, ::-1, :].reshape(len(candidates), -1)
+    hit = ordered.any(axis=1)
+    pos = ordered.argmax(axis=1)
+    i_sel = n - 1 - pos // len(RETEST_OFFSETS)
+    k_sel = pos % len(RETEST_OFFSETS)
+
+    for row_pos in np.flatnonzero(hit):
+        row = candidates[row_pos]
+        i, k = i_sel[row_pos], k_sel[row_pos]
+        j = i + RETEST_OFFSETS[k]
+        result['found'][row] = True
+        result['breakout_idx'][row] = i
+        result['retest_idx'][row] = j
+        result['volume_ratio'][row] = vol_ratio[row, i]
+        result['retest_volume_ratio'][row] = vol_ratio[row, j]
+        result['breakout_strength'][row] = strength[row, i]
+        result['bounce_strength'][row] = bounce[row, j]
+        result['stop'][row] = stop[row_pos, i, k]
+        result['risk'][row] = risk[row_pos, i, k]
+    return result
@@ -5,10 +5,12 @@ Test script to verify breakout/retest pattern detection
 import logging
 from typing import Dict, Optional
 
+import numpy as np
 import pandas as pd
 
 from execution.risk_manager import RiskManager
-from strategy.retest_200ma.validators import TrendValidator
+from strategy.retest_200ma import pattern_engine
+from strategy.retest_200ma.bars import bar_view
 
 # Setup logging
 logger = logging.getLogger()
@@ -16,289 +18,80 @@ logger = logging.getLogger()
 
 class TrendDetector:
     def __init__(self, df: pd.DataFrame, config, params):
-        self.df = df.copy()
+        self.df = df  # read only, never modified
         self.config = config
         self.params = params
 
-    def detect_long_pattern(self, DF: pd.DataFrame) -> dict | None:
+    def detect_long_pattern(self, DF: pd.DataFrame | dict) -> dict | None:
         """Detect bullish breakout and retest"""
-        ma200 = DF['ma200'].values
-        close = DF['close'].values
-        high = DF['high'].values
-        low = DF['low'].values
-        volume = DF['volume'].values
+        return self._detect('LONG', DF)
 
-        # Calculate average volume for this stock (last 50 days)
-        avg_volume = volume[-50:].mean() if len(volume) >= 50 else volume.mean()
-
-        # Look in recent 10 days for the pattern
-        for i in range(len(DF) - 5, max(len(DF) - self.params['strategy_retest_200ma']['lookback_days'], 0), -1):
-            # Step 1: Find breakout above MA200
-            if i < 5:
-                continue
-
-            # For LONG, MA should be flat or trending upward
-            trend_validator = TrendValidator(self.df, self.config, self.params)
-            if not trend_validator.is_ma_trending_up_or_flat(ma200, i):
-                ma_slope = trend_validator.calculate_ma_slope(ma200, i)
-                logger.debug(f'Skipping long pattern at day {i} - MA trending down (slope: {ma_slope:.4f})')
-                continue
-
-            # Require price well below MA before breakout
-            avg_price_before = close[i - 5 : i].mean()
-            avg_ma_before = ma200[i - 5 : i].mean()
-            was_significantly_below = avg_price_before < avg_ma_before * 0.98
-
-            crossed_above = close[i] > ma200[i] and close[i - 1] <= ma200[i - 1]
-
-            if not (was_significantly_below and crossed_above):
-                continue
-
-            # Check if breakout had HIGH volume (strong buying)
-            breakout_volume = volume[i]
-            volume_ratio = breakout_volume / avg_volume
-
-            # Breakout should have at least 1.5x average volume
-            if volume_ratio < self.params['strategy_retest_200ma']['min_breakout_volume']:
-                logger.debug(f'Breakout volume too low: {volume_ratio:.2f}x average')
-                continue
-
-            # Breakout strength
-            breakout_strength = (close[i] - low[i]) / (high[i] - low[i]) if (high[i] - low[i]) > 0 else 0
-            if breakout_strength < self.params['strategy_retest_200ma']['min_breakout_strength']:
-                continue
-
-            breakout_idx = i
-
-            # Step 2: Look for retest in next few days
-            for j in range(i + 2, min(i + 8, len(DF))):
-                # MA trend at retest should still be bullish/flat
-                if not trend_validator.is_ma_trending_up_or_flat(ma200, j):
-                    continue
-
-                # Price came back down near MA200 (within 1%)
-                retest_distance = abs(low[j] - ma200[j]) / ma200[j]
-
-                if retest_distance < self.params['strategy_retest_200ma']['retest_distance']:  # Within 1.0% of MA200
-                    # Check if retest has LOW volume (weak selling)
-                    retest_volume = volume[j]
-                    retest_volume_ratio = retest_volume / avg_volume
-
-                    # Retest should have LOWER volume than breakout (weak selling pressure)
-                    # Ideally below average volume (< 1.0x) or at least less than breakout
-                    if (
-                        retest_volume_ratio > volume_ratio * self.params['strategy_retest_200ma']['max_retest_volume_ratio']
-                        or retest_volume_ratio > self.params['strategy_retest_200ma']['max_retest_volume_absolute']
-                    ):
-                        logger.debug(f'Retest volume too high: {retest_volume_ratio:.2f}x vs breakout {volume_ratio:.2f}x')
-                        continue
-
-                    # Step 3: Check if price bounced up (current price above retest low)
-                    if j >= len(DF) - 1:
-                        continue
-                    bounce_strength = (close[-1] - low[j]) / low[j]
-
-                    if bounce_strength < self.params['strategy_retest_200ma']['min_bounce_strength']:
-                        continue
-
-                    # Upward momentum
-                    if len(close) >= 2:
-                        recent_momentum = close[-1] > close[-2]
-                        if not recent_momentum:
-                            continue
-
-                    risk_manager = RiskManager(self.params)
-                    sl = risk_manager.get_stop_loss_pct(DF)
-
-                    entry_price = close[-1]
-                    stop_loss = low[j] * (1 - sl)
-                    risk = entry_price - stop_loss
-
-                    if risk <= 0 or risk / entry_price > 0.05:
-                        continue
-
-                    target_price = entry_price + (risk * self.params['strategy_retest_200ma']['risk_reward_ratio'])
-
-                    # Recent retest
-                    days_since_retest = len(DF) - 1 - j
-                    if days_since_retest > self.params['strategy_retest_200ma']['max_days_since_retest']:
-                        continue
-
-                    # Calculate MA slope for logging
-                    ma_slope = trend_validator.calculate_ma_slope(ma200, len(DF) - 1)
-
-                    # Format prices based on price level
-                    if entry_price < 1:
-                        entry_price = round(entry_price, 4)
-                        target_price = round(target_price, 4)
-                        stop_loss = round(stop_loss, 4)
-                    else:
-                        entry_price = round(entry_price, 2)
-                        target_price = round(target_price, 2)
-                        stop_loss = round(stop_loss, 2)
-
-                    logger.info(f'Long pattern detected on {DF["symbol"].iloc[0]}')
-                    return {
-                        'strategy_type': '200ma_retest',
-                        'type': 'LONG',
-                        'symbol': DF['symbol'].iloc[0],
-                        'entry': entry_price,
-                        'stop': stop_loss,
-                        'target': target_price,
-                        'risk': risk,
-                        'reward': risk * self.params['strategy_retest_200ma']['risk_reward_ratio'],
-                        'breakout_date': DF.iloc[breakout_idx]['date'],
-                        'retest_date': DF.iloc[j]['date'],
-                        'current_date': DF.iloc[-1]['date'],
-                        'breakout_volume_ratio': volume_ratio,
-                        'retest_volume_ratio': retest_volume_ratio,
-                        'avg_volume': avg_volume,
-                        'bounce_strength': bounce_strength,
-                        'breakout_strength': breakout_strength,
-                        'ma_slope': ma_slope,
-                        'ma_slope_pct': ma_slope * 100,  # For easier reading
-                    }
-
-        return None
-
-    def detect_short_pattern(self, DF: pd.DataFrame) -> dict | None:
+    def detect_short_pattern(self, DF: pd.DataFrame | dict) -> dict | None:
         """Detect bearish breakout and retest"""
-        ma200 = DF['ma200'].values
-        close = DF['close'].values
-        high = DF['high'].values
-        low = DF['low'].values
-        volume = DF['volume'].values
-
-        # Calculate average volume for this stock (last 50 days)
-        avg_volume = volume[-50:].mean() if len(volume) >= 50 else volume.mean()
-
-        # Look in recent 20 days for the pattern
-        for i in range(len(DF) - 5, max(len(DF) - self.params['strategy_retest_200ma']['lookback_days'], 0), -1):
-            # Step 1: Find breakout below MA200
-            if i < 5:
-                continue
-
-            # Check MA trend BEFORE checking breakdown
-            trend_validator = TrendValidator(self.df, self.config, self.params)
-            if not trend_validator.is_ma_trending_down_or_flat(ma200, i):
-                ma_slope = trend_validator.calculate_ma_slope(ma200, i)
-                logger.debug(f'Skipping short pattern at day {i} - MA trending up (slope: {ma_slope:.4f})')
-                continue
-
-            # Require price well above MA before breakdown
-            avg_price_before = close[i - 5 : i].mean()
-            avg_ma_before = ma200[i - 5 : i].mean()
-            was_significantly_above = avg_price_before > avg_ma_before * 1.02
-
-            crossed_below = close[i] < ma200[i] and close[i - 1] >= ma200[i - 1]
-
-            if not (was_significantly_above and crossed_below):
-                continue
-
-            # Check if breakout had HIGH volume (strong buying)
-            breakout_volume = volume[i]
-            volume_ratio = breakout_volume / avg_volume
-
-            # Breakout should have at least 1.5x average volume
-            if volume_ratio < self.params['strategy_retest_200ma']['min_breakout_volume']:
-                logger.debug(f'Breakout volume too low: {volume_ratio:.2f}x average')
-                continue
-
-            # Breakdown strength
-            breakdown_strength = (high[i] - close[i]) / (high[i] - low[i]) if (high[i] - low[i]) > 0 else 0
-            if breakdown_strength < self.params['strategy_retest_200ma']['min_breakout_strength']:
-                continue
-
-            breakout_idx = i
-
-            # Step 2: Look for retest in next few days
-            for j in range(i + 2, min(i + 8, len(DF))):
-                # MA trend at retest should still be bearish/flat
-                if not trend_validator.is_ma_trending_down_or_flat(ma200, j):
-                    continue
-
-                # Price came back up near MA200 (within 1%)
-                retest_distance = abs(high[j] - ma200[j]) / ma200[j]
-
-                if retest_distance < self.params['strategy_retest_200ma']['retest_distance']:  # Within 1.0% of MA200
-                    # Check if retest has LOW volume (weak buying)
-                    retest_volume = volume[j]
-                    retest_volume_ratio = retest_volume / avg_volume
-
-                    # Retest should have LOWER volume than breakdown (weak buying pressure)
-                    if (
-                        retest_volume_ratio > volume_ratio * self.params['strategy_retest_200ma']['max_retest_volume_ratio']
-                        or retest_volume_ratio > self.params['strategy_retest_200ma']['max_retest_volume_absolute']
-                    ):
-                        logger.debug(f'Retest volume too high: {retest_volume_ratio:.2f}x vs breakdown {volume_ratio:.2f}x')
-                        continue
-
-                    # Step 3: Check if price bounced down (current price below retest high)
-                    if j >= len(DF) - 1:
-                        continue
-                    if close[-1] >= low[j]:
-                        continue
-                    bounce_strength = (high[j] - close[-1]) / high[j]
-
-                    if bounce_strength < self.params['strategy_retest_200ma']['min_bounce_strength']:
-                        continue
-
-                    # Downward momentum
-                    if len(close) >= 2:
-                        recent_momentum = close[-1] < close[-2]
-                        if not recent_momentum:
-                            continue
-
-                    risk_manager = RiskManager(self.params)
-                    sl = risk_manager.get_stop_loss_pct(DF)
-
-                    entry_price = close[-1]
-                    stop_loss = high[j] * (1 + sl)
-                    risk = stop_loss - entry_price
-
-                    if risk <= 0 or risk / entry_price > 0.05:
-                        continue
-
-                    target_price = entry_price - (risk * self.params['strategy_retest_200ma']['risk_reward_ratio'])
-
-                    # Recent retest
-                    days_since_retest = len(DF) - 1 - j
-                    if days_since_retest > self.params['strategy_retest_200ma']['max_days_since_retest']:
-                        continue
-
-                    # Calculate MA slope
-                    ma_slope = trend_validator.calculate_ma_slope(ma200, len(DF) - 1)
-
-                    # Format prices based on price level
-                    if entry_price < 1:
-                        entry_price = round(entry_price, 4)
-                        target_price = round(target_price, 4)
-                        stop_loss = round(stop_loss, 4)
-                    else:
-                        entry_price = round(entry_price, 2)
-                        target_price = round(target_price, 2)
-                        stop_loss = round(stop_loss, 2)
-
-                    logger.info(f'Short pattern detected on {DF["symbol"].iloc[0]}')
-                    return {
-                        'strategy_type': '200ma_retest',
-                        'type': 'SHORT',
-                        'symbol': DF['symbol'].iloc[0],
-                        'entry': entry_price,
-                        'stop': stop_loss,
-                        'target': target_price,
-                        'risk': risk,
-                        'reward': risk * self.params['strategy_retest_200ma']['risk_reward_ratio'],
-                        'breakout_date': DF.iloc[breakout_idx]['date'],
-                        'retest_date': DF.iloc[j]['date'],
-                        'current_date': DF.iloc[-1]['date'],
-                        'breakdown_volume_ratio': volume_ratio,
-                        'retest_volume_ratio': retest_volume_ratio,
-                        'avg_volume': avg_volume,
-                        'bounce_strength': bounce_strength,
-                        'breakdown_strength': breakdown_strength,
-                        'ma_slope': ma_slope,
-                        'ma_slope_pct': ma_slope * 100,
-                    }
-
-        return None
+        return self._detect('SHORT', DF)
+
+    def _detect(self, side: str, DF: pd.DataFrame | dict) -> dict | None:
+        params = self.params['strategy_retest_200ma']
+        bars = bar_view(DF)
+        stop_loss: list[float] = []
+
+        def stop_loss_fn(rows: np.ndarray) -> np.ndarray:
+            # VIX lookup inside, so only computed once and only if a pattern got this far
+            if not stop_loss:
+                stop_loss.append(RiskManager(self.params).get_stop_loss_pct(bars))
+            return np.full(len(rows), stop_loss[0])
+
+        hits = pattern_engine.detect(
+            side,
+            bars['ma200'],
+            bars['close'],
+            bars['high'],
+            bars['low'],
+            bars['volume'],
+            params,
+            stop_loss_fn,
+        )
+        if not hits['found'][0]:
+            return None
+
+        breakout_idx = int(hits['breakout_idx'][0])
+        j = int(hits['retest_idx'][0])
+        close = bars['close']
+        entry_price = close[-1]
+        stop_loss_price = hits['stop'][0]
+        risk = hits['risk'][0]
+        target_price = entry_price + risk * params['risk_reward_ratio'] if side == 'LONG' else entry_price - risk * params['risk_reward_ratio']
+        ma_slope = pattern_engine.ma_slope(bars['ma200'], params['ma_slope_period'])[-1]
+
+        # Format prices based on price level
+        digits = 4 if entry_price < 1 else 2
+        entry_price = round(entry_price, digits)
+        target_price = round(target_price, digits)
+        stop_loss_price = round(stop_loss_price, digits)
+
+        symbol = bars['symbol']
+        logger.info(f'{"Long" if side == "LONG" else "Short"} pattern detected on {symbol}')
+        signal = {
+            'strategy_type': '200ma_retest',
+            'type': side,
+            'symbol': symbol,
+            'entry': entry_price,
+            'stop': stop_loss_price,
+            'target': target_price,
+            'risk': risk,
+            'reward': risk * params['risk_reward_ratio'],
+            'breakout_date': bars['date'][breakout_idx],
+            'retest_date': bars['date'][j],
+            'current_date': bars['date'][-1],
+        }
+        if side == 'LONG':
+            signal['breakout_volume_ratio'] = hits['volume_ratio'][0]
+        else:
+            signal['breakdown_volume_ratio'] = hits['volume_ratio'][0]
+        signal['retest_volume_ratio'] = hits['retest_volume_ratio'][0]
+        signal['avg_volume'] = hits['avg_volume'][0]
+        signal['bounce_strength'] = hits['bounce_strength'][0]
+        signal['breakout_strength' if side == 'LONG' else 'breakdown_strength'] = hits['breakout_strength'][0]
+        signal['ma_slope'] = ma_slope
+        signal['ma_slope_pct'] = ma_slope * 100  # For easier reading
+        return signal
@@ -7,13 +7,15 @@ import logging
 import numpy as np
 import pandas as pd
 
+from strategy.retest_200ma.bars import rolling_mean_tail
+
 # Setup logging
 logger = logging.getLogger()
 
 
 class TrendValidator:
     def __init__(self, df: pd.DataFrame, config, params):
-        self.df = df.copy()
+        self.df = df  # read only, never modified
         self.config = config
         self.params = params
 
@@ -21,6 +23,10 @@ class TrendValidator:
         """Calculate moving average"""
         return self.df['close'].rolling(window=period).mean()
 
+    def calculate_ma_tail(self, period: int, n: int) -> np.ndarray:
+        """The last `n` values of the moving average, without computing it over the full history"""
+        return rolling_mean_tail(self.df['close'].to_numpy(), period, n)
+
     def calculate_ma_slope(self, ma_values: np.ndarray, current_idx: int) -> float:
         """
         Calculate the slope of the moving average
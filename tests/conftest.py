@@ -5,6 +5,11 @@ import pandas as pd
 import pytest
 import yfinance as yf
 
+from strategy.ai_analysis.data_preparation.indicator_features import IndicatorFeatureExtractor
+from strategy.ai_analysis.data_preparation.market_features import MarketFeatureExtractor
+from strategy.ai_analysis.data_preparation.price_features import PriceFeatureExtractor
+from strategy.ai_analysis.data_preparation.volume_features import VolumeFeatureExtractor
+
 collect_ignore = [
     'legacy/test_ai_analysis.py',
     'legacy/test_ai_backtest.py',
@@ -90,6 +95,111 @@ def make_synthetic_bars(n: int = 500, symbol: str = 'TEST') -> pd.DataFrame:
     )
 
 
+def make_pattern_bars(rng: np.random.Generator, symbol: str, n: int = 300) -> pd.DataFrame:
+    """
+    Flat history around 100 ending in a (not always valid) breakout, retest and bounce.
+
+    The pattern is built as a LONG in deviations from 100 and mirrored for SHORT tickers.
+    """
+    close = rng.normal(0, 0.003, n)
+    upper = np.abs(rng.normal(0, 0.003, n))
+    lower = np.abs(rng.normal(0, 0.003, n))
+    volume = 1e6 * rng.uniform(0.7, 1.3, n)
+
+    j = n - int(rng.integers(2, 5))
+    b = min(j - int(rng.integers(2, 8)), n - 5)
+    close[b - 6 : b] = -rng.uniform(0.015, 0.05)
+    close[b:] = rng.uniform(0.004, 0.03, n - b)
+    close[b] = rng.uniform(0.004, 0.02)
+    upper[b], lower[b] = rng.uniform(0, 0.002), close[b] + rng.uniform(0.005, 0.02)
+    volume[b] *= rng.uniform(1.2, 4.0)
+    close[j] = rng.uniform(0.004, 0.01)
+    lower[j] = close[j] - rng.uniform(-0.006, 0.006)
+    volume[j] *= rng.uniform(0.2, 1.0)
+    close[-1] = close[j] - lower[j] + rng.uniform(0.015, 0.04)
+    close[-2] = close[-1] - rng.uniform(-0.003, 0.01)
+
+    sign = rng.choice([1, -1])
+    high_dev, low_dev = close + upper, close - lower
+    if sign < 0:
+        close, high_dev, low_dev = -close, -low_dev, -high_dev
+    return pd.DataFrame(
+        {
+            'open': 100.0 * (1 + close),
+            'high': 100.0 * (1 + high_dev),
+            'low': 100.0 * (1 + low_dev),
+            'close': 100.0 * (1 + close),
+            'volume': volume.round(),
+            'date': pd.bdate_range(end='2026-06-30', periods=n),
+            'symbol': symbol,
+        }
+    )
+
+
+def make_pattern_history(seed: int = 4, segments: int = 8) -> pd.DataFrame:
+    """Several make_pattern_bars() segments back to back: 200MA signals on many past days."""
+    rng = np.random.default_rng(seed)
+    df = pd.concat([make_pattern_bars(rng, 'HIST') for _ in range(segments)], ignore_index=True)
+    df['date'] = pd.bdate_range(end='2026-06-30', periods=len(df))
+    return df
+
+
+class CountingExtractor(PriceFeatureExtractor):
+    """Price extractor that counts its extract() calls and the bars it was given."""
+
+    # Class attributes: instance settings are part of the feature cache key
+    calls = 0
+    rows = 0
+
+    def extract(self, df):
+        type(self).calls += 1
+        type(self).rows += len(df)
+        return super().extract(df)
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.calls = 0
+        cls.rows = 0
+
+
+def make_market_data(dates, seed: int = 0) -> pd.DataFrame:
+    """Synthetic VIX/SPY closes on `dates`, as MarketFeatureExtractor(market_data=...) takes them."""
+    dates = pd.DatetimeIndex(dates)
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {'vix_close': 15 + rng.uniform(0, 10, len(dates)), 'spy_close': 400 + np.cumsum(rng.normal(0, 1, len(dates)))},
+        index=dates,
+    )
+
+
+def make_feature_extractors(dates, price: PriceFeatureExtractor | None = None) -> list:
+    """The four default extractors, with the market features read from make_market_data(dates)."""
+    return [
+        price or PriceFeatureExtractor(),
+        VolumeFeatureExtractor(),
+        IndicatorFeatureExtractor(),
+        MarketFeatureExtractor(market_data=make_market_data(dates)),
+    ]
+
+
+@pytest.fixture(autouse=True)
+def market_context(tmp_path_factory):
+    """A fresh process-wide MarketContext per test, so cached VIX/SPY values never leak between tests."""
+    from data_fetch.market_context import MarketContext, configure_market_context
+
+    return configure_market_context(context=MarketContext(str(tmp_path_factory.mktemp('market_context'))))
+
+
+@pytest.fixture(scope='session')
+def replay_root(tmp_path_factory) -> str:
+    """Deterministic offline replay dataset (bars, VIX/SPY, sector metadata) for pipeline tests."""
+    from data_fetch.replay import ReplayDataset
+
+    root = str(tmp_path_factory.mktemp('replay'))
+    ReplayDataset.generate(root, [f'RP{i}' for i in range(6)], n_days=600)
+    return root
+
+
 @pytest.fixture
 def synthetic_bars():
     """Fixture providing synthetic OHLCV bars for unit tests."""
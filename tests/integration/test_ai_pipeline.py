@@ -48,6 +48,14 @@ class TestAITrainPredictPipeline:
         assert set(probs.keys()) == {'SHORT', 'FLAT', 'LONG'}
         assert abs(sum(probs.values()) - 1.0) < 1e-4
 
+    def test_predict_with_supplied_bars(self, trained_analyzer):
+        analyzer, bars = trained_analyzer
+        analyzer.stock_data.get_historical_data = lambda sym, _days: None
+
+        result = analyzer.predict('SYN_A', bars=bars['SYN_A'])
+        assert result is not None
+        assert result['symbol'] == 'SYN_A'
+
     def test_predict_unseen_ticker(self, trained_analyzer):
         analyzer, _ = trained_analyzer
         result = analyzer.predict('SYN_UNSEEN')
@@ -0,0 +1,73 @@
+"""Scan and training pipelines driven by the offline replay dataset (no network)."""
+
+import time
+
+import pytest
+
+from data_fetch.bar_context import BarContext
+from data_fetch.fetch_executor import FetchExecutor
+from data_fetch.historical_data import StockDataFetcher
+from data_fetch.providers import build_providers
+from data_fetch.replay import ReplayDataset, ReplayProvider, ReplayTickerFetcher
+from strategy.ai_analysis.ai_analyzer import AIAnalyzer
+from strategy.ai_analysis.data_preparation import (
+    FeatureBuilder,
+    IndicatorFeatureExtractor,
+    PriceFeatureExtractor,
+    VolumeFeatureExtractor,
+)
+from strategy.retest_200ma.indicators import TrendIndicator
+from tests.conftest import CONFIG, PARAMS
+
+
+def _fetcher(dataset: ReplayDataset) -> StockDataFetcher:
+    executor = FetchExecutor(requests_per_second=1000.0, burst=100, max_retries=0, timeout_seconds=5.0)
+    return StockDataFetcher(executor=executor, providers=[ReplayProvider(dataset)])
+
+
+@pytest.mark.integration
+class TestReplayPipeline:
+    def test_ticker_fetcher_categorizes_from_replay(self, replay_root, tmp_path):
+        dataset = ReplayDataset(replay_root)
+        fetcher = ReplayTickerFetcher(dataset, str(tmp_path))
+
+        assert fetcher.stock_list == dataset.symbols
+        assert set(fetcher.categorized_stocks) == {'Technology', 'Energy', 'Healthcare'}
+        assert sum(len(t) for inds in fetcher.categorized_stocks.values() for t in inds.values()) == len(dataset.symbols)
+
+    def test_scan_path_runs_offline(self, replay_root):
+        dataset = ReplayDataset(replay_root)
+        context = BarContext(_fetcher(dataset), {'strategy': PARAMS['strategy_retest_200ma']['lookback_days'], 'ai': 730})
+        context.load(dataset.symbols)
+
+        for symbol in dataset.symbols:
+            df = context.get(symbol, 'strategy')
+            assert df is not None and len(df) >= PARAMS['strategy_retest_200ma']['ma_period']
+            TrendIndicator(df, CONFIG, PARAMS).detect_breakout_and_retest()
+
+    def test_training_uses_replayed_market_data(self, replay_root):
+        dataset = ReplayDataset(replay_root)
+        builder = FeatureBuilder(
+            extractors=[PriceFeatureExtractor(), VolumeFeatureExtractor(), IndicatorFeatureExtractor(), dataset.market_extractor()],
+        )
+        analyzer = AIAnalyzer(_fetcher(dataset), feature_builder=builder, cnn_epochs=2, params=PARAMS)
+        analyzer.prefetch(dataset.symbols)
+        analyzer.train(dataset.symbols[:3], val_split=0.2)
+
+        result = analyzer.predict(dataset.symbols[0])
+        assert result is not None and result['class'] in ('SHORT', 'FLAT', 'LONG')
+
+        features = builder.build_continuous_features(analyzer._bar_cache[dataset.symbols[0]])
+        assert features['vix_normalized'].nunique() > 1
+
+    def test_injected_latency_per_request(self, replay_root):
+        dataset = ReplayDataset(replay_root, latency_seconds=0.05)
+        fetcher = _fetcher(dataset)
+
+        started = time.monotonic()
+        fetcher.get_historical_data_batch(dataset.symbols, 250)
+        assert 0.05 <= time.monotonic() - started < 1.0
+
+    def test_replay_provider_from_config(self, replay_root):
+        providers = build_providers({'data': {'providers': ['replay'], 'replay': {'path': replay_root}}})
+        assert [p.name for p in providers] == ['replay']
@@ -14,7 +14,7 @@ from tests.conftest import PARAMS, make_synthetic_bars
 class TestSignalConstruction:
     """Test AIAnalyzer.construct_signal builds valid trade signals."""
 
-    @patch('execution.risk_manager.yf')
+    @patch('data_fetch.market_context.yf')
     def test_long_signal(self, mock_yf):
         mock_yf.Ticker.return_value.fast_info = {'lastPrice': 20.0}
         df = make_synthetic_bars(300)
@@ -31,7 +31,7 @@ class TestSignalConstruction:
         assert signal['target'] > signal['entry']
         assert signal['confidence'] == 0.85
 
-    @patch('execution.risk_manager.yf')
+    @patch('data_fetch.market_context.yf')
     def test_short_signal(self, mock_yf):
         mock_yf.Ticker.return_value.fast_info = {'lastPrice': 20.0}
         df = make_synthetic_bars(300)
@@ -45,7 +45,7 @@ class TestSignalConstruction:
         assert signal['stop'] > signal['entry']
         assert signal['target'] < signal['entry']
 
-    @patch('execution.risk_manager.yf')
+    @patch('data_fetch.market_context.yf')
     def test_signal_risk_reward(self, mock_yf):
         mock_yf.Ticker.return_value.fast_info = {'lastPrice': 20.0}
         df = make_synthetic_bars(300)
@@ -63,7 +63,7 @@ class TestSignalConstruction:
 class TestRiskManagerIntegration:
     """Test RiskManager with realistic signal flows."""
 
-    @patch('execution.risk_manager.yf')
+    @patch('data_fetch.market_context.yf')
     def test_position_sizing_with_signal(self, mock_yf):
         mock_yf.Ticker.return_value.fast_info = {'lastPrice': 20.0}
 
@@ -84,7 +84,7 @@ class TestRiskManagerIntegration:
         valid = rm.validate_trade_size(shares, entry, trade_cost + 1000)
         assert valid is True
 
-    @patch('execution.risk_manager.yf')
+    @patch('data_fetch.market_context.yf')
     def test_full_signal_to_sizing_flow(self, mock_yf):
         """Simulate: fetch data -> AI predict -> construct signal -> size position."""
         mock_yf.Ticker.return_value.fast_info = {'lastPrice': 18.0}
@@ -0,0 +1,53 @@
+"""Unit tests for the per-scan shared bar context."""
+
+import numpy as np
+import pandas as pd
+
+from data_fetch.bar_context import BarContext
+from data_fetch.historical_data import StockDataFetcher
+from tests.conftest import make_synthetic_bars
+
+
+def _recent_bars(n: int, symbol: str) -> pd.DataFrame:
+    df = make_synthetic_bars(n, symbol=symbol)
+    df['date'] = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=n)
+    return df
+
+
+class TestBarContext:
+    def test_fetches_longest_lookback_once(self):
+        fetcher = StockDataFetcher()
+        calls = []
+
+        def fake_batch(symbols, lookback_days):
+            calls.append((tuple(symbols), lookback_days))
+            return {s: _recent_bars(1300, s) for s in symbols}
+
+        fetcher.get_historical_data_batch = fake_batch
+        context = BarContext(fetcher, {'strategy': 250, 'ai': 1825})
+        context.load(['AAA', 'BBB'])
+        context.load(['AAA'])
+
+        assert calls == [(('AAA', 'BBB'), 1825)]
+
+        strategy = context.get('AAA', 'strategy')
+        ai = context.get('AAA', 'ai')
+        assert len(ai) == 1300
+        assert 240 <= len(strategy) <= 265
+        assert strategy['date'].iloc[-1] == ai['date'].iloc[-1]
+
+    def test_slices_share_memory_with_full_frame(self):
+        fetcher = StockDataFetcher()
+        fetcher.get_historical_data_batch = lambda symbols, lookback_days: {s: _recent_bars(1300, s) for s in symbols}
+        context = BarContext(fetcher, {'strategy': 250, 'ai': 1825})
+        context.load(['AAA'])
+
+        strategy = context.get('AAA', 'strategy')
+        assert np.shares_memory(strategy['close'].to_numpy(), context.get('AAA', 'ai')['close'].to_numpy())
+
+    def test_missing_symbol(self):
+        fetcher = StockDataFetcher()
+        fetcher.get_historical_data_batch = lambda symbols, lookback_days: {}
+        context = BarContext(fetcher, {'strategy': 250})
+        context.load(['NOPE'])
+        assert context.get('NOPE', 'strategy') is None
@@ -0,0 +1,151 @@
+"""Unit tests for the on-disk bar store and incremental fetching."""
+
+import time
+
+import pandas as pd
+import pytest
+
+from data_fetch.bar_store import BarStore
+from data_fetch.historical_data import StockDataFetcher
+from tests.conftest import make_synthetic_bars
+
+
+def _with_tz(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df['date'] = pd.DatetimeIndex(df['date']).tz_localize('America/New_York')
+    return df
+
+
+def _recent_bars(n: int = 300, symbol: str = 'TEST') -> pd.DataFrame:
+    df = make_synthetic_bars(n, symbol=symbol)
+    df['date'] = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=n)
+    return _with_tz(df)
+
+
+class TestBarStore:
+    def test_round_trip(self, tmp_path):
+        store = BarStore(str(tmp_path))
+        df = _with_tz(make_synthetic_bars(50, symbol='AAPL'))
+        store.save('AAPL', df, history_start=pd.Timestamp('2020-01-01'))
+
+        loaded, meta = store.load('AAPL')
+        pd.testing.assert_frame_equal(loaded, df, check_dtype=False)
+        assert meta['history_start'] == pd.Timestamp('2020-01-01')
+        assert meta['fetched_at'] > 0
+
+    def test_missing_symbol(self, tmp_path):
+        store = BarStore(str(tmp_path))
+        loaded, meta = store.load('NOPE')
+        assert loaded is None
+        assert meta == {}
+
+    def test_index_symbol_file_name(self, tmp_path):
+        store = BarStore(str(tmp_path))
+        store.save('^VIX', _with_tz(make_synthetic_bars(5, symbol='^VIX')), history_start=pd.Timestamp('2020-01-01'))
+        assert store.has('^VIX')
+        store.delete('^VIX')
+        assert not store.has('^VIX')
+
+
+class TestIncrementalFetch:
+    @pytest.fixture
+    def fetcher(self, tmp_path):
+        return StockDataFetcher(bar_store=BarStore(str(tmp_path)))
+
+    def test_cold_fetch_downloads_full_period(self, fetcher):
+        calls = []
+        full = _recent_bars(300)
+
+        def fake_download(symbol, period=None, start=None):
+            calls.append((period, start))
+            return full
+
+        fetcher._download = fake_download
+        df = fetcher.get_historical_data('TEST', 250)
+
+        assert calls == [('1y', None)]
+        assert df is not None and len(df) > 0
+        assert fetcher.bar_store.has('TEST')
+
+    def test_warm_fetch_within_max_age_skips_network(self, fetcher):
+        fetcher.bar_store.save('TEST', _recent_bars(300), history_start=fetcher._period_start('1y'))
+        fetcher._download = lambda *a, **k: pytest.fail('should not download')
+
+        df = fetcher.get_historical_data('TEST', 250)
+        assert df is not None
+
+    def test_stale_fetch_appends_tail_only(self, fetcher):
+        full = _recent_bars(300)
+        stored = full.iloc[:-3].reset_index(drop=True)
+        fetcher.bar_store.save('TEST', stored, history_start=fetcher._period_start('1y'), fetched_at=time.time() - 3600)
+
+        calls = []
+
+        def fake_download(symbol, period=None, start=None):
+            calls.append((period, start))
+            anchor = pd.Timestamp(start).tz_localize('America/New_York')
+            return full[full['date'] >= anchor].reset_index(drop=True)
+
+        fetcher._download = fake_download
+        df = fetcher.get_historical_data('TEST', 250)
+
+        assert len(calls) == 1 and calls[0][0] is None
+        assert df['date'].iloc[-1] == full['date'].iloc[-1]
+        assert df['date'].is_unique
+        stored_after, _ = fetcher.bar_store.load('TEST')
+        assert len(stored_after) == len(full)
+
+    def test_adjusted_history_triggers_full_refresh(self, fetcher):
+        full = _recent_bars(300)
+        fetcher.bar_store.save('TEST', full, history_start=fetcher._period_start('1y'), fetched_at=time.time() - 3600)
+
+        adjusted = full.copy()
+        adjusted[['open', 'high', 'low', 'close']] *= 0.5
+        calls = []
+
+        def fake_download(symbol, period=None, start=None):
+            calls.append((period, start))
+            if start is not None:
+                anchor = pd.Timestamp(start).tz_localize('America/New_York')
+                return adjusted[adjusted['date'] >= anchor].reset_index(drop=True)
+            return adjusted
+
+        fetcher._download = fake_download
+        df = fetcher.get_historical_data('TEST', 250)
+
+        assert [c[0] for c in calls] == [None, '1y']
+        assert df['close'].iloc[0] == pytest.approx(adjusted[adjusted['date'] == df['date'].iloc[0]]['close'].iloc[0])
+
+    def test_deeper_request_after_adjusted_refresh_refetches(self, fetcher):
+        full = _recent_bars(1300)
+        fetcher.bar_store.save('TEST', full, history_start=fetcher._period_start('5y'), fetched_at=time.time() - 3600)
+        adjusted = full.copy()
+        adjusted[['open', 'high', 'low', 'close']] *= 0.5
+        calls = []
+
+        def fake_download(symbol, period=None, start=None):
+            calls.append(period)
+            if start is not None:
+                anchor = pd.Timestamp(start).tz_localize('America/New_York')
+                return adjusted[adjusted['date'] >= anchor].reset_index(drop=True)
+            return adjusted[adjusted['date'] >= fetcher._period_start(period).tz_localize('America/New_York')].reset_index(drop=True)
+
+        fetcher._download = fake_download
+        fetcher.get_historical_data('TEST', 250)
+        assert calls == [None, '1y']
+
+        df = fetcher.get_historical_data('TEST', 1825)
+        assert calls == [None, '1y', '5y']
+        assert len(df) == len(fetcher._slice_period(adjusted, fetcher._period_start('5y')))
+
+    def test_deeper_lookback_refetches(self, fetcher):
+        fetcher.bar_store.save('TEST', _recent_bars(300), history_start=fetcher._period_start('1y'))
+        calls = []
+
+        def fake_download(symbol, period=None, start=None):
+            calls.append(period)
+            return _recent_bars(1200)
+
+        fetcher._download = fake_download
+        fetcher.get_historical_data('TEST', 1825)
+        assert calls == ['5y']
@@ -0,0 +1,143 @@
+"""Universe batch scan vs. per-ticker TrendIndicator."""
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_fetch.bar_store import BarStore
+from data_fetch.price_panel import PricePanel
+from execution.risk_manager import RiskManager
+from strategy.retest_200ma.batch_scan import HIT_COLUMNS, BatchPatternScanner
+from strategy.retest_200ma.indicators import TrendIndicator
+from tests.conftest import CONFIG, PARAMS, make_pattern_bars, make_pattern_history
+
+
+@pytest.fixture
+def universe():
+    rng = np.random.default_rng(11)
+    frames = {f'T{i:03d}': make_pattern_bars(rng, f'T{i:03d}') for i in range(400)}
+    frames['SHORTHIST'] = make_pattern_bars(rng, 'SHORTHIST', n=200)
+    frames['NONE'] = None
+    return frames
+
+
+def _assert_same(signal: dict, expected: dict) -> None:
+    assert signal.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, float):
+            assert signal[key] == pytest.approx(value, rel=1e-9, abs=1e-12), key
+        else:
+            assert signal[key] == value, key
+
+
+@patch.object(RiskManager, 'get_vix', lambda self: 20.0)
+class TestBatchPatternScanner:
+    def test_matches_trend_indicator(self, universe):
+        table = BatchPatternScanner(CONFIG, PARAMS).scan_frames(universe)
+        signals = BatchPatternScanner(CONFIG, PARAMS).signals(table)
+
+        expected = {}
+        for symbol, df in universe.items():
+            if df is not None:
+                signal = TrendIndicator(df, CONFIG, PARAMS).detect_breakout_and_retest()
+                if signal is not None:
+                    expected[symbol] = signal
+
+        assert list(table.columns) == HIT_COLUMNS
+        assert set(signals) == set(expected)
+        assert {s['type'] for s in expected.values()} == {'LONG', 'SHORT'}
+        for symbol, signal in expected.items():
+            _assert_same(signals[symbol], signal)
+
+    def test_panel_scan_matches_frame_scan(self, universe, tmp_path):
+        store = BarStore(str(tmp_path / 'bars'))
+        frames = {}
+        for symbol, df in universe.items():
+            if df is None:
+                continue
+            df = df.copy()
+            # float32 panel storage: scan the same rounded prices both ways
+            for field in PricePanel.PRICE_FIELDS:
+                df[field] = df[field].astype(np.float32).astype(np.float64)
+            df['date'] = pd.DatetimeIndex(df['date']).tz_localize('America/New_York')
+            store.save(symbol, df, history_start=pd.Timestamp('2000-01-01'))
+            frames[symbol] = df
+        # A calendar gap for one ticker must be skipped, not read as a NaN bar
+        frames['T000'] = frames['T000'].drop(index=100).reset_index(drop=True)
+        store.save('T000', frames['T000'], history_start=pd.Timestamp('2000-01-01'))
+        panel = PricePanel.build(store, list(frames), root=str(tmp_path / 'panel'))
+
+        scanner = BatchPatternScanner(CONFIG, PARAMS)
+        from_panel = scanner.scan_panel(panel).set_index('symbol').sort_index()
+        from_frames = scanner.scan_frames(frames).set_index('symbol').sort_index()
+
+        assert len(from_panel) > 0
+        pd.testing.assert_frame_equal(from_panel, from_frames, check_dtype=False)
+
+    def test_vix_fetched_once(self, universe):
+        calls = []
+
+        def get_vix(self):
+            calls.append(1)
+            return 30.0
+
+        with patch.object(RiskManager, 'get_vix', get_vix):
+            BatchPatternScanner(CONFIG, PARAMS).scan_frames(universe)
+        assert len(calls) == 1
+
+    def test_empty_universe(self):
+        table = BatchPatternScanner(CONFIG, PARAMS).scan_frames({'NONE': None})
+        assert table.empty
+        assert list(table.columns) == HIT_COLUMNS
+
+
+class TestWalkThrough:
+    @patch.object(RiskManager, 'get_vix', lambda self: 20.0)
+    def test_matches_trend_indicator_every_day(self):
+        df = make_pattern_history()
+        table = BatchPatternScanner(CONFIG, PARAMS).walk_through(df)
+
+        expected = {}
+        for t in range(len(df)):
+            signal = TrendIndicator(df.iloc[: t + 1], CONFIG, PARAMS).detect_breakout_and_retest()
+            if signal is not None:
+                expected[signal['current_date']] = signal
+
+        assert list(table.columns) == HIT_COLUMNS
+        assert len(expected) >= 4
+        assert list(table['current_date']) == sorted(expected)
+        scanner = BatchPatternScanner(CONFIG, PARAMS)
+        for _, hit in table.iterrows():
+            _assert_same(scanner.signals(hit.to_frame().T)['HIST'], expected[hit['current_date']])
+
+    def test_vix_series_is_read_as_of_each_day(self):
+        df = make_pattern_history()
+        with patch.object(RiskManager, 'get_vix', side_effect=AssertionError('live VIX used')):
+            flat = {level: BatchPatternScanner(CONFIG, PARAMS).walk_through(df, vix=level).set_index('current_date') for level in (12.0, 20.0, 30.0)}
+            # Low VIX from the second signal day, high VIX from the fourth
+            days = flat[20.0].index
+            vix = pd.Series([12.0, 30.0], index=[pd.Timestamp(days[1]), pd.Timestamp(days[3])])
+            table = BatchPatternScanner(CONFIG, PARAMS).walk_through(df, vix=vix).set_index('current_date')
+
+        levels = [20.0, 12.0, 12.0, 30.0] + [30.0] * (len(days) - 4)
+        expected = pd.concat([flat[level].loc[[day]] for day, level in zip(days, levels)])
+        pd.testing.assert_frame_equal(table, expected)
+
+    @pytest.mark.parametrize('overrides', [{}, {'min_breakout_volume': 1.0, 'retest_distance': 0.02, 'max_retest_volume_ratio': 1.0, 'ATR': 3.0}])
+    def test_narrowed_days_give_the_same_signals(self, overrides):
+        params = {**PARAMS, 'strategy_retest_200ma': {**PARAMS['strategy_retest_200ma'], **overrides}}
+        scanner = BatchPatternScanner(CONFIG, params)
+        prepared = scanner.prepare_walk(make_pattern_history(), vix=20.0)
+        narrowed = scanner.narrow_walk(prepared)
+
+        full = scanner.walk_prepared(prepared)
+        assert len(full) > 0
+        assert len(narrowed['dates']) < len(prepared['dates']) / 5
+        pd.testing.assert_frame_equal(scanner.walk_prepared(narrowed), full)
+
+    def test_short_history(self):
+        table = BatchPatternScanner(CONFIG, PARAMS).walk_through(make_pattern_history(segments=1).iloc[:200], vix=20.0)
+        assert table.empty
+        assert list(table.columns) == HIT_COLUMNS
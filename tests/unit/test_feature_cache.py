@@ -0,0 +1,124 @@
+"""Unit tests for the per-ticker feature cache."""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategy.ai_analysis.ai_analyzer import AIAnalyzer
+from strategy.ai_analysis.data_preparation.feature_builder import FeatureBuilder
+from strategy.ai_analysis.data_preparation.feature_cache import FeatureCache, extractors_hash
+from strategy.ai_analysis.data_preparation.indicator_features import IndicatorFeatureExtractor
+from strategy.ai_analysis.data_preparation.market_features import MarketFeatureExtractor
+from strategy.ai_analysis.data_preparation.volume_features import VolumeFeatureExtractor
+from tests.conftest import PARAMS, CountingExtractor, make_feature_extractors, make_market_data, make_synthetic_bars
+
+
+def _builder(**kwargs) -> tuple[FeatureBuilder, CountingExtractor]:
+    CountingExtractor.reset()
+    counting = CountingExtractor()
+    return FeatureBuilder(extractors=[counting, VolumeFeatureExtractor(), IndicatorFeatureExtractor()], **kwargs), counting
+
+
+class TestFeatureCache:
+    def test_same_bars_extract_once(self):
+        fb, counting = _builder()
+        df = make_synthetic_bars(300, 'AAA')
+        first = fb.build_continuous_features(df)
+        fb.build_windows(df)
+        fb.build_windows(df, include_labels=False)
+        assert counting.calls == 1
+        pd.testing.assert_frame_equal(fb.build_continuous_features(df.reset_index(drop=True)), first)
+
+    def test_new_or_revised_bars_are_extracted_again(self):
+        fb, counting = _builder()
+        df = make_synthetic_bars(300, 'AAA')
+        fb.build_continuous_features(df.iloc[:-1])
+        fb.build_continuous_features(df)
+        revised = df.copy()
+        revised.loc[revised.index[-1], 'close'] += 0.5
+        result = fb.build_continuous_features(revised)
+        assert counting.calls == 3
+        assert result['log_return_1d'].iloc[-1] != fb.build_continuous_features(df)['log_return_1d'].iloc[-1]
+
+    def test_adjusted_older_bars_are_extracted_again(self):
+        fb, counting = _builder()
+        df = make_synthetic_bars(300, 'AAA')
+        fb.build_continuous_features(df)
+        adjusted = df.copy()
+        adjusted.loc[adjusted.index[:-1], ['open', 'high', 'low', 'close']] *= 0.98  # dividend: last bar unchanged
+        result = fb.build_continuous_features(adjusted)
+        assert counting.calls == 2
+        assert result['log_return_1d'].iloc[-1] != fb.build_continuous_features(df)['log_return_1d'].iloc[-1]
+
+    def test_extractor_settings_are_part_of_the_key(self):
+        fb, counting = _builder()
+        df = make_synthetic_bars(300, 'AAA')
+        fb.build_continuous_features(df)
+        counting.lookback = 5
+        fb.build_continuous_features(df)
+        assert counting.calls == 2
+
+    def test_unhashable_settings_are_rejected(self):
+        fb, counting = _builder()
+        counting.window = np.arange(3)
+        with pytest.raises(TypeError, match='cache_key'):
+            fb.build_continuous_features(make_synthetic_bars(300, 'AAA'))
+
+    def test_market_data_is_part_of_the_key(self):
+        df = make_synthetic_bars(300, 'AAA')
+        market = make_market_data(df['date'])
+        keys = {extractors_hash([MarketFeatureExtractor(market_data=data)]) for data in (market, market.copy(), market * 1.01)}
+        assert len(keys) == 2  # equal data gives the same key whatever the object
+
+    def test_shared_cache(self):
+        cache = FeatureCache.from_config({'data': {'feature_cache': {'max_mb': 64}}})
+        assert cache.max_bytes == 64 * 1024**2
+        df = make_synthetic_bars(300, 'AAA')
+        extractors = make_feature_extractors(df['date'])
+        first = FeatureBuilder(extractors=extractors, feature_cache=cache)
+        second = FeatureBuilder(extractors=make_feature_extractors(df['date']), feature_cache=cache)
+        assert first.feature_cache is second.feature_cache
+        assert second.build_continuous_features(df) is first.build_continuous_features(df)
+        assert FeatureBuilder(feature_cache=FeatureCache.from_config({'data': {'feature_cache': {'max_mb': 0}}})).feature_cache is None
+
+    def test_disabled(self):
+        fb, counting = _builder(feature_cache_mb=0)
+        df = make_synthetic_bars(300, 'AAA')
+        fb.build_continuous_features(df)
+        fb.build_continuous_features(df)
+        assert fb.feature_cache is None
+        assert counting.calls == 2
+
+    def test_lru_memory_bound(self):
+        frame = pd.DataFrame({'x': np.zeros(1000)})
+        size = int(frame.memory_usage(index=True).sum())
+        cache = FeatureCache(max_bytes=3 * size)
+        for key in 'abc':
+            cache.put((key,), frame)
+        cache.get(('a',))
+        cache.put(('d',), frame)
+
+        assert len(cache) == 3
+        assert cache.bytes == 3 * size
+        assert cache.get(('b',)) is None  # least recently used
+        assert cache.get(('a',)) is frame
+        cache.put(('big',), pd.DataFrame({'x': np.zeros(10_000)}))
+        assert cache.get(('big',)) is None
+
+
+def test_training_pass_extracts_each_ticker_once():
+    fb, counting = _builder()
+    bars = {s: make_synthetic_bars(300, s) for s in ('AAA', 'BBB', 'CCC')}
+    fetcher = MagicMock()
+    fetcher.get_historical_data.side_effect = lambda symbol, lookback_days: bars[symbol]
+    analyzer = AIAnalyzer(fetcher, feature_builder=fb, params=PARAMS)
+
+    for symbol in bars:
+        analyzer.add_ticker(symbol)
+    analyzer.build_dataset()
+    analyzer.build_dataset(lazy=True)
+
+    assert counting.calls == len(bars)
+    assert fb.feature_cache.hits == 2 * len(bars)
@@ -0,0 +1,143 @@
+"""Unit tests for the on-disk feature store."""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategy.ai_analysis.ai_analyzer import AIAnalyzer
+from strategy.ai_analysis.data_preparation.feature_builder import FeatureBuilder
+from strategy.ai_analysis.data_preparation.feature_store import FeatureStore, feature_version
+from strategy.ai_analysis.data_preparation.price_features import PriceFeatureExtractor
+from strategy.ai_analysis.data_preparation.volume_features import VolumeFeatureExtractor
+from tests.conftest import PARAMS, CountingExtractor, make_feature_extractors, make_synthetic_bars
+
+
+def _extractors(df: pd.DataFrame) -> list:
+    return make_feature_extractors(df['date'], price=CountingExtractor())
+
+
+def _builder(extractors: list, store: FeatureStore) -> FeatureBuilder:
+    return FeatureBuilder(extractors=extractors, feature_cache_mb=0, online_features=False, feature_store=store)
+
+
+def _assert_features(actual: pd.DataFrame, expected: pd.DataFrame) -> None:
+    assert list(actual.columns) == list(expected.columns)
+    assert actual.index.equals(expected.index)
+    np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-12, equal_nan=True)
+
+
+@pytest.fixture
+def bars():
+    return make_synthetic_bars(1500, 'AAA')
+
+
+def test_retrain_extracts_only_new_days(bars, tmp_path):
+    extractors = _extractors(bars)
+    fresh = FeatureBuilder(extractors=extractors, feature_cache_mb=0, online_features=False)
+    store = FeatureStore(str(tmp_path))
+    fb = _builder(extractors, store)
+
+    fb.build_continuous_features(bars.iloc[:1200])
+    assert store.rebuilds == 1 and store.hits == 0
+
+    for stop in (1201, 1205, 1230):
+        CountingExtractor.reset()
+        features = fb.build_continuous_features(bars.iloc[:stop])
+        assert CountingExtractor.rows < 600  # warm-up tail plus the new days, not the whole history
+        _assert_features(features, fresh.build_continuous_features(bars.iloc[:stop]))
+    assert store.rebuilds == 1 and store.hits == 3
+
+
+def test_sliding_lookback_matches_fresh_extraction(bars, tmp_path):
+    extractors = _extractors(bars)
+    fresh = FeatureBuilder(extractors=extractors, feature_cache_mb=0, online_features=False)
+    store = FeatureStore(str(tmp_path))
+    fb = _builder(extractors, store)
+
+    fb.build_continuous_features(bars.iloc[:1200])
+    window = bars.iloc[5:1205]
+    _assert_features(fb.build_continuous_features(window), fresh.build_continuous_features(window))
+    assert store.hits == 1
+    assert len(store.load('AAA', extractors)) == len(window)  # trimmed to the bars last read
+
+
+@pytest.mark.parametrize(
+    'change',
+    [
+        lambda df: df.assign(close=df['close'] * 0.98),  # dividend-adjusted history
+        lambda df: df.assign(volume=df['volume'].where(df.index != 1199, 1.0)),  # revised last bar
+        lambda df: pd.concat([df.iloc[:1], df]).assign(date=pd.bdate_range(end='2027-01-01', periods=len(df) + 1)),  # older bars
+    ],
+)
+def test_bars_that_no_longer_match_are_recomputed(bars, tmp_path, change):
+    extractors = _extractors(bars)
+    store = FeatureStore(str(tmp_path))
+    fb = _builder(extractors, store)
+    fb.build_continuous_features(bars.iloc[:1200])
+
+    changed = change(bars.iloc[:1200]).reset_index(drop=True)
+    assert store.read(changed, extractors) is None
+    fresh = FeatureBuilder(extractors=extractors, feature_cache_mb=0, online_features=False)
+    _assert_features(fb.build_continuous_features(changed), fresh.build_continuous_features(changed))
+    assert store.rebuilds == 2
+
+
+def test_version_follows_extractor_settings(bars, tmp_path):
+    class ScaledPrice(PriceFeatureExtractor):
+        def __init__(self, scale: float):
+            self.scale = scale
+
+    assert feature_version([ScaledPrice(1.0)]) != feature_version([ScaledPrice(2.0)])
+    assert feature_version([PriceFeatureExtractor()]) != feature_version([ScaledPrice(1.0)])
+    assert feature_version([PriceFeatureExtractor()]) == feature_version([PriceFeatureExtractor()])
+
+    store = FeatureStore(str(tmp_path))
+    _builder([PriceFeatureExtractor()], store).build_continuous_features(bars)
+    _builder([PriceFeatureExtractor(), VolumeFeatureExtractor()], store).build_continuous_features(bars)
+    assert len(list(tmp_path.iterdir())) == 2
+    assert store.rebuilds == 2
+
+
+def test_parallel_extraction_skips_stored_tickers(bars, tmp_path):
+    frames = {s: bars.assign(symbol=s).iloc[:1200] for s in ('AAA', 'BBB')}
+    extractors = _extractors(bars)
+    store = FeatureStore(str(tmp_path))
+    _builder(extractors, store).build_continuous_features_parallel(frames, workers=1)
+    assert store.rebuilds == 2
+
+    frames['AAA'] = bars.iloc[:1201]
+    frames['CCC'] = bars.assign(symbol='CCC')
+    features = _builder(extractors, store).build_continuous_features_parallel(frames, workers=1)
+    assert store.hits == 2 and store.rebuilds == 3
+    fresh = FeatureBuilder(extractors=extractors, feature_cache_mb=0, online_features=False)
+    for symbol, df in frames.items():
+        _assert_features(features[symbol], fresh.build_continuous_features(df))
+
+
+def test_from_config(tmp_path):
+    assert FeatureStore.from_config({}) is None
+    assert FeatureStore.from_config({'data': {'feature_store': {'enabled': False}}}) is None
+    store = FeatureStore.from_config({'data': {'feature_store': {'enabled': True, 'path': str(tmp_path)}}})
+    assert store.root == str(tmp_path)
+
+
+def test_build_dataset_reads_the_store(bars, tmp_path):
+    extractors = _extractors(bars)
+    store = FeatureStore(str(tmp_path))
+    fetcher = MagicMock()
+    fetcher.get_historical_data.side_effect = lambda symbol, lookback_days: bars.iloc[:1200]
+
+    first = AIAnalyzer(fetcher, feature_builder=_builder(extractors, store), params=PARAMS)
+    first.add_ticker('AAA')
+    expected = first.build_dataset()
+
+    fetcher.get_historical_data.side_effect = lambda symbol, lookback_days: bars.iloc[:1201]
+    second = AIAnalyzer(fetcher, feature_builder=_builder(extractors, store), params=PARAMS)
+    CountingExtractor.reset()
+    second.add_ticker('AAA')
+    cnn_x, labels, _ = second.build_dataset()
+    assert store.hits >= 1 and CountingExtractor.rows < 600
+    assert len(labels) >= len(expected[1])
+    np.testing.assert_array_equal(labels[: len(expected[1])], expected[1])
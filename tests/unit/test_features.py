@@ -14,7 +14,7 @@ from strategy.ai_analysis.data_preparation.volume_features import VolumeFeatureE
 
 
 class TestVolatilityAdjustedLabels:
-    @patch('strategy.ai_analysis.data_preparation.market_features.yf')
+    @patch('data_fetch.market_context.yf')
     def test_fixed_vs_vol_adjusted_differ(self, mock_yf, synthetic_bars):
         mock_yf.Ticker.return_value.history.return_value = pd.DataFrame()
 
@@ -46,7 +46,7 @@ class TestVolatilityAdjustedLabels:
         assert labels_vol is not None
         assert not np.array_equal(labels_fixed, labels_vol)
 
-    @patch('strategy.ai_analysis.data_preparation.market_features.yf')
+    @patch('data_fetch.market_context.yf')
     def test_zero_atr_fallback(self, mock_yf, synthetic_bars):
         mock_yf.Ticker.return_value.history.return_value = pd.DataFrame()
 
@@ -68,6 +68,32 @@ class TestVolatilityAdjustedLabels:
         assert not np.isnan(labels).any()
 
 
+def _reference_market_features(df: pd.DataFrame, market: pd.DataFrame) -> pd.DataFrame:
+    """The original per-date mask loop, kept as the as-of join's reference."""
+    dates = pd.to_datetime(df['date']).dt.tz_localize(None)
+    market_sorted = market.sort_index()
+    spy_ma200 = market_sorted['spy_close'].rolling(window=200, min_periods=1).mean()
+    spy_return_50d = np.log(market_sorted['spy_close'] / market_sorted['spy_close'].shift(50))
+
+    rows = []
+    for d in dates:
+        mask = market_sorted.index <= d
+        if not mask.any():
+            rows.append((1.0, 0.0, 0.0))
+            continue
+        idx = market_sorted.index[mask][-1]
+        ma_val = spy_ma200.loc[idx]
+        spy_val = market_sorted.loc[idx, 'spy_close']
+        rows.append(
+            (
+                market_sorted.loc[idx, 'vix_close'] / 20.0,
+                spy_return_50d.loc[idx] if pd.notna(spy_return_50d.loc[idx]) else 0.0,
+                (spy_val / ma_val - 1.0) if pd.notna(ma_val) and ma_val > 0 else 0.0,
+            )
+        )
+    return pd.DataFrame(rows, columns=MarketFeatureExtractor.FEATURE_NAMES, index=df.index)
+
+
 class TestMarketFeatureExtractor:
     def test_feature_names(self):
         assert len(MarketFeatureExtractor.FEATURE_NAMES) == 3
@@ -94,3 +120,35 @@ class TestMarketFeatureExtractor:
         assert list(result.columns) == MarketFeatureExtractor.FEATURE_NAMES
         assert len(result) == len(synthetic_bars)
         assert (result['vix_normalized'] == 1.0).all()
+
+    def test_as_of_join_matches_reference_loop(self):
+        rng = np.random.default_rng(3)
+        # Market days with holes, unsorted, starting after the ticker's first bars
+        market_dates = pd.bdate_range('2021-03-01', periods=700)
+        market_dates = market_dates[rng.random(700) > 0.1]
+        market = pd.DataFrame(
+            {
+                'vix_close': rng.uniform(12, 35, len(market_dates)),
+                'spy_close': 400 * np.exp(np.cumsum(rng.normal(0, 0.01, len(market_dates)))),
+            },
+            index=market_dates,
+        ).sample(frac=1.0, random_state=1)
+
+        df = pd.DataFrame({'date': pd.date_range('2021-01-04 16:00', periods=800, freq='D', tz='America/New_York')})
+        result = MarketFeatureExtractor(market_data=market).extract(df)
+
+        pd.testing.assert_frame_equal(result, _reference_market_features(df, market), rtol=1e-12)
+        assert (result['vix_normalized'].iloc[:30] == 1.0).all()
+
+    def test_market_features_derived_once(self, synthetic_bars):
+        market = pd.DataFrame(
+            {'vix_close': np.full(300, 20.0), 'spy_close': np.linspace(400, 500, 300)}, index=pd.bdate_range('2022-01-01', periods=300)
+        )
+        extractor = MarketFeatureExtractor(market_data=market)
+        extractor.extract(synthetic_bars)
+        features = extractor._market_features(market)
+        extractor.extract(synthetic_bars)
+        assert extractor._market_features(market) is features
+        # A refreshed history is derived again; other extractors keep their own
+        assert extractor._market_features(market.copy()) is not features
+        assert MarketFeatureExtractor(market_data=market)._market_features(market) is not features
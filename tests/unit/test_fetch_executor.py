@@ -0,0 +1,87 @@
+"""Unit tests for the concurrent, rate-limited fetch executor."""
+
+import threading
+import time
+
+import pytest
+
+from data_fetch.fetch_executor import FetchExecutor, TokenBucket
+
+
+class TestTokenBucket:
+    def test_burst_then_rate_limited(self):
+        bucket = TokenBucket(rate=20.0, capacity=2)
+        start = time.monotonic()
+        for _ in range(4):
+            bucket.acquire()
+        elapsed = time.monotonic() - start
+        # Two tokens available immediately, the other two take ~1/20s each
+        assert elapsed >= 0.08
+
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0, capacity=1)
+
+
+class TestFetchExecutor:
+    def _executor(self, **kwargs):
+        defaults = dict(max_workers=4, requests_per_second=1000.0, burst=100, max_retries=2, backoff_seconds=0.01, timeout_seconds=1.0)
+        defaults.update(kwargs)
+        return FetchExecutor(**defaults)
+
+    def test_map_runs_concurrently_and_keeps_order(self):
+        executor = self._executor()
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        def task(i):
+            with lock:
+                in_flight.append(i)
+                peak.append(len(in_flight))
+            time.sleep(0.05)
+            with lock:
+                in_flight.remove(i)
+            return i * 10
+
+        results = executor.map((f'T{i}', lambda i=i: task(i)) for i in range(8))
+
+        assert results == [i * 10 for i in range(8)]
+        assert max(peak) > 1
+        assert max(peak) <= 4
+
+    def test_retries_then_succeeds(self):
+        executor = self._executor()
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError('throttled')
+            return 'ok'
+
+        assert executor.call('AAPL', flaky) == 'ok'
+        assert len(attempts) == 3
+        assert executor.stats.failures['AAPL'] == 2
+
+    def test_gives_up_after_max_retries(self):
+        executor = self._executor(max_retries=1)
+
+        def broken():
+            raise ConnectionError('down')
+
+        assert executor.call('MSFT', broken) is None
+        assert executor.stats.failures['MSFT'] == 2
+
+    def test_timeout_returns_none(self):
+        executor = self._executor(max_retries=0, timeout_seconds=0.05)
+        assert executor.map([('SLOW', lambda: time.sleep(0.5))]) == [None]
+        assert executor.stats.failures['SLOW'] == 1
+
+    def test_summary_reports_latency(self):
+        executor = self._executor()
+        executor.map([(['A', 'B'], lambda: time.sleep(0.02)), ('C', lambda: None)])
+        summary = executor.stats.summary()
+        assert summary['keys'] == 3
+        assert summary['failures'] == 0
+        assert summary['latency_p95'] >= summary['latency_p50'] >= 0
@@ -0,0 +1,78 @@
+"""Unit tests for batched multi-ticker downloads in StockDataFetcher."""
+
+import time
+from unittest.mock import patch
+
+import pandas as pd
+
+from data_fetch.bar_store import BarStore
+from data_fetch.historical_data import StockDataFetcher
+from tests.conftest import make_synthetic_bars
+
+
+def _yf_frame(symbols: list[str], n: int = 300) -> pd.DataFrame:
+    """Build a frame shaped like yf.download(..., group_by='ticker')."""
+    frames = {}
+    for sym in symbols:
+        bars = make_synthetic_bars(n, symbol=sym)
+        index = pd.DatetimeIndex(pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=n)).tz_localize('America/New_York')
+        frames[sym] = pd.DataFrame(
+            {
+                'Open': bars['open'].values,
+                'High': bars['high'].values,
+                'Low': bars['low'].values,
+                'Close': bars['close'].values,
+                'Volume': bars['volume'].values,
+            },
+            index=index,
+        )
+    return pd.concat(frames, axis=1)
+
+
+class TestBatchFetch:
+    @patch('data_fetch.providers.yf')
+    def test_batch_returns_normalized_frames(self, mock_yf):
+        mock_yf.download.return_value = _yf_frame(['AAA', 'BBB'])
+        fetcher = StockDataFetcher()
+
+        result = fetcher.get_historical_data_batch(['AAA', 'BBB', 'MISSING'], 250)
+
+        assert set(result) == {'AAA', 'BBB'}
+        for sym, df in result.items():
+            assert list(df.columns) == ['open', 'high', 'low', 'close', 'volume', 'date', 'symbol']
+            assert (df['symbol'] == sym).all()
+        assert mock_yf.download.call_count == 1
+
+    @patch('data_fetch.providers.yf')
+    def test_batch_chunks_requests(self, mock_yf):
+        mock_yf.download.side_effect = lambda chunk, **kwargs: _yf_frame(chunk, n=20)
+        fetcher = StockDataFetcher(config={'data': {'batch_size': 2}})
+
+        result = fetcher.get_historical_data_batch(['A', 'B', 'C', 'D', 'E'], 30)
+
+        assert len(result) == 5
+        assert mock_yf.download.call_count == 3
+
+    @patch('data_fetch.providers.yf')
+    def test_batch_uses_bar_store(self, mock_yf, tmp_path):
+        fetcher = StockDataFetcher(bar_store=BarStore(str(tmp_path)))
+        fresh = StockDataFetcher._normalize(_yf_frame(['FRESH'])['FRESH'], 'FRESH')
+        stale = StockDataFetcher._normalize(_yf_frame(['STALE'])['STALE'], 'STALE')
+        fetcher.bar_store.save('FRESH', fresh, history_start=fetcher._period_start('1y'))
+        fetcher.bar_store.save('STALE', stale, history_start=fetcher._period_start('1y'), fetched_at=time.time() - 3600)
+
+        def fake_download(chunk, **kwargs):
+            frame = _yf_frame(chunk)
+            if kwargs.get('start'):
+                frame = frame[frame.index >= pd.Timestamp(kwargs['start']).tz_localize('America/New_York')]
+            return frame
+
+        mock_yf.download.side_effect = fake_download
+        result = fetcher.get_historical_data_batch(['FRESH', 'STALE', 'COLD'], 250)
+
+        assert set(result) == {'FRESH', 'STALE', 'COLD'}
+        requested = [(tuple(call.args[0]), call.kwargs.get('start')) for call in mock_yf.download.call_args_list]
+        assert (('COLD',), None) in requested
+        assert any(chunk == ('STALE',) and start is not None for chunk, start in requested)
+        assert all('FRESH' not in chunk for chunk, _ in requested)
+        assert fetcher.bar_store.has('COLD')
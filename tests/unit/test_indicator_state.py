@@ -0,0 +1,106 @@
+"""Unit tests for the incremental 200 MA state."""
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from execution.risk_manager import RiskManager
+from strategy.retest_200ma.batch_scan import BatchPatternScanner
+from strategy.retest_200ma.indicator_state import IndicatorStateStore, MovingAverageState
+from tests.conftest import CONFIG, PARAMS, make_pattern_bars, make_synthetic_bars
+
+
+def _rolling_tail(df: pd.DataFrame, n: int = 30) -> np.ndarray:
+    return df['close'].rolling(200).mean().to_numpy()[-n:]
+
+
+class TestMovingAverageState:
+    def test_push_and_revise_track_rolling_mean(self):
+        closes = 100 + np.cumsum(np.random.default_rng(1).normal(0, 1, 3000))
+        state = MovingAverageState(200)
+        for day, close in enumerate(closes):
+            state.push(pd.Timestamp('2020-01-01') + pd.Timedelta(days=day), close + 5.0)
+            state.revise(close)
+
+        expected = pd.Series(closes).rolling(200).mean().to_numpy()[-30:]
+        np.testing.assert_allclose(state.ma_tail(), expected, rtol=1e-12)
+        np.testing.assert_allclose(state.closes(), closes[-200:])
+        assert state.slope(20) == pytest.approx((expected[-1] - expected[-21]) / expected[-21])
+
+    def test_from_closes_matches_pushes(self):
+        closes = make_synthetic_bars(260)['close'].to_numpy()
+        built = MovingAverageState.from_closes(closes, pd.Timestamp('2026-06-30'))
+        pushed = MovingAverageState(200)
+        for close in closes:
+            pushed.push(pd.Timestamp('2026-06-30'), close)
+        np.testing.assert_allclose(built.ma_tail(), pushed.ma_tail(), rtol=1e-12)
+
+    def test_not_enough_history_is_nan(self):
+        state = MovingAverageState.from_closes(np.arange(1.0, 50.0), pd.Timestamp('2026-06-30'))
+        assert np.isnan(state.ma_tail()).all()
+        assert state.slope(20) == 0.0
+
+
+class TestIndicatorStateStore:
+    def test_sync_is_incremental(self, tmp_path):
+        store = IndicatorStateStore(str(tmp_path / 'state.npz'))
+        df = make_synthetic_bars(300)
+
+        np.testing.assert_allclose(store.sync('AAA', df.iloc[:290]), _rolling_tail(df.iloc[:290]), rtol=1e-12)
+        assert store.rebuilds == 1
+
+        # Three new days, then today's bar revised intraday
+        np.testing.assert_allclose(store.sync('AAA', df.iloc[:293]), _rolling_tail(df.iloc[:293]), rtol=1e-12)
+        revised = df.iloc[:293].copy()
+        revised.loc[292, 'close'] += 1.5
+        np.testing.assert_allclose(store.sync('AAA', revised), _rolling_tail(revised), rtol=1e-12)
+        assert store.rebuilds == 1
+
+        # Dividend adjustment rescales the history: rebuild
+        adjusted = df.copy()
+        adjusted['close'] *= 0.99
+        np.testing.assert_allclose(store.sync('AAA', adjusted), _rolling_tail(adjusted), rtol=1e-12)
+        assert store.rebuilds == 2
+
+    def test_state_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'state.npz')
+        df = make_synthetic_bars(300)
+        df['date'] = pd.DatetimeIndex(df['date']).tz_localize('America/New_York')
+
+        store = IndicatorStateStore(path)
+        store.sync('AAA', df.iloc[:295])
+        store.save()
+
+        reloaded = IndicatorStateStore(path)
+        np.testing.assert_allclose(reloaded.sync('AAA', df), _rolling_tail(df), rtol=1e-12)
+        assert reloaded.rebuilds == 0
+
+    def test_changed_period_discards_saved_state(self, tmp_path):
+        path = str(tmp_path / 'state.npz')
+        store = IndicatorStateStore(path)
+        store.sync('AAA', make_synthetic_bars(300))
+        store.save()
+        assert IndicatorStateStore(path, period=100).get('AAA') is None
+
+    def test_from_config(self, tmp_path):
+        config = {'data': {'indicator_state': {'enabled': True, 'path': str(tmp_path / 's.npz')}}}
+        assert IndicatorStateStore.from_config(config, PARAMS).file_path == str(tmp_path / 's.npz')
+        assert IndicatorStateStore.from_config({'data': {}}, PARAMS) is None
+
+
+@patch.object(RiskManager, 'get_vix', lambda self: 20.0)
+def test_scanner_with_state_matches_full_recompute(tmp_path):
+    rng = np.random.default_rng(11)
+    frames = {f'T{i:03d}': make_pattern_bars(rng, f'T{i:03d}') for i in range(200)}
+    store = IndicatorStateStore(str(tmp_path / 'state.npz'))
+
+    # Warm the state one bar behind, as the previous scan would have left it
+    BatchPatternScanner(CONFIG, PARAMS, ma_state=store).scan_frames({s: df.iloc[:-1] for s, df in frames.items()})
+    with_state = BatchPatternScanner(CONFIG, PARAMS, ma_state=store).scan_frames(frames)
+    full = BatchPatternScanner(CONFIG, PARAMS).scan_frames(frames)
+
+    assert store.rebuilds == len(frames)
+    assert len(full) > 0
+    pd.testing.assert_frame_equal(with_state, full, check_exact=False, rtol=1e-9)
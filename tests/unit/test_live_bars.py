@@ -0,0 +1,106 @@
+"""Unit tests for intraday live-bar updates."""
+
+import math
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from data_fetch.bar_context import BarContext
+from data_fetch.historical_data import StockDataFetcher
+from data_fetch.live_bars import LiveBarUpdater
+from tests.conftest import make_synthetic_bars
+
+
+def _bars(n: int = 300, symbol: str = 'AAA') -> pd.DataFrame:
+    df = make_synthetic_bars(n, symbol=symbol)
+    df['date'] = df['date'].dt.tz_localize('America/New_York')
+    return df
+
+
+def _quote(close=101.0, high=102.0, low=99.0, open_=100.0, volume=12345.0):
+    return {'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}
+
+
+def _fake_ib(prices: dict[str, float]):
+    ib = MagicMock()
+    ib.qualifyContracts.side_effect = lambda *contracts: list(contracts)
+
+    def req_tickers(*contracts):
+        return [
+            SimpleNamespace(contract=c, marketPrice=lambda p=prices[c.symbol]: p, open=math.nan, high=math.nan, low=math.nan, volume=50.0)
+            for c in contracts
+            if c.symbol in prices
+        ]
+
+    ib.reqTickers.side_effect = req_tickers
+    return ib
+
+
+class TestApply:
+    def test_same_day_overwrites_last_row_of_a_new_frame(self):
+        df = _bars()
+        before = df.copy()
+        today = pd.Timestamp(df['date'].iloc[-1])
+        out = LiveBarUpdater.apply(df, _quote(), today + pd.Timedelta(hours=11))
+
+        pd.testing.assert_frame_equal(df, before)  # frames handed out earlier keep their bar
+        assert len(out) == 300
+        assert out['close'].iloc[-1] == 101.0
+        assert out['high'].iloc[-1] == 102.0
+        assert out['volume'].iloc[-1] == 12345
+
+    def test_new_day_appends_one_row(self):
+        df = _bars()
+        today = pd.Timestamp(df['date'].iloc[-1]) + pd.Timedelta(days=1, hours=10)
+        out = LiveBarUpdater.apply(df, _quote(), today)
+
+        assert len(out) == 301
+        assert out['date'].iloc[-1] == today.normalize()
+        assert out['symbol'].iloc[-1] == 'AAA'
+        assert out.dtypes.equals(df.dtypes)
+
+        # A second quote the same day overwrites the appended row
+        again = LiveBarUpdater.apply(out, _quote(close=103.0, high=104.0), today + pd.Timedelta(hours=1))
+        assert len(again) == 301
+        assert again['close'].iloc[-1] == 103.0
+
+    def test_missing_session_range_extends_cached_bar(self):
+        df = _bars()
+        prev_high = df['high'].iloc[-1]
+        quote = _quote(close=prev_high + 5, high=math.nan, low=math.nan, volume=None)
+        out = LiveBarUpdater.apply(df, quote, pd.Timestamp(df['date'].iloc[-1]))
+
+        assert out['high'].iloc[-1] == prev_high + 5
+        assert out['close'].iloc[-1] == prev_high + 5
+
+
+class TestUpdate:
+    def test_patches_only_loaded_symbols_without_refetch(self):
+        fetcher = StockDataFetcher()
+        fetches = []
+
+        def fake_batch(symbols, lookback_days):
+            fetches.append(tuple(symbols))
+            return {s: _bars(symbol=s) for s in symbols}
+
+        fetcher.get_historical_data_batch = fake_batch
+        context = BarContext(fetcher, {'strategy': 250})
+        context.load(['AAA', 'BBB'])
+        today = pd.Timestamp(context.frame('AAA')['date'].iloc[-1])
+
+        held = context.get('AAA', 'strategy')
+
+        updater = LiveBarUpdater(_fake_ib({'AAA': 55.0, 'BBB': 66.0, 'CCC': 77.0}))
+        assert updater.update(context, ['AAA', 'BBB', 'CCC'], today) == 2
+        context.load(['AAA', 'BBB'])
+        assert held['close'].iloc[-1] != 55.0  # a view taken before the update is a snapshot
+
+        assert fetches == [('AAA', 'BBB')]
+        assert context.get('AAA', 'strategy')['close'].iloc[-1] == 55.0
+        assert context.get('BBB', 'strategy')['volume'].iloc[-1] == 5000
+
+    def test_from_config(self):
+        assert LiveBarUpdater.from_config(MagicMock(), {'data': {}}) is None
+        assert LiveBarUpdater.from_config(None, {'data': {'live_bars': {'enabled': True}}}) is None
+        assert LiveBarUpdater.from_config(MagicMock(), {'data': {'live_bars': {'enabled': True, 'batch_size': 10}}}).batch_size == 10
@@ -0,0 +1,208 @@
+"""Unit tests for the shared VIX/SPY market context."""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_fetch.market_context import MarketContext, configure_market_context, get_market_context
+from execution.risk_manager import RiskManager
+from strategy.ai_analysis.data_preparation.market_features import MarketFeatureExtractor
+from strategy.ai_analysis.retrain_trigger import RetrainTrigger
+from tests.conftest import PARAMS
+
+
+def _fake_yf(prices: dict[str, float], delay: float = 0.0) -> MagicMock:
+    yf = MagicMock()
+    calls: list[str] = []
+
+    def ticker(symbol):
+        calls.append(symbol)
+        time.sleep(delay)
+        t = MagicMock()
+        t.fast_info = {'lastPrice': prices[symbol]}
+        dates = pd.date_range('2026-01-01', periods=5, tz='America/New_York')
+        t.history.return_value = pd.DataFrame({'Close': np.full(5, prices[symbol])}, index=dates)
+        return t
+
+    yf.Ticker.side_effect = ticker
+    yf.calls = calls
+    return yf
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMarketContext:
+    def test_quotes_are_cached_for_ttl(self, tmp_path):
+        clock = Clock()
+        context = MarketContext(str(tmp_path), quote_ttl_seconds=300, clock=clock)
+        yf = _fake_yf({'^VIX': 18.0, 'SPY': 500.0})
+        with patch('data_fetch.market_context.yf', yf):
+            assert context.vix() == 18.0
+            clock.now = 299
+            assert context.vix() == 18.0
+            assert yf.calls == ['^VIX']
+            clock.now = 301
+            context.vix()
+        assert yf.calls == ['^VIX', '^VIX']
+
+    def test_concurrent_requests_share_one_fetch(self, tmp_path):
+        context = MarketContext(str(tmp_path))
+        yf = _fake_yf({'^VIX': 22.0}, delay=0.2)
+        results = []
+        with patch('data_fetch.market_context.yf', yf):
+            threads = [threading.Thread(target=lambda: results.append(context.vix())) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert results == [22.0] * 8
+        assert yf.calls == ['^VIX']
+
+    def test_falls_back_to_disk_after_restart(self, tmp_path):
+        with patch('data_fetch.market_context.yf', _fake_yf({'^VIX': 31.0, 'SPY': 480.0})):
+            first = MarketContext(str(tmp_path))
+            first.vix()
+            history = first.history()
+
+        broken = MagicMock()
+        broken.Ticker.side_effect = ConnectionError('offline')
+        with patch('data_fetch.market_context.yf', broken):
+            restarted = MarketContext(str(tmp_path))
+            assert restarted.vix() == 31.0
+            pd.testing.assert_frame_equal(restarted.history(), history, check_freq=False)
+
+    def test_failure_is_not_retried_until_retry_interval(self, tmp_path):
+        clock = Clock()
+        context = MarketContext(str(tmp_path), retry_seconds=60, clock=clock)
+        broken = MagicMock()
+        broken.Ticker.side_effect = ConnectionError('offline')
+        with patch('data_fetch.market_context.yf', broken):
+            assert context.vix() is None
+            assert context.vix() is None
+            assert broken.Ticker.call_count == 1
+            clock.now = 61
+            context.vix()
+        assert broken.Ticker.call_count == 2
+
+
+class TestConsumersShareContext:
+    def test_one_vix_request_across_modules(self, tmp_path):
+        configure_market_context(context=MarketContext(str(tmp_path)))
+        yf = _fake_yf({'^VIX': 26.0, 'SPY': 450.0})
+        with patch('data_fetch.market_context.yf', yf):
+            for _ in range(20):
+                assert RiskManager(PARAMS).get_vix() == 26.0
+            trigger = RetrainTrigger()
+            trigger.snapshot_market()
+            assert trigger.check_regime_shift() is False
+            MarketFeatureExtractor()._fetch_market_data()
+            MarketFeatureExtractor()._fetch_market_data()
+
+        assert trigger._train_vix == 26.0
+        assert yf.calls.count('^VIX') == 2  # one quote + one history download
+        assert get_market_context().requests == 3
+
+    def test_risk_manager_defaults_when_unavailable(self):
+        broken = MagicMock()
+        broken.Ticker.side_effect = ConnectionError('offline')
+        with patch('data_fetch.market_context.yf', broken):
+            assert RiskManager(PARAMS).get_vix() == pytest.approx(20.0)
+
+
+class _HistoryYf:
+    """yfinance stand-in serving daily closes from fixed series, honouring `start` / `period`."""
+
+    def __init__(self, days: int = 600):
+        self.dates = pd.bdate_range(end='2026-06-30', periods=days, tz='America/New_York')
+        self.closes = {'^VIX': np.linspace(15, 25, days), 'SPY': np.linspace(400, 500, days)}
+        self.requests: list[dict] = []
+        self.Ticker = self._ticker
+
+    def _ticker(self, symbol):
+        ticker = MagicMock()
+
+        def history(**kwargs):
+            self.requests.append({'symbol': symbol, **kwargs})
+            frame = pd.DataFrame({'Close': self.closes[symbol]}, index=self.dates)
+            if 'start' in kwargs:
+                frame = frame[frame.index.tz_localize(None) >= kwargs['start']]
+            return frame
+
+        ticker.history.side_effect = history
+        return ticker
+
+    def extend(self, days: int) -> None:
+        self.dates = pd.bdate_range(start=self.dates[0], periods=len(self.dates) + days, tz='America/New_York')
+        for symbol, closes in self.closes.items():
+            self.closes[symbol] = np.concatenate([closes, closes[-1] + np.arange(1, days + 1)])
+
+
+class TestIncrementalHistory:
+    def test_refresh_fetches_only_new_days(self, tmp_path):
+        yf = _HistoryYf()
+        clock = Clock()
+        context = MarketContext(str(tmp_path), history_ttl_seconds=60, clock=clock)
+        with patch('data_fetch.market_context.yf', yf):
+            first = context.history()
+            assert [r.get('period') for r in yf.requests] == ['10y', '10y']
+
+            yf.extend(3)
+            clock.now = 61
+            refreshed = context.history()
+
+        assert all('start' in r for r in yf.requests[2:])
+        assert len(refreshed) == len(first) + 3
+        np.testing.assert_allclose(refreshed['spy_close'].to_numpy()[-4:], 500 + np.arange(4))
+        pd.testing.assert_frame_equal(refreshed.iloc[: len(first)], first, check_freq=False)
+
+    def test_refresh_after_restart_starts_from_saved_history(self, tmp_path):
+        yf = _HistoryYf()
+        with patch('data_fetch.market_context.yf', yf):
+            MarketContext(str(tmp_path)).history()
+            yf.extend(2)
+            yf.requests.clear()
+            history = MarketContext(str(tmp_path)).history()
+        assert all('start' in r for r in yf.requests)
+        assert history.index[-1] == pd.Timestamp('2026-07-02')
+
+    def test_adjusted_past_closes_trigger_full_download(self, tmp_path):
+        yf = _HistoryYf()
+        clock = Clock()
+        context = MarketContext(str(tmp_path), history_ttl_seconds=60, clock=clock)
+        with patch('data_fetch.market_context.yf', yf):
+            context.history()
+            yf.closes['SPY'] = yf.closes['SPY'] * 0.99  # dividend adjustment
+            yf.extend(1)
+            yf.requests.clear()
+            clock.now = 61
+            history = context.history()
+        assert [r.get('period') for r in yf.requests] == [None, None, '10y', '10y']
+        np.testing.assert_allclose(history['spy_close'].to_numpy()[:-1], yf.closes['SPY'][:-1])
+
+
+def test_bot_injects_one_context_into_every_sector_analyzer(tmp_path):
+    from core.bot import TradingBot
+
+    context = MarketContext(str(tmp_path))
+    bot = TradingBot.__new__(TradingBot)
+    bot.params = PARAMS
+    bot.config = {'data': {'feature_store': {'enabled': True, 'path': str(tmp_path / 'features')}}}
+    stock_fetcher = MagicMock(categorized_stocks={'Tech': [], 'Energy': [], 'Health': []})
+    analyzers = bot.sectored_ai_objects(MagicMock(), stock_fetcher, context)
+
+    extractors = [e for a in analyzers.values() for e in a.feature_builder.extractors if isinstance(e, MarketFeatureExtractor)]
+    assert len(extractors) == 3
+    assert all(e._context is context for e in extractors)
+    stores = {id(a.feature_builder.feature_store) for a in analyzers.values()}
+    assert len(stores) == 1 and None not in [a.feature_builder.feature_store for a in analyzers.values()]
+    assert len({id(a.feature_builder.feature_cache) for a in analyzers.values()}) == 1
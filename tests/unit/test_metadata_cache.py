@@ -0,0 +1,66 @@
+"""Unit tests for the ticker metadata cache used by StockTickerFetcher."""
+
+import time
+from unittest.mock import patch
+
+from data_fetch.fetch_executor import FetchExecutor
+from data_fetch.metadata_cache import TickerMetadataCache
+from data_fetch.stock_fetcher import StockTickerFetcher
+
+
+class TestTickerMetadataCache:
+    def test_persists_between_instances(self, tmp_path):
+        path = str(tmp_path / 'meta.json')
+        cache = TickerMetadataCache(path)
+        cache.set('AAPL', 'Technology', 'Consumer Electronics')
+        cache.save()
+
+        reloaded = TickerMetadataCache(path)
+        assert reloaded.get('AAPL')['sector'] == 'Technology'
+        assert reloaded.stale_symbols(['AAPL', 'MSFT']) == ['MSFT']
+
+    def test_expired_entries_are_stale(self, tmp_path):
+        cache = TickerMetadataCache(str(tmp_path / 'meta.json'), ttl_days=1)
+        cache.set('AAPL', 'Technology', 'Consumer Electronics')
+        cache._entries['AAPL']['fetched_at'] = time.time() - 2 * 86400
+        assert cache.stale_symbols(['AAPL']) == ['AAPL']
+
+
+class TestCategorizeStocks:
+    def _fetcher(self, tmp_path, tickers):
+        executor = FetchExecutor(requests_per_second=1000.0, burst=100, max_retries=0, timeout_seconds=5.0)
+        cache = TickerMetadataCache(str(tmp_path / 'meta.json'))
+        with patch.object(StockTickerFetcher, 'save_stock_list', return_value=tickers):
+            with patch.object(StockTickerFetcher, 'categorize_stocks', return_value={}):
+                fetcher = StockTickerFetcher(executor=executor, metadata_cache=cache)
+        return fetcher
+
+    @patch('data_fetch.stock_fetcher.yf')
+    def test_only_missing_symbols_are_looked_up(self, mock_yf, tmp_path):
+        fetcher = self._fetcher(tmp_path, ['AAPL', 'XOM'])
+        fetcher.metadata_cache.set('AAPL', 'Technology', 'Consumer Electronics')
+        mock_yf.Ticker.return_value.info = {'sector': 'Energy', 'industry': 'Oil & Gas'}
+
+        categorized = fetcher.categorize_stocks()
+
+        mock_yf.Ticker.assert_called_once_with('XOM')
+        assert categorized == {
+            'Technology': {'Consumer Electronics': ['AAPL']},
+            'Energy': {'Oil & Gas': ['XOM']},
+        }
+        assert TickerMetadataCache(fetcher.metadata_cache.file_path).get('XOM') is not None
+
+    @patch('data_fetch.stock_fetcher.yf')
+    def test_warm_cache_makes_no_requests(self, mock_yf, tmp_path):
+        fetcher = self._fetcher(tmp_path, ['AAPL'])
+        fetcher.metadata_cache.set('AAPL', 'Technology', 'Consumer Electronics')
+
+        fetcher.categorize_stocks()
+        mock_yf.Ticker.assert_not_called()
+
+    @patch('data_fetch.stock_fetcher.yf')
+    def test_failed_lookup_skips_ticker(self, mock_yf, tmp_path):
+        fetcher = self._fetcher(tmp_path, ['BAD'])
+        mock_yf.Ticker.side_effect = Exception('404')
+
+        assert fetcher.categorize_stocks() == {}
@@ -0,0 +1,114 @@
+"""Unit tests for the streaming (online) feature extraction."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategy.ai_analysis.data_preparation.feature_builder import FeatureBuilder
+from strategy.ai_analysis.data_preparation.online_features import MAX_CATCH_UP, _Ewm
+from strategy.ai_analysis.data_preparation.price_features import PriceFeatureExtractor
+from strategy.ai_analysis.data_preparation.volume_features import VolumeFeatureExtractor
+from tests.conftest import make_feature_extractors, make_synthetic_bars
+
+
+def _bars(n: int = 700) -> pd.DataFrame:
+    df = make_synthetic_bars(n, 'AAA')
+    df.loc[n - 150, 'volume'] = 0.0  # NaN volume features for the next 50 days
+    return df
+
+
+def _builder(df: pd.DataFrame) -> FeatureBuilder:
+    return FeatureBuilder(extractors=make_feature_extractors(df['date']), feature_cache_mb=0)
+
+
+def _assert_row(row: np.ndarray, expected: pd.Series) -> None:
+    np.testing.assert_allclose(row, expected.replace([np.inf, -np.inf], np.nan).to_numpy(), rtol=1e-7, atol=1e-12, equal_nan=True)
+
+
+class TestEwm:
+    def test_matches_pandas_with_gaps(self):
+        values = pd.Series(np.random.default_rng(1).normal(size=80))
+        values[[0, 1, 30, 31, 32, 60]] = np.nan
+        expected = values.ewm(alpha=0.2, adjust=False, min_periods=5).mean().to_numpy()
+
+        streamed = _Ewm(0.2, 5)
+        np.testing.assert_allclose([streamed.update(x) for x in values], expected, rtol=1e-12, equal_nan=True)
+
+        resumed = _Ewm.from_series(values[:31], 0.2, 5)
+        np.testing.assert_allclose([resumed.update(x) for x in values[31:]], expected[31:], rtol=1e-12, equal_nan=True)
+
+
+class TestOnlineFeatureEngine:
+    def test_streamed_rows_match_batch(self):
+        df = _bars()
+        fb = _builder(df)
+        batch = fb.build_continuous_features(df)
+        for k in range(300, len(df) + 1):
+            _assert_row(fb.online.sync('AAA', df.iloc[:k]), batch.iloc[k - 1])
+        assert fb.online.rebuilds == 1
+
+    def test_revised_last_bar_is_refed(self):
+        df = _bars()
+        fb = _builder(df)
+        fb.online.sync('AAA', df.iloc[:500])
+
+        revised = df.iloc[:501].copy()
+        revised.loc[500, ['close', 'high', 'volume']] = [revised.at[500, 'close'] * 1.03, revised.at[500, 'high'] * 1.03, 9e6]
+        _assert_row(fb.online.sync('AAA', revised), fb.build_continuous_features(revised).iloc[-1])
+        _assert_row(fb.online.sync('AAA', revised), fb.build_continuous_features(revised).iloc[-1])
+
+        extended = pd.concat([revised, df.iloc[501:503]])
+        _assert_row(fb.online.sync('AAA', extended), fb.build_continuous_features(extended).iloc[-1])
+        assert fb.online.rebuilds == 1
+
+    @pytest.mark.parametrize(
+        'change',
+        [
+            lambda df: df.iloc[: 500 + MAX_CATCH_UP + 5],  # too many new bars
+            lambda df: df.iloc[:501].assign(close=df['close'] * 0.98),  # dividend-adjusted history
+        ],
+    )
+    def test_history_that_no_longer_lines_up_is_rebuilt(self, change):
+        df = _bars()
+        fb = _builder(df)
+        fb.online.sync('AAA', df.iloc[:500])
+        changed = change(df)
+        _assert_row(fb.online.sync('AAA', changed), fb.build_continuous_features(changed).iloc[-1])
+        assert fb.online.rebuilds == 2
+
+    def test_recent_rows_are_the_newest_valid_rows(self):
+        df = _bars()
+        fb = _builder(df)
+        end = len(df) - 140  # the zero-volume bar and 9 days of NaN volume averages
+        fb.online.sync('AAA', df.iloc[: end - 3])
+        for k in range(end - 2, end + 1):
+            fb.online.sync('AAA', df.iloc[:k])
+
+        valid = fb.build_continuous_features(df.iloc[:end]).dropna()
+        np.testing.assert_allclose(fb.online.recent_rows('AAA'), valid.to_numpy()[-fb.online.rows_kept :], rtol=1e-7, atol=1e-12)
+
+
+class TestLatestWindow:
+    def test_matches_build_windows(self):
+        df = _bars()
+        fb = _builder(df)
+        fb.fit_bin_edges([fb.build_continuous_features(df)])
+        for k in [300, *range(450, 480), len(df)]:
+            _, cnn_x, _ = fb.build_windows(df.iloc[:k], include_labels=False, lazy=True)
+            np.testing.assert_allclose(fb.latest_window(df.iloc[:k], 'AAA'), cnn_x[-1:], rtol=1e-5, atol=1e-6)
+
+    def test_too_few_valid_rows(self):
+        df = _bars()
+        fb = _builder(df)
+        assert fb.latest_window(df.iloc[:205], 'AAA') is None
+
+    def test_unsupported_extractors_use_the_batch_path(self):
+        class ScaledPrice(PriceFeatureExtractor):
+            def extract(self, df):
+                return super().extract(df) * 2.0
+
+        df = _bars()
+        fb = FeatureBuilder(extractors=[ScaledPrice(), VolumeFeatureExtractor()])
+        assert fb.online is None
+        _, cnn_x, _ = fb.build_windows(df, include_labels=False, lazy=True)
+        np.testing.assert_array_equal(fb.latest_window(df, 'AAA'), cnn_x[-1:])
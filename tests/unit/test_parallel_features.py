@@ -0,0 +1,104 @@
+"""Unit tests for feature extraction on a process pool."""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategy.ai_analysis.ai_analyzer import AIAnalyzer
+from strategy.ai_analysis.data_preparation.feature_builder import FeatureBuilder
+from strategy.ai_analysis.data_preparation.parallel_features import extract_parallel, extraction_pool
+from strategy.ai_analysis.data_preparation.price_features import PriceFeatureExtractor
+from strategy.ai_analysis.data_preparation.volume_features import VolumeFeatureExtractor
+from tests.conftest import PARAMS, CountingExtractor, make_feature_extractors, make_pattern_bars
+
+
+def _frames(n_tickers: int = 6) -> dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(3)
+    frames = {f'T{i}': make_pattern_bars(rng, f'T{i}', n=260 + 40 * i) for i in range(n_tickers)}
+    frames['T1']['date'] = pd.DatetimeIndex(frames['T1']['date']).tz_localize('America/New_York')
+    return frames
+
+
+def _extractors(frames: dict[str, pd.DataFrame]) -> list:
+    return make_feature_extractors(sorted({d for df in frames.values() for d in pd.DatetimeIndex(df['date']).tz_localize(None)}))
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_matches_serial_extraction(workers, tmp_path):
+    frames = _frames()
+    frames['BAD'] = frames['T0'].drop(columns=['volume'])
+    extractors = _extractors(frames)
+    serial = FeatureBuilder(extractors=extractors, feature_cache_mb=0)
+
+    result = extract_parallel(extractors, frames, workers=workers, scratch_dir=str(tmp_path))
+
+    assert list(result) == [f'T{i}' for i in range(6)]
+    for symbol, features in result.items():
+        pd.testing.assert_frame_equal(features, serial.build_continuous_features(frames[symbol]))
+    assert list(tmp_path.iterdir()) == []  # scratch arrays removed
+
+
+class StrictPrice(PriceFeatureExtractor):
+    # Module level: pool workers start from a fresh interpreter and unpickle it by name
+    def extract(self, df):
+        if len(df) > 300:
+            raise ValueError('too long')
+        return super().extract(df)
+
+
+def test_rejected_bars_are_left_out():
+    frames = _frames(4)
+    result = extract_parallel([StrictPrice(), VolumeFeatureExtractor()], frames, workers=2)
+    assert sorted(result) == ['T0', 'T1']
+
+
+def test_builder_caches_parallel_results():
+    CountingExtractor.reset()
+    frames = _frames(3)
+    fb = FeatureBuilder(extractors=[CountingExtractor(), VolumeFeatureExtractor()])
+
+    features = fb.build_continuous_features_parallel(frames, workers=2)
+    assert CountingExtractor.calls == 0  # extracted in the pool processes
+    for symbol, df in frames.items():
+        assert fb.build_continuous_features(df) is features[symbol]
+        fb.build_windows(df)
+    assert CountingExtractor.calls == 0
+
+    again = fb.build_continuous_features_parallel(frames, workers=2)
+    assert all(again[s] is features[s] for s in frames)
+
+
+def test_add_tickers():
+    frames = _frames(4)
+    frames['SHORT'] = frames['T0'].iloc[:100]
+    fetcher = MagicMock()
+    fetcher.get_historical_data_batch.side_effect = lambda symbols, lookback_days: {s: frames[s] for s in symbols}
+    analyzer = AIAnalyzer(fetcher, feature_builder=FeatureBuilder(extractors=_extractors(frames)), params=PARAMS)
+
+    assert analyzer.add_tickers(['T0', 'T1', 'SHORT', 'T2', 'T3', 'T0'], workers=2) == 4
+    assert analyzer._kept_tickers == ['T0', 'T1', 'T2', 'T3']
+    serial = FeatureBuilder(extractors=analyzer.feature_builder.extractors, feature_cache_mb=0)
+    pd.testing.assert_frame_equal(analyzer._continuous_per_ticker[2], serial.build_continuous_features(frames['T2']))
+
+
+def test_one_pool_serves_every_call():
+    assert extraction_pool(1) is None
+    frames = _frames(4)
+    extractors = _extractors(frames)
+    serial = FeatureBuilder(extractors=extractors, feature_cache_mb=0)
+    fetcher = MagicMock()
+    fetcher.get_historical_data_batch.side_effect = lambda symbols, lookback_days: {s: frames[s] for s in symbols}
+    analyzers = [AIAnalyzer(fetcher, feature_builder=FeatureBuilder(extractors=extractors), params=PARAMS) for _ in range(2)]
+
+    pool = extraction_pool(2)
+    try:
+        assert analyzers[0].add_tickers(['T0', 'T1'], workers=2, pool=pool) == 2
+        assert analyzers[1].add_tickers(['T2', 'T3'], workers=2, pool=pool) == 2
+        workers = set(pool._processes)
+        extract_parallel(extractors, {'T0': frames['T0']}, workers=2, pool=pool)
+        assert workers and workers <= set(pool._processes)  # the same processes serve the next call
+    finally:
+        pool.shutdown()
+    pd.testing.assert_frame_equal(analyzers[1]._continuous_per_ticker[1], serial.build_continuous_features(frames['T3']))
@@ -0,0 +1,104 @@
+"""Unit tests for the 200MA parameter sweep."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_fetch.bar_store import BarStore
+from data_fetch.price_panel import PricePanel
+from strategy.retest_200ma.batch_scan import BatchPatternScanner
+from strategy.retest_200ma.param_sweep import ParameterSweep, grid, random_configs, score_signals
+from tests.conftest import CONFIG, PARAMS, make_pattern_history
+
+SPACE = {'min_breakout_volume': [1.2, 1.7], 'ATR': [1.0, 2.0]}
+
+
+@pytest.fixture(scope='module')
+def panel_root(tmp_path_factory):
+    root = tmp_path_factory.mktemp('sweep')
+    store = BarStore(str(root / 'bars'))
+    symbols = []
+    for seed in (3, 4, 6, 7):
+        df = make_pattern_history(seed, segments=6)
+        df['symbol'] = f'S{seed}'
+        store.save(f'S{seed}', df, history_start=pd.Timestamp('2000-01-01'))
+        symbols.append(f'S{seed}')
+    PricePanel.build(store, symbols, root=str(root / 'panel'))
+    return str(root / 'panel')
+
+
+def test_grid_and_random_configs():
+    assert grid(SPACE) == [
+        {'min_breakout_volume': 1.2, 'ATR': 1.0},
+        {'min_breakout_volume': 1.2, 'ATR': 2.0},
+        {'min_breakout_volume': 1.7, 'ATR': 1.0},
+        {'min_breakout_volume': 1.7, 'ATR': 2.0},
+    ]
+    drawn = random_configs(SPACE, 10)
+    assert len(drawn) == 4
+    assert sorted(drawn, key=lambda c: tuple(c.values())) == grid(SPACE)
+    assert random_configs(SPACE, 2, seed=1) == random_configs(SPACE, 2, seed=1)
+
+
+def test_score_signals():
+    high = np.array([10.0, 10.5, 11.0, 12.5, 10.0, 10.0])
+    low = np.array([9.5, 9.8, 9.0, 10.5, 9.0, 9.5])
+    close = np.array([10.0, 10.2, 10.0, 12.0, 9.5, 9.8])
+    hits = pd.DataFrame(
+        {
+            'type': ['LONG', 'LONG', 'SHORT', 'LONG'],
+            'entry': [10.0, 10.0, 10.0, 9.8],
+            'stop': [9.6, 9.4, 12.6, 9.0],
+            'target': [10.8, 11.2, 8.0, 11.4],
+        }
+    )
+    r, outcome = score_signals(hits, np.array([0, 2, 0, 5]), np.full(4, 5), high, low, close, horizon=3, rr=2.0)
+    # Stop and target on the same bar counts as the stop; target on bar 3; neither (marked
+    # at bar 3's close); nothing after the last bar
+    np.testing.assert_array_equal(outcome[:3], [-1, 1, 0])
+    np.testing.assert_allclose(r[:3], [-1.0, 2.0, (10.0 - 12.0) / 2.6])
+    assert np.isnan(r[3])
+
+    # A ticker ending at bar 2: bar 3 belongs to the next one and is not followed
+    hit = pd.DataFrame({'type': ['LONG'], 'entry': [10.2], 'stop': [8.5], 'target': [12.0]})
+    r, outcome = score_signals(hit, np.array([1]), np.array([2]), high, low, close, horizon=3, rr=2.0)
+    assert outcome[0] == 0
+    assert r[0] == pytest.approx((10.0 - 10.2) / 1.7)
+
+    # Panel days without a bar are skipped; the mark is the last close before the horizon
+    gap = np.array([10.0, np.nan, 10.4, np.nan])
+    hit = pd.DataFrame({'type': ['LONG'], 'entry': [10.0], 'stop': [9.0], 'target': [12.0]})
+    r, outcome = score_signals(hit, np.array([0]), np.array([3]), gap, gap, gap, horizon=3, rr=2.0)
+    assert outcome[0] == 0
+    assert r[0] == pytest.approx(0.4)
+
+
+class TestParameterSweep:
+    def test_pool_matches_single_process(self, panel_root, tmp_path):
+        single = ParameterSweep(CONFIG, PARAMS, panel_root, workers=1, min_trades=1, vix=20.0).run(grid(SPACE), str(tmp_path / 'a'))
+        pooled = ParameterSweep(CONFIG, PARAMS, panel_root, workers=2, min_trades=1, vix=20.0).run(grid(SPACE), str(tmp_path / 'b'))
+
+        pd.testing.assert_frame_equal(single, pooled)
+        assert list(single['rank']) == [1, 2, 3, 4]
+        assert single['expectancy_r'].is_monotonic_decreasing
+        assert (single['wins'] + single['losses'] + single['open'] == single['trades']).all()
+
+        written = pd.read_csv(next((tmp_path / 'a').glob('param_sweep_*.csv')))
+        pd.testing.assert_frame_equal(written, single, check_dtype=False)
+
+    def test_trades_are_walk_through_signals(self, panel_root, tmp_path):
+        table = ParameterSweep(CONFIG, PARAMS, panel_root, workers=1, vix=20.0).run([{}], str(tmp_path))
+
+        panel = PricePanel.open(panel_root)
+        scanner = BatchPatternScanner(CONFIG, PARAMS)
+        expected = 0
+        for symbol in panel.symbols:
+            df = panel.frame(symbol)
+            hits = scanner.walk_through(df, vix=20.0)
+            expected += int((hits['current_date'] != df['date'].iloc[-1]).sum())
+        assert expected > 0
+        assert table['trades'].iloc[0] == expected
+
+    def test_unknown_parameter(self, panel_root, tmp_path):
+        with pytest.raises(ValueError, match='min_breakout_volumes'):
+            ParameterSweep(CONFIG, PARAMS, panel_root, workers=1, vix=20.0).run([{'min_breakout_volumes': 2.0}], str(tmp_path))
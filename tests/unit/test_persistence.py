@@ -0,0 +1,105 @@
+"""Unit tests for the SQLite persistence layer."""
+
+import json
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from data_fetch.persistence import PersistenceStore
+from execution.position_manager import PositionManager
+from tests.conftest import CONFIG, PARAMS
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PersistenceStore(str(tmp_path / 'bot.db'))
+    yield store
+    store.close()
+
+
+class TestPersistenceStore:
+    def test_signals_and_predictions_roundtrip(self, store):
+        store.record_signal({'symbol': 'AAPL', 'strategy_type': '200ma_retest', 'type': 'LONG', 'entry': 100.0, 'stop': 97.0, 'target': 106.0})
+        store.record_signal({'symbol': 'MSFT', 'strategy_type': 'ai_analysis', 'type': 'SHORT', 'entry': 50.0, 'stop': 52.0, 'target': 46.0})
+        store.record_prediction({'symbol': 'AAPL', 'class': 'LONG', 'probs': {'SHORT': 0.1, 'FLAT': 0.1, 'LONG': 0.8}})
+        store.flush()
+
+        assert len(store.signals()) == 2
+        aapl = store.signals('AAPL')
+        assert aapl['type'].tolist() == ['LONG']
+        assert json.loads(aapl['payload'].iloc[0])['target'] == 106.0
+        assert store.predictions('AAPL')['prob_long'].iloc[0] == pytest.approx(0.8)
+
+    def test_signal_payload_serializes_timestamps(self, store):
+        store.record_signal({'symbol': 'AAPL', 'type': 'LONG', 'breakout_date': pd.Timestamp('2026-06-01')})
+        store.flush()
+        assert json.loads(store.signals('AAPL')['payload'].iloc[0])['breakout_date'].startswith('2026-06-01')
+
+    def test_positions_upsert_and_delete(self, store):
+        store.upsert_position('AAPL', {'strategy_type': 'ai_analysis', 'type': 'LONG', 'shares': 10})
+        store.upsert_position('AAPL', {'strategy_type': 'ai_analysis', 'type': 'LONG', 'shares': 20})
+        store.upsert_position('MSFT', {'strategy_type': 'ai_analysis', 'type': 'SHORT', 'shares': 5})
+        store.delete_position('MSFT')
+        store.flush()
+
+        assert store.positions() == {'AAPL': {'strategy_type': 'ai_analysis', 'type': 'LONG', 'shares': 20}}
+
+    def test_from_config_respects_enabled_flag(self, tmp_path):
+        assert PersistenceStore.from_config({'data': {}}) is None
+        store = PersistenceStore.from_config({'data': {'persistence': {'enabled': True, 'path': str(tmp_path / 'cfg.db')}}})
+        try:
+            assert store.db_path == str(tmp_path / 'cfg.db')
+        finally:
+            store.close()
+
+
+class TestPositionManagerPersistence:
+    AI_SIGNAL = {
+        'strategy_type': 'ai_analysis',
+        'type': 'LONG',
+        'symbol': 'AAPL',
+        'entry': 100.0,
+        'stop': 97.0,
+        'target': 106.0,
+        'risk': 3.0,
+        'reward': 6.0,
+        'confidence': 0.9,
+    }
+
+    def _manager(self, tmp_path, store):
+        manager = PositionManager(MagicMock(), MagicMock(), CONFIG, PARAMS, store)
+        manager.file_path = str(tmp_path / 'positions.json')
+        return manager
+
+    def test_add_and_remove_use_database(self, tmp_path, store):
+        manager = self._manager(tmp_path, store)
+        manager.add_position('AAPL', dict(self.AI_SIGNAL), 10, '2026-06-30 10:00:00')
+        store.flush()
+        assert store.positions()['AAPL']['shares'] == 10
+
+        manager.remove_position('AAPL')
+        store.flush()
+        assert store.positions() == {}
+        assert not (tmp_path / 'positions.json').exists()
+
+    def test_legacy_json_is_imported_once(self, tmp_path, store):
+        entry = dict(self.AI_SIGNAL, shares=10, entry_time='2026-06-30 10:00:00')
+        (tmp_path / 'positions.json').write_text(json.dumps({'AAPL': entry}))
+
+        manager = self._manager(tmp_path, store)
+        assert manager._read_saved_positions() == {'AAPL': entry}
+        store.flush()
+        assert store.positions() == {'AAPL': entry}
+        assert not (tmp_path / 'positions.json').exists()
+        assert (tmp_path / 'positions.json.migrated').exists()
+
+    def test_closed_positions_stay_closed_after_restart(self, tmp_path, store):
+        entry = dict(self.AI_SIGNAL, shares=10, entry_time='2026-06-30 10:00:00')
+        (tmp_path / 'positions.json').write_text(json.dumps({'AAPL': entry}))
+        self._manager(tmp_path, store)._read_saved_positions()
+
+        self._manager(tmp_path, store).remove_position('AAPL')
+        store.flush()
+
+        assert self._manager(tmp_path, store)._read_saved_positions() == {}
@@ -0,0 +1,82 @@
+"""Unit tests for the memory-mapped universe price panel."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_fetch.bar_store import BarStore
+from data_fetch.price_panel import PricePanel
+from tests.conftest import make_synthetic_bars
+
+
+def _store(tmp_path) -> BarStore:
+    store = BarStore(str(tmp_path / 'bars'))
+    long = make_synthetic_bars(300, symbol='LONG')
+    short = make_synthetic_bars(100, symbol='SHORT')
+    # Drop a day in the middle to exercise calendar gaps
+    short = short.drop(index=50).reset_index(drop=True)
+    for df in (long, short):
+        df['date'] = pd.DatetimeIndex(df['date']).tz_localize('America/New_York')
+        store.save(df['symbol'].iloc[0], df, history_start=pd.Timestamp('2000-01-01'))
+    return store, long, short
+
+
+@pytest.fixture
+def panel(tmp_path):
+    store, long, short = _store(tmp_path)
+    return PricePanel.build(store, ['LONG', 'SHORT', 'MISSING'], root=str(tmp_path / 'panel')), long, short
+
+
+class TestPricePanel:
+    def test_layout(self, panel):
+        panel, long, _ = panel
+        assert panel.symbols == ['LONG', 'SHORT']
+        assert panel.field('close').shape == (2, len(long))
+        assert panel.field('close').dtype == np.float32
+        assert panel.field('volume').dtype == np.int64
+        assert isinstance(panel.field('close'), np.memmap)
+
+    def test_view_is_zero_copy_and_trimmed(self, panel):
+        panel, _, short = panel
+        view = panel.view('SHORT')
+        assert np.shares_memory(view['close'], panel.field('close'))
+        # 99 bars spread over 100 calendar days, one gap
+        assert len(view['close']) == 100
+        assert np.isnan(view['close']).sum() == 1
+
+    def test_frame_matches_source(self, panel):
+        panel, _, short = panel
+        df = panel.frame('SHORT')
+        assert list(df.columns) == ['open', 'high', 'low', 'close', 'volume', 'date', 'symbol']
+        assert len(df) == len(short)
+        np.testing.assert_allclose(df['close'].values, short['close'].values, rtol=1e-6)
+        assert (df['date'].values == short['date'].values).all()
+
+    def test_reopen_and_fetcher_interface(self, panel):
+        panel, long, _ = panel
+        reopened = PricePanel.open(panel.root)
+        batch = reopened.get_historical_data_batch(['LONG', 'MISSING'], 5000)
+        assert set(batch) == {'LONG'}
+        assert len(batch['LONG']) == len(long)
+        assert reopened.get_historical_data('MISSING', 250) is None
+
+    def test_rebuild_switches_versions(self, tmp_path):
+        store, _, _ = _store(tmp_path)
+        root = tmp_path / 'panel'
+        first = PricePanel.build(store, ['LONG'], root=str(root))
+        (root / 'v1').mkdir()  # left behind by a crashed build
+        (root / 'close.npy').touch()  # unversioned layout
+        (root / 'README').touch()  # not the panel's
+
+        second = PricePanel.build(store, ['LONG', 'SHORT'], root=str(root))
+        assert PricePanel.open(str(root)).symbols == ['LONG', 'SHORT']
+        assert PricePanel.open(first.root).symbols == ['LONG']  # previous version kept for open readers
+        assert not (root / 'v1').exists() and not (root / 'close.npy').exists()
+
+        third = PricePanel.build(store, ['SHORT'], root=str(root))
+        assert PricePanel.open(str(root)).symbols == ['SHORT']
+        assert sorted(p.name for p in root.iterdir()) == sorted(
+            ['README', PricePanel.POINTER, os.path.basename(second.root), os.path.basename(third.root)]
+        )
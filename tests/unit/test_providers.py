@@ -0,0 +1,193 @@
+"""Unit tests for the market-data providers and provider fallback in StockDataFetcher."""
+
+import asyncio
+import datetime
+import threading
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+from ib_insync import BarData
+
+from data_fetch.fetch_executor import FetchExecutor
+from data_fetch.historical_data import StockDataFetcher
+from data_fetch.providers import (
+    BarProvider,
+    IBHistoricalPacer,
+    IBHistoricalProvider,
+    LocalFileProvider,
+    YFinanceProvider,
+    build_providers,
+)
+from tests.conftest import make_synthetic_bars
+
+
+class FakeProvider(BarProvider):
+    def __init__(self, name: str, symbols: set[str], fail: bool = False, uses_executor: bool = True):
+        self.name = name
+        self.symbols = symbols
+        self.fail = fail
+        self.uses_executor = uses_executor
+        self.max_batch = 100
+        self.calls: list[list[str]] = []
+
+    def fetch_many(self, symbols, period=None, start=None):
+        self.calls.append(list(symbols))
+        if self.fail:
+            raise ConnectionError('down')
+        return {s: make_synthetic_bars(20, symbol=s) for s in symbols if s in self.symbols}
+
+
+def _executor() -> FetchExecutor:
+    return FetchExecutor(requests_per_second=1000.0, burst=100, max_retries=0, timeout_seconds=5.0)
+
+
+class TestProviderFallback:
+    def test_batch_falls_back_for_missing_symbols_only(self):
+        primary = FakeProvider('ib', {'AAA'}, uses_executor=False)
+        secondary = FakeProvider('yfinance', {'BBB'})
+        fetcher = StockDataFetcher(executor=_executor(), providers=[primary, secondary])
+
+        result = fetcher.get_historical_data_batch(['AAA', 'BBB', 'CCC'], 30)
+
+        assert set(result) == {'AAA', 'BBB'}
+        assert primary.calls == [['AAA', 'BBB', 'CCC']]
+        assert secondary.calls == [['BBB', 'CCC']]
+        assert fetcher.executor.stats.summary()['failed_keys'] >= 1
+
+    def test_single_symbol_falls_back_when_provider_errors(self):
+        broken = FakeProvider('ib', {'AAA'}, fail=True, uses_executor=False)
+        backup = FakeProvider('local', {'AAA'})
+        fetcher = StockDataFetcher(executor=_executor(), providers=[broken, backup])
+
+        df = fetcher.get_historical_data('AAA', 30)
+        assert df is not None and (df['symbol'] == 'AAA').all()
+
+    def test_default_is_yfinance_only(self):
+        providers = build_providers({'data': {}})
+        assert [type(p) for p in providers] == [YFinanceProvider]
+
+    def test_ib_provider_needs_connection_handle(self):
+        providers = build_providers({'data': {'providers': ['ib', 'local']}}, ib=None)
+        assert [p.name for p in providers] == ['local']
+
+
+class TestIBHistoricalPacer:
+    def _pacer(self, **kwargs):
+        clock = {'now': 0.0}
+
+        async def fake_sleep(seconds):
+            clock['now'] += seconds
+
+        pacer = IBHistoricalPacer(clock=lambda: clock['now'], sleep=fake_sleep, **kwargs)
+        return pacer, clock
+
+    def test_window_limit_delays_request(self):
+        pacer, clock = self._pacer(max_requests=2, window_seconds=600, identical_gap_seconds=0)
+
+        async def run():
+            for key in ('A', 'B', 'C'):
+                async with pacer.slot((key,)):
+                    pass
+
+        asyncio.run(run())
+        assert clock['now'] == pytest.approx(600.0)
+
+    def test_identical_requests_are_spaced(self):
+        pacer, clock = self._pacer(identical_gap_seconds=15)
+
+        async def run():
+            for _ in range(3):
+                async with pacer.slot(('AAA', '1 Y')):
+                    pass
+
+        asyncio.run(run())
+        assert clock['now'] == pytest.approx(30.0)
+
+
+class TestIBHistoricalProvider:
+    def _ib(self, bars_by_symbol):
+        ib = MagicMock()
+        ib.isConnected.return_value = True
+        ib.run.side_effect = asyncio.run
+
+        async def qualify(contract):
+            return [contract]
+
+        async def historical(contract, **kwargs):
+            bars = bars_by_symbol[contract.symbol]
+            if isinstance(bars, Exception):
+                raise bars
+            return bars
+
+        ib.qualifyContractsAsync.side_effect = qualify
+        ib.reqHistoricalDataAsync.side_effect = historical
+        return ib
+
+    def test_returns_bars_in_bot_schema(self):
+        bars = [BarData(date=datetime.date(2026, 6, d), open=10.0, high=11.0, low=9.0, close=10.5, volume=1000) for d in (1, 2, 3)]
+        provider = IBHistoricalProvider(self._ib({'AAA': bars, 'BBB': RuntimeError('no data')}))
+
+        result = provider.fetch_many(['AAA', 'BBB'], period='1mo')
+
+        assert set(result) == {'AAA'}
+        df = result['AAA']
+        assert list(df.columns) == ['open', 'high', 'low', 'close', 'volume', 'date', 'symbol']
+        assert str(df['date'].dt.tz) == 'America/New_York'
+        assert df['date'].iloc[0] == pd.Timestamp('2026-06-01', tz='America/New_York')
+
+    def test_ib_loop_running_in_another_thread(self):
+        bars = [BarData(date=datetime.date(2026, 6, 1), open=10.0, high=11.0, low=9.0, close=10.5, volume=1000)]
+        ib = self._ib({'AAA': bars})
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            result = IBHistoricalProvider(ib, loop=loop).fetch_many(['AAA'], period='1mo')
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+        assert list(result) == ['AAA']
+        ib.run.assert_not_called()  # scheduled on the running loop, not run to completion here
+
+    def test_called_on_the_running_loop(self):
+        bars = [BarData(date=datetime.date(2026, 6, 1), open=10.0, high=11.0, low=9.0, close=10.5, volume=1000)]
+        ib = self._ib({'AAA': bars})
+
+        async def on_loop():
+            provider = IBHistoricalProvider(ib, loop=asyncio.get_running_loop())
+            with pytest.raises(RuntimeError, match='fetch_many_async'):
+                provider.fetch_many(['AAA'], period='1mo')
+            return await provider.fetch_many_async(['AAA'], period='1mo')
+
+        assert list(asyncio.run(on_loop())) == ['AAA']
+        ib.run.assert_not_called()
+
+    def test_base_class_is_abstract(self):
+        with pytest.raises(TypeError):
+            BarProvider()
+
+    def test_duration_switches_to_years(self):
+        assert IBHistoricalProvider.duration('1mo', None) == '31 D'
+        assert IBHistoricalProvider.duration('5y', None) == '6 Y'
+
+    def test_disconnected_raises(self):
+        ib = MagicMock()
+        ib.isConnected.return_value = False
+        with pytest.raises(ConnectionError):
+            IBHistoricalProvider(ib).fetch_many(['AAA'], period='1mo')
+
+
+class TestLocalFileProvider:
+    def test_reads_csv_and_filters_by_start(self, tmp_path):
+        bars = make_synthetic_bars(50, symbol='AAA').drop(columns=['symbol'])
+        bars.to_csv(tmp_path / 'AAA.csv', index=False)
+        provider = LocalFileProvider(str(tmp_path))
+
+        start = pd.Timestamp(bars['date'].iloc[40]).strftime('%Y-%m-%d')
+        result = provider.fetch_many(['AAA', 'MISSING'], start=start)
+
+        assert set(result) == {'AAA'}
+        assert len(result['AAA']) == 10
+        assert result['AAA']['close'].iloc[-1] == pytest.approx(bars['close'].iloc[-1])
@@ -80,7 +80,7 @@ class TestGetStopLossPct:
         low = close - 1.0
         return pd.DataFrame({'close': close, 'high': high, 'low': low})
 
-    @patch('execution.risk_manager.yf')
+    @patch('data_fetch.market_context.yf')
     def test_normal_vix(self, mock_yf, rm):
         mock_yf.Ticker.return_value.fast_info = {'lastPrice': 20.0}
         df = self._make_df()
@@ -89,7 +89,7 @@ class TestGetStopLossPct:
         expected = last_range * PARAMS['strategy_retest_200ma']['ATR']
         assert abs(sl - expected) < 1e-6
 
-    @patch('execution.risk_manager.yf')
+    @patch('data_fetch.market_context.yf')
     def test_high_vix_wider_stop(self, mock_yf, rm):
         mock_yf.Ticker.return_value.fast_info = {'lastPrice': 30.0}
         df = self._make_df()
@@ -98,7 +98,7 @@ class TestGetStopLossPct:
         expected = last_range * (PARAMS['strategy_retest_200ma']['ATR'] + 0.5)
         assert abs(sl - expected) < 1e-6
 
-    @patch('execution.risk_manager.yf')
+    @patch('data_fetch.market_context.yf')
     def test_low_vix_tighter_stop(self, mock_yf, rm):
         mock_yf.Ticker.return_value.fast_info = {'lastPrice': 12.0}
         df = self._make_df()
@@ -107,7 +107,7 @@ class TestGetStopLossPct:
         expected = last_range * (PARAMS['strategy_retest_200ma']['ATR'] - 0.5)
         assert abs(sl - expected) < 1e-6
 
-    @patch('execution.risk_manager.yf')
+    @patch('data_fetch.market_context.yf')
     def test_vix_fetch_failure_defaults(self, mock_yf, rm):
         mock_yf.Ticker.side_effect = Exception('network error')
         df = self._make_df()
@@ -0,0 +1,241 @@
+"""Vectorized TrendDetector vs. the original loop implementation (kept here as the reference)."""
+
+import tracemalloc
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from execution.risk_manager import RiskManager
+from strategy.retest_200ma import pattern_engine
+from strategy.retest_200ma.indicators import TrendIndicator
+from strategy.retest_200ma.trend_detector import TrendDetector
+from strategy.retest_200ma.validators import TrendValidator
+from tests.conftest import CONFIG, PARAMS, make_pattern_bars, make_synthetic_bars
+
+
+def _fake_stop_loss(self, df):
+    high, low, close = (np.asarray(df[c])[-1] for c in ('high', 'low', 'close'))
+    return float((high - low) / close * 1.5)
+
+
+def reference_detect(DF: pd.DataFrame, params: dict, side: str) -> dict | None:
+    """The nested-loop detector TrendDetector used before vectorization."""
+    p = params['strategy_retest_200ma']
+    validator = TrendValidator(DF, CONFIG, params)
+    ma200, close, high, low, volume = (DF[c].values for c in ('ma200', 'close', 'high', 'low', 'volume'))
+    avg_volume = volume[-50:].mean() if len(volume) >= 50 else volume.mean()
+    long = side == 'LONG'
+
+    for i in range(len(DF) - 5, max(len(DF) - p['lookback_days'], 0), -1):
+        if i < 5:
+            continue
+        if long and not validator.is_ma_trending_up_or_flat(ma200, i):
+            continue
+        if not long and not validator.is_ma_trending_down_or_flat(ma200, i):
+            continue
+        avg_price_before = close[i - 5 : i].mean()
+        avg_ma_before = ma200[i - 5 : i].mean()
+        if long:
+            ok = avg_price_before < avg_ma_before * 0.98 and close[i] > ma200[i] and close[i - 1] <= ma200[i - 1]
+        else:
+            ok = avg_price_before > avg_ma_before * 1.02 and close[i] < ma200[i] and close[i - 1] >= ma200[i - 1]
+        if not ok:
+            continue
+        volume_ratio = volume[i] / avg_volume
+        if volume_ratio < p['min_breakout_volume']:
+            continue
+        body = close[i] - low[i] if long else high[i] - close[i]
+        strength = body / (high[i] - low[i]) if (high[i] - low[i]) > 0 else 0
+        if strength < p['min_breakout_strength']:
+            continue
+
+        for j in range(i + 2, min(i + 8, len(DF))):
+            if long and not validator.is_ma_trending_up_or_flat(ma200, j):
+                continue
+            if not long and not validator.is_ma_trending_down_or_flat(ma200, j):
+                continue
+            edge = low[j] if long else high[j]
+            if not abs(edge - ma200[j]) / ma200[j] < p['retest_distance']:
+                continue
+            retest_volume_ratio = volume[j] / avg_volume
+            if retest_volume_ratio > volume_ratio * p['max_retest_volume_ratio'] or retest_volume_ratio > p['max_retest_volume_absolute']:
+                continue
+            if j >= len(DF) - 1:
+                continue
+            if long:
+                bounce = (close[-1] - low[j]) / low[j]
+            else:
+                if close[-1] >= low[j]:
+                    continue
+                bounce = (high[j] - close[-1]) / high[j]
+            if bounce < p['min_bounce_strength']:
+                continue
+            if (long and not close[-1] > close[-2]) or (not long and not close[-1] < close[-2]):
+                continue
+            sl = RiskManager(params).get_stop_loss_pct(DF)
+            entry = close[-1]
+            stop = low[j] * (1 - sl) if long else high[j] * (1 + sl)
+            risk = entry - stop if long else stop - entry
+            if risk <= 0 or risk / entry > 0.05:
+                continue
+            if len(DF) - 1 - j > p['max_days_since_retest']:
+                continue
+            target = entry + risk * p['risk_reward_ratio'] if long else entry - risk * p['risk_reward_ratio']
+            digits = 4 if entry < 1 else 2
+            return {
+                'type': side,
+                'entry': round(entry, digits),
+                'stop': round(stop, digits),
+                'target': round(target, digits),
+                'risk': risk,
+                'breakout_date': DF['date'].iloc[i],
+                'retest_date': DF['date'].iloc[j],
+                'volume_ratio': volume_ratio,
+                'retest_volume_ratio': retest_volume_ratio,
+                'bounce_strength': bounce,
+                'strength': strength,
+                'ma_slope': validator.calculate_ma_slope(ma200, len(DF) - 1),
+            }
+    return None
+
+
+def _pattern_frame(rng: np.random.Generator, side: str, n: int = 30) -> pd.DataFrame:
+    """30 bars around a (possibly failing) breakout/retest so both outcomes are well covered."""
+    sign = 1 if side == 'LONG' else -1
+    t = np.arange(n)
+    ma = 100.0 * (1 + rng.uniform(-0.0015, 0.0015) * t)
+    b = int(rng.integers(5, n - 4))
+    r = min(b + int(rng.integers(2, 8)), n - 1)
+
+    close = ma * (1 - sign * rng.uniform(0.015, 0.06)) * (1 + rng.normal(0, 0.004, n))
+    close[b:] = ma[b:] * (1 + sign * rng.uniform(0.0, 0.05, n - b))
+    close[-1] = ma[-1] * (1 + sign * rng.uniform(0.0, 0.06))
+    close[-2] = close[-1] * (1 - sign * rng.uniform(-0.005, 0.02))
+    open_ = close * (1 + rng.normal(0, 0.004, n))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.006, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.006, n))
+    if side == 'LONG':
+        low[r] = ma[r] * (1 + rng.uniform(-0.006, 0.006))
+        high[b] = close[b] * (1 + rng.uniform(0, 0.003))
+    else:
+        high[r] = ma[r] * (1 + rng.uniform(-0.006, 0.006))
+        low[b] = close[b] * (1 - rng.uniform(0, 0.003))
+    low = np.minimum(low, close)
+    high = np.maximum(high, close)
+
+    volume = 1e6 * rng.uniform(0.5, 1.5, n)
+    volume[b] *= rng.uniform(1.0, 4.0)
+    volume[r] *= rng.uniform(0.1, 1.0)
+    return pd.DataFrame(
+        {
+            'open': open_,
+            'high': high,
+            'low': low,
+            'close': close,
+            'volume': volume,
+            'date': pd.bdate_range(end='2026-06-30', periods=n),
+            'symbol': 'SYN',
+            'ma200': ma,
+        }
+    )
+
+
+def _compare(signal: dict | None, expected: dict | None) -> None:
+    assert (signal is None) == (expected is None)
+    if signal is None:
+        return
+    ratio_key = 'breakout_volume_ratio' if expected['type'] == 'LONG' else 'breakdown_volume_ratio'
+    strength_key = 'breakout_strength' if expected['type'] == 'LONG' else 'breakdown_strength'
+    assert signal['type'] == expected['type']
+    for key in ('entry', 'stop', 'target', 'risk', 'breakout_date', 'retest_date', 'retest_volume_ratio', 'bounce_strength', 'ma_slope'):
+        assert signal[key] == expected[key], key
+    assert signal[ratio_key] == expected['volume_ratio']
+    assert signal[strength_key] == expected['strength']
+
+
+@patch.object(RiskManager, 'get_stop_loss_pct', _fake_stop_loss)
+class TestVectorizedDetector:
+    @pytest.mark.parametrize('side', ['LONG', 'SHORT'])
+    def test_matches_reference_loop(self, side):
+        rng = np.random.default_rng(123 if side == 'LONG' else 456)
+        found = 0
+        for _ in range(1500):
+            DF = _pattern_frame(rng, side)
+            detector = TrendDetector(DF, CONFIG, PARAMS)
+            signal = detector.detect_long_pattern(DF) if side == 'LONG' else detector.detect_short_pattern(DF)
+            expected = reference_detect(DF, PARAMS, side)
+            _compare(signal, expected)
+            found += expected is not None
+        # The generator must exercise the success path, not just agree on "no signal"
+        assert found >= 5
+
+    def test_matches_reference_on_random_walks(self):
+        rng = np.random.default_rng(7)
+        for _ in range(500):
+            DF = _pattern_frame(rng, 'LONG')
+            DF['close'] = DF['ma200'] * (1 + np.cumsum(rng.normal(0, 0.01, len(DF))))
+            DF['high'] = np.maximum(DF['high'], DF['close'])
+            DF['low'] = np.minimum(DF['low'], DF['close'])
+            detector = TrendDetector(DF, CONFIG, PARAMS)
+            _compare(detector.detect_long_pattern(DF), reference_detect(DF, PARAMS, 'LONG'))
+            _compare(detector.detect_short_pattern(DF), reference_detect(DF, PARAMS, 'SHORT'))
+
+    def test_stop_loss_computed_at_most_once(self):
+        rng = np.random.default_rng(123)
+        calls = []
+
+        def counting(self, df):
+            calls.append(1)
+            return _fake_stop_loss(self, df)
+
+        with patch.object(RiskManager, 'get_stop_loss_pct', counting):
+            for _ in range(200):
+                DF = _pattern_frame(rng, 'LONG')
+                calls.clear()
+                TrendDetector(DF, CONFIG, PARAMS).detect_long_pattern(DF)
+                assert len(calls) <= 1
+
+    def test_batch_rows_match_single_rows(self):
+        rng = np.random.default_rng(99)
+        frames = [_pattern_frame(rng, 'LONG') for _ in range(200)]
+        stacked = {c: np.stack([f[c].values for f in frames]) for c in ('ma200', 'close', 'high', 'low', 'volume')}
+        sl = np.array([_fake_stop_loss(None, f) for f in frames])
+
+        params = PARAMS['strategy_retest_200ma']
+        batch = pattern_engine.detect(
+            'LONG', stacked['ma200'], stacked['close'], stacked['high'], stacked['low'], stacked['volume'], params, lambda rows: sl[rows]
+        )
+        for row, DF in enumerate(frames):
+            expected = reference_detect(DF, PARAMS, 'LONG')
+            assert batch['found'][row] == (expected is not None)
+            if expected is not None:
+                assert DF['date'].iloc[batch['breakout_idx'][row]] == expected['breakout_date']
+                assert DF['date'].iloc[batch['retest_idx'][row]] == expected['retest_date']
+                assert batch['risk'][row] == expected['risk']
+
+
+@patch.object(RiskManager, 'get_vix', lambda self: 20.0)
+class TestZeroCopy:
+    def _peak_bytes(self, df: pd.DataFrame) -> int:
+        TrendIndicator(df, CONFIG, PARAMS).detect_breakout_and_retest()
+        tracemalloc.start()
+        TrendIndicator(df, CONFIG, PARAMS).detect_breakout_and_retest()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+
+    def test_allocations_do_not_grow_with_history(self):
+        rng = np.random.default_rng(3)
+        short = self._peak_bytes(make_pattern_bars(rng, 'AAA', 260))
+        long = self._peak_bytes(make_pattern_bars(rng, 'AAA', 26_000))
+        # 26k rows x 7 columns would be well over 1 MB per frame copy
+        assert long < 100_000
+        assert long < short * 1.5
+
+    def test_input_frame_is_not_modified(self):
+        df = make_synthetic_bars(500)
+        before = df.copy()
+        TrendIndicator(df, CONFIG, PARAMS).detect_breakout_and_retest()
+        pd.testing.assert_frame_equal(df, before)
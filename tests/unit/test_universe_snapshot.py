@@ -0,0 +1,84 @@
+"""Unit tests for the cached, diff-based ticker universe refresh."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from data_fetch.metadata_cache import TickerMetadataCache
+from data_fetch.stock_fetcher import StockTickerFetcher
+from data_fetch.universe_snapshot import UniverseSnapshot
+
+SP500_CSV = 'Symbol,Security\nAAPL,Apple\nMSFT,Microsoft\n'
+NASDAQ_JSON = json.dumps([{'symbol': 'NVDA', 'sector': 'Technology', 'industry': 'Semiconductors'}])
+
+
+def _response(status=200, text='', headers=None):
+    response = MagicMock()
+    response.status_code = status
+    response.text = text
+    response.headers = headers or {}
+    if status >= 400:
+        response.raise_for_status.side_effect = Exception(f'HTTP {status}')
+    return response
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    with patch.object(StockTickerFetcher, 'save_stock_list', return_value=[]):
+        with patch.object(StockTickerFetcher, 'categorize_stocks', return_value={}):
+            fetcher = StockTickerFetcher(
+                metadata_cache=TickerMetadataCache(str(tmp_path / 'meta.json')),
+                universe=UniverseSnapshot(str(tmp_path / 'universe.json')),
+            )
+    fetcher.file_path = str(tmp_path / 'stock_list.txt')
+    return fetcher
+
+
+class TestUniverseRefresh:
+    @patch('data_fetch.stock_fetcher.requests')
+    def test_first_refresh_saves_snapshot(self, mock_requests, fetcher):
+        mock_requests.get.side_effect = [
+            _response(text=SP500_CSV, headers={'ETag': '"sp-1"'}),
+            _response(text=NASDAQ_JSON, headers={'ETag': '"nq-1"'}),
+        ]
+
+        stocks = fetcher.save_stock_list()
+
+        assert stocks == ['AAPL', 'MSFT', 'NVDA']
+        assert fetcher.universe_diff == {'added': ['AAPL', 'MSFT', 'NVDA'], 'removed': []}
+        reloaded = UniverseSnapshot(fetcher.universe.file_path)
+        assert reloaded.symbols == stocks
+        assert reloaded.conditional_headers('sp500') == {'If-None-Match': '"sp-1"'}
+
+    @patch('data_fetch.stock_fetcher.requests')
+    def test_fresh_snapshot_skips_network(self, mock_requests, fetcher):
+        fetcher.universe.update_symbols(['AAPL'])
+        open(fetcher.file_path, 'w').close()
+
+        assert fetcher.save_stock_list() == ['AAPL']
+        mock_requests.get.assert_not_called()
+
+    @patch('data_fetch.stock_fetcher.requests')
+    def test_not_modified_reuses_cached_sources_and_emits_diff(self, mock_requests, fetcher):
+        fetcher.universe.set_source('sp500', ['AAPL', 'MSFT'], '"sp-1"', None)
+        fetcher.universe.set_source('nasdaq', ['NVDA'], '"nq-1"', None)
+        fetcher.universe.symbols = ['AAPL', 'MSFT', 'NVDA', 'OLD']
+        fetcher.metadata_cache.set('OLD', 'Energy', 'Oil & Gas')
+        mock_requests.get.side_effect = [_response(status=304), _response(status=304)]
+
+        stocks = fetcher.save_stock_list()
+
+        assert stocks == ['AAPL', 'MSFT', 'NVDA']
+        assert fetcher.universe_diff == {'added': [], 'removed': ['OLD']}
+        assert fetcher.metadata_cache.get('OLD') is None
+        sent_headers = mock_requests.get.call_args_list[0].kwargs['headers']
+        assert sent_headers == {'If-None-Match': '"sp-1"'}
+
+    @patch('data_fetch.stock_fetcher.requests')
+    def test_offline_falls_back_to_snapshot(self, mock_requests, fetcher):
+        fetcher.universe.set_source('sp500', ['AAPL'], None, None)
+        fetcher.universe.set_source('nasdaq', ['NVDA'], None, None)
+        mock_requests.get.side_effect = ConnectionError('offline')
+
+        assert fetcher.save_stock_list() == ['AAPL', 'NVDA']
@@ -0,0 +1,91 @@
+"""Unit tests for lazily materialized sliding windows."""
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+from strategy.ai_analysis.cnn_trainer import CNNTrainer
+from strategy.ai_analysis.data_preparation.feature_builder import FeatureBuilder
+from strategy.ai_analysis.data_preparation.windows import SlidingWindows
+from strategy.ai_analysis.lstm_trainer import LSTMTrainer
+from strategy.ai_analysis.window_dataset import WindowDataset
+
+
+def _stacked(base: np.ndarray, window: int, starts: np.ndarray) -> np.ndarray:
+    return np.stack([base[s : s + window].reshape(-1) for s in starts])
+
+
+class TestSlidingWindows:
+    def test_indexing_matches_stacked_windows(self):
+        base = np.random.default_rng(0).normal(size=(50, 4)).astype(np.float32)
+        windows = SlidingWindows(base, 10)
+        dense = _stacked(base, 10, np.arange(41))
+
+        assert windows.shape == (41, 40)
+        np.testing.assert_array_equal(windows[:], dense)
+        np.testing.assert_array_equal(np.asarray(windows), dense)
+        np.testing.assert_array_equal(windows[7], dense[7])
+        np.testing.assert_array_equal(windows[-1:], dense[-1:])
+        np.testing.assert_array_equal(windows[np.array([30, 2, 2])], dense[[30, 2, 2]])
+        np.testing.assert_array_equal(windows.take(np.arange(5, 20))[3:6], dense[8:11])
+
+    def test_views_share_the_base(self):
+        base = np.arange(60, dtype=np.float32).reshape(20, 3)
+        windows = SlidingWindows(base, 5)
+        assert np.shares_memory(windows._windows, base)
+        assert windows.take(np.arange(10)).base is base
+        assert not windows._windows.flags.writeable
+
+    def test_concat(self):
+        rng = np.random.default_rng(1)
+        a, b = rng.normal(size=(30, 2)), rng.normal(size=(25, 2))
+        joined = SlidingWindows.concat([SlidingWindows(a, 6, np.arange(20)), SlidingWindows(b, 6, np.arange(15))])
+        np.testing.assert_array_equal(joined[:], np.concatenate([_stacked(a, 6, np.arange(20)), _stacked(b, 6, np.arange(15))]))
+
+
+@patch('data_fetch.market_context.yf')
+def test_lazy_build_windows_matches_dense(mock_yf, synthetic_bars):
+    mock_yf.Ticker.return_value.history.return_value = pd.DataFrame()
+    fb = FeatureBuilder(window_size=10)
+    rbm_dense, dense, labels_dense = fb.build_windows(synthetic_bars, include_labels=True)
+    rbm_lazy, lazy, labels_lazy = fb.build_windows(synthetic_bars, include_labels=True, lazy=True)
+
+    assert isinstance(lazy, SlidingWindows)
+    np.testing.assert_array_equal(lazy[:], dense)
+    np.testing.assert_array_equal(rbm_lazy[:], rbm_dense)
+    np.testing.assert_array_equal(labels_lazy, labels_dense)
+
+    _, short, _ = fb.build_windows(synthetic_bars.iloc[:5], include_labels=False, lazy=True)
+    assert len(short) == 0
+    assert short[:].shape == (0, dense.shape[1])
+
+
+class TestWindowTraining:
+    def _data(self):
+        rng = np.random.default_rng(2)
+        base = rng.normal(size=(200, 4)).astype(np.float32)
+        windows = SlidingWindows(base, 5)
+        labels = rng.integers(0, 3, len(windows))
+        return windows, labels
+
+    def test_loader_batches(self):
+        windows, labels = self._data()
+        batches = list(WindowDataset(windows, labels).loader(batch_size=64))
+        assert [len(y) for _, y in batches] == [64, 64, 64, 4]
+        np.testing.assert_array_equal(torch.cat([x for x, _ in batches]).numpy(), windows[:])
+
+    @pytest.mark.parametrize(
+        'make_trainer', [lambda: LSTMTrainer(n_features=4, window_size=5, epochs=2), lambda: CNNTrainer(input_length=20, epochs=2)]
+    )
+    def test_lazy_training_matches_dense(self, make_trainer):
+        windows, labels = self._data()
+        results = []
+        for x in (windows[:], windows):
+            torch.manual_seed(0)
+            trainer = make_trainer()
+            trainer.train(x, labels, val_split=0.2)
+            results.append(trainer.predict(windows[-10:])[1])
+        np.testing.assert_allclose(results[0], results[1], rtol=1e-5)